@@ -1,22 +1,95 @@
 #!/usr/bin/env python3
 """
-GPU Scheduler Check Service - Validates GPU assignments by logging node name and CUDA_VISIBLE_DEVICES
+GPU Scheduler Check Service - Validates GPU assignments by logging node name and CUDA_VISIBLE_DEVICES,
+and optionally reporting them to the fleet aggregator
 """
 
 import os
 import sys
+import json
 import time
+import random
 import signal
 import logging
 import socket
+import urllib.error
+import urllib.request
 from typing import Optional
 
 
+class AssignmentReporter:
+    """
+    Pushes this pod's GPU assignment to the fleet aggregator
+    
+    The report is sent once after a random delay of up to `jitter` seconds,
+    so a whole StatefulSet starting together does not reach the aggregator
+    at once, and then again only when it changes; changes within the delay
+    go out together. Failed sends are retried with backoff, and the report
+    is re-sent about every `refresh` seconds in case the aggregator lost it.
+    """
+    
+    def __init__(self, url: str, jitter: float = 10.0, refresh: float = 300.0, timeout: float = 5.0):
+        self.url = url
+        self.jitter = jitter
+        self.refresh = refresh if refresh > 0 else float('inf')
+        self.timeout = timeout
+        self.last_sent: Optional[dict] = None
+        self.pending: Optional[dict] = None
+        self.send_at: Optional[float] = None
+        self.refresh_at = float('inf')
+        self.failures = 0
+        self.logger = logging.getLogger(__name__)
+        
+    def update(self, report: dict, now: float):
+        """Note the current report, scheduling a send if it differs from the last one sent"""
+        if report == self.last_sent and now < self.refresh_at:
+            return
+        self.pending = report
+        if self.send_at is None:
+            self.send_at = now + random.uniform(0, self.jitter)
+            
+    def seconds_until_due(self, now: float) -> Optional[float]:
+        """Seconds until the pending report is due, or None if nothing is pending"""
+        if self.send_at is None:
+            return None
+        return max(self.send_at - now, 0.0)
+        
+    def flush(self, now: float) -> bool:
+        """Send the pending report if it is due; returns whether one was sent"""
+        if self.pending is None or self.send_at is None or now < self.send_at:
+            return False
+            
+        if self.send(self.pending):
+            self.last_sent, self.pending, self.send_at = self.pending, None, None
+            self.failures = 0
+            self.refresh_at = now + self.refresh * random.uniform(0.8, 1.2)
+            return True
+            
+        self.failures += 1
+        self.send_at = now + min(2 ** self.failures, self.refresh, 300) * random.uniform(0.5, 1.0)
+        return False
+        
+    def send(self, report: dict) -> bool:
+        """POST one report to the aggregator"""
+        body = json.dumps({'reports': [report]}, separators=(',', ':')).encode()
+        request = urllib.request.Request(self.url, data=body, method='POST',
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+            self.logger.info(f"Reported GPU assignment to {self.url}")
+            return True
+        except (urllib.error.URLError, OSError) as e:
+            self.logger.warning(f"Could not report GPU assignment to {self.url}: {e}")
+            return False
+
+
 class GPUSchedulerCheck:
     """Test service to validate GPU scheduler assignments"""
     
-    def __init__(self, log_interval: int = 10):
+    def __init__(self, log_interval: int = 10, reporter: Optional[AssignmentReporter] = None):
         self.log_interval = log_interval
+        self.reporter = reporter
         self.running = True
         self.setup_logging()
         self.setup_signal_handlers()
@@ -104,10 +177,33 @@ class GPUSchedulerCheck:
         
         self.logger.debug(f"Pod: {pod_name}, Namespace: {namespace}")
         
+    def get_report(self) -> dict:
+        """The compact assignment report sent to the fleet aggregator"""
+        return {
+            'namespace': os.environ.get('POD_NAMESPACE', ''),
+            'pod': os.environ.get('POD_NAME') or os.environ.get('HOSTNAME', 'unknown-pod'),
+            'uid': os.environ.get('POD_UID', ''),
+            'node': self.get_node_name(),
+            'devices': self.get_cuda_visible_devices()
+        }
+        
+    def next_wakeup(self, next_log: float) -> float:
+        """Seconds to sleep until the next log line or due report"""
+        now = time.monotonic()
+        wait = next_log - now
+        if self.reporter:
+            self.reporter.update(self.get_report(), now)
+            due = self.reporter.seconds_until_due(now)
+            if due is not None:
+                wait = min(wait, due)
+        return max(wait, 0.0)
+        
     def run(self):
         """Main service loop"""
         self.logger.info("GPU Scheduler Check service starting...")
         self.logger.info(f"Log interval: {self.log_interval} seconds")
+        if self.reporter:
+            self.logger.info(f"Reporting GPU assignment to {self.reporter.url}")
         
         # Initial environment validation
         self.validate_environment()
@@ -116,11 +212,18 @@ class GPUSchedulerCheck:
         self.log_gpu_assignment()
         
         # Main loop
+        next_log = time.monotonic() + self.log_interval
         while self.running:
             try:
-                time.sleep(self.log_interval)
-                if self.running:  # Check again after sleep
+                time.sleep(self.next_wakeup(next_log))
+                if not self.running:  # Check again after sleep
+                    break
+                    
+                if self.reporter:
+                    self.reporter.flush(time.monotonic())
+                if time.monotonic() >= next_log:
                     self.log_gpu_assignment()
+                    next_log += self.log_interval
                     
             except KeyboardInterrupt:
                 self.logger.info("Received keyboard interrupt, stopping...")
@@ -142,8 +245,18 @@ def main():
         print("LOG_INTERVAL must be at least 1 second", file=sys.stderr)
         sys.exit(1)
         
+    # Report to the fleet aggregator when it is configured
+    reporter = None
+    report_url = os.environ.get('REPORT_URL')
+    if report_url:
+        reporter = AssignmentReporter(
+            report_url,
+            jitter=float(os.environ.get('REPORT_JITTER_SECONDS', '10')),
+            refresh=float(os.environ.get('REPORT_REFRESH_SECONDS', '300'))
+        )
+        
     # Create and run the service
-    service = GPUSchedulerCheck(log_interval=log_interval)
+    service = GPUSchedulerCheck(log_interval=log_interval, reporter=reporter)
     
     try:
         service.run()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Pooled, rate-limited transport for the scheduler's Kubernetes API calls
+"""
+
+import socket
+import threading
+import time
+from typing import Optional
+
+from kubernetes import client
+from urllib3.connection import HTTPConnection
+
+from metrics import FAST_BUCKETS, Counter, Histogram
+
+
+API_REQUESTS = Counter('gpu_scheduler_api_requests_total', 'Kubernetes API requests sent by the scheduler')
+API_THROTTLE_SECONDS = Histogram('gpu_scheduler_api_throttle_seconds',
+                                 'Time API requests waited for the client-side rate limiter',
+                                 buckets=FAST_BUCKETS)
+
+
+class TokenBucket:
+    """
+    Client-side QPS/burst limit shared by all API calls, like client-go's
+
+    The bucket holds `burst` tokens and refills at `qps` tokens per second.
+    Every request takes a token, waiting for one when the bucket is empty,
+    so bursts up to `burst` go out at once and sustained load is capped at
+    `qps` however many threads are calling.
+    """
+
+    def __init__(self, qps: float, burst: int):
+        self.qps = qps
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return the seconds to wait before using it"""
+        with self._lock:
+            # A negative balance is the wait for tokens already promised to other callers
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.qps) - 1
+            self._last = now
+            return -self._tokens / self.qps if self._tokens < 0 else 0.0
+
+    def wait(self):
+        """Block until a token is available"""
+        delay = self.reserve()
+        API_THROTTLE_SECONDS.observe(delay)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class PooledApiClient(client.ApiClient):
+    """
+    ApiClient that takes a token from a shared bucket before every request
+    and applies default timeouts
+
+    Requests without their own `_request_timeout` get `connect_timeout` and
+    `request_timeout`; watches only get the connect timeout, since they stay
+    open for minutes and are ended by the server's timeoutSeconds.
+    """
+
+    def __init__(self, configuration: client.Configuration, rate_limiter: Optional[TokenBucket] = None,
+                 connect_timeout: float = 5, request_timeout: float = 30):
+        super().__init__(configuration)
+        self.rate_limiter = rate_limiter
+        self.connect_timeout = connect_timeout
+        self.request_timeout = request_timeout
+
+    def request(self, method, url, query_params=None, headers=None, post_params=None, body=None,
+                _preload_content=True, _request_timeout=None):
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait()
+        API_REQUESTS.inc()
+        if _request_timeout is None:
+            watching = any(key == 'watch' and value for key, value in query_params or ())
+            _request_timeout = (self.connect_timeout, None if watching else self.request_timeout)
+        return super().request(method, url, query_params=query_params, headers=headers, post_params=post_params,
+                               body=body, _preload_content=_preload_content, _request_timeout=_request_timeout)
+
+
+def keepalive_socket_options(idle: int):
+    """TCP keep-alive probes after `idle` seconds, so dead API server connections are noticed"""
+    options = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    if hasattr(socket, 'TCP_KEEPIDLE'):
+        options += [(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle),
+                    (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(idle // 3, 1)),
+                    (socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3)]
+    return options
+
+
+def create_api_client(configuration: Optional[client.Configuration] = None, pool_size: int = 64,
+                      qps: float = 50, burst: int = 100, connect_timeout: float = 5, request_timeout: float = 30,
+                      keepalive_idle: int = 30) -> PooledApiClient:
+    """
+    Build the API client all of the scheduler's API objects share
+
+    `pool_size` connections to the API server are kept open and reused, so
+    concurrent binds do not queue for one of urllib3's default few or open
+    and discard extra connections. `qps` <= 0 disables the rate limit.
+    """
+    configuration = configuration or client.Configuration.get_default_copy()
+    configuration.connection_pool_maxsize = pool_size
+    rate_limiter = TokenBucket(qps, burst) if qps > 0 else None
+    api_client = PooledApiClient(configuration, rate_limiter, connect_timeout, request_timeout)
+    if keepalive_idle > 0:
+        # Applies to the connection pools the manager creates from now on
+        api_client.rest_client.pool_manager.connection_pool_kw['socket_options'] = \
+            keepalive_socket_options(keepalive_idle)
+    return api_client
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+End-to-end scheduler throughput benchmark against a fake Kubernetes API server
+
+Starts the fake API server in its own process with M labelled GPU nodes,
+runs GPUScheduler against it, creates N pending pods at once and measures
+pods bound per second, creation-to-bind latency percentiles and API calls
+per pod. Results are printed as JSON and optionally written to a file:
+
+    python benchmarks/bench_scheduler.py --pods 2000 --nodes 100 --output results.json
+
+With --shard-count, pods are spread over --namespaces namespaces and labelled
+with their shard as the webhook would, and --instances sharded schedulers
+run in separate processes:
+
+    python benchmarks/bench_scheduler.py --pods 4000 --shard-count 64 --instances 4
+
+Schedulers use the pooled API transport; --api-qps and --api-burst apply
+its client-side rate limit, which is off by default here.
+"""
+
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import os
+import platform
+import sys
+import threading
+import time
+import urllib.request
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kubernetes import client
+
+from api_transport import create_api_client
+from bench_stats import percentile
+from fake_apiserver import FakeAPIServer, make_pod
+from scheduler import GPUScheduler
+from sharding import SHARD_LABEL, pod_dict_shard
+
+
+def run_api_server(nodes: int, gpus_per_node: int, port_pipe):
+    """Fake API server process entry point"""
+    api = FakeAPIServer()
+    for i in range(nodes):
+        api.add_node(f"worker{i + 1}", f"node{i + 1}", gpus_per_node)
+    port_pipe.send(api.serve())
+    threading.Event().wait()
+
+
+def build_pods(count: int, nodes: int, gpus_per_node: int, mode: str, namespaces: int = 1,
+               shard_count: int = 0) -> List[dict]:
+    """
+    Synthetic pods spread evenly over the nodes, one GPU each
+
+    Each namespace holds one StatefulSet-style workload whose map covers its
+    own pods; with shard_count the pods carry the webhook's shard label.
+    """
+    pods = []
+    for n in range(namespaces):
+        namespace = f"bench-{n}" if namespaces > 1 else 'default'
+        indices = range(n, count, namespaces)
+        if mode == 'count':
+            annotations = {'gpu-count': '1'}
+        else:
+            gpu_map = '\n'.join(f"{j}=node{i % nodes + 1}:{(i // nodes) % gpus_per_node}"
+                                 for j, i in enumerate(indices))
+            annotations = {'gpu-scheduling-map': gpu_map}
+
+        for j in range(len(indices)):
+            pod = make_pod(f"bench-{j}", annotations, namespace=namespace)
+            if shard_count:
+                pod['metadata']['labels'][SHARD_LABEL] = str(pod_dict_shard(pod, shard_count))
+            pods.append(pod)
+    return pods
+
+
+def control(base_url: str, path: str, body=None) -> dict:
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(base_url + path, data=data, method='POST' if data is not None else 'GET',
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def make_api_client(base_url: str, args) -> client.ApiClient:
+    """The scheduler's pooled transport pointed at the fake API server"""
+    configuration = client.Configuration()
+    configuration.host = base_url
+    return create_api_client(configuration, pool_size=args.api_pool_size, qps=args.api_qps, burst=args.api_burst)
+
+
+def run_sharded_instance(base_url: str, identity: str, args):
+    """Sharded scheduler process entry point"""
+    api_client = make_api_client(base_url, args)
+    scheduler = GPUScheduler(v1=client.CoreV1Api(api_client), coordination_v1=client.CoordinationV1Api(api_client),
+                             bind_workers=args.bind_workers, queue_depth=max(args.pods, 1000),
+                             shard_count=args.shard_count, identity=identity)
+    scheduler.health_server.port = 0
+    logging.getLogger().setLevel(args.log_level)
+    scheduler.run()
+
+
+def start_sharded_instances(base_url: str, args) -> List[multiprocessing.Process]:
+    """Start sharded schedulers and wait until they have all joined and rebalanced"""
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=run_sharded_instance, args=(base_url, f"bench-scheduler-{i}", args),
+                                 daemon=True)
+                 for i in range(args.instances)]
+    for process in processes:
+        process.start()
+
+    deadline = time.monotonic() + 30
+    while control(base_url, '/_bench/stats')['calls'].get('POST lease', 0) < args.instances:
+        if time.monotonic() > deadline:
+            raise RuntimeError("sharded schedulers did not start within 30 seconds")
+        time.sleep(0.05)
+    # Members see each other on their next membership round, then reconnect their watches
+    time.sleep(5)
+    return processes
+
+
+def process_cpu_seconds(pid: int) -> float:
+    """User plus system CPU time of a process from /proc, or 0.0 where unavailable"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+    except OSError:
+        return 0.0
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def run_benchmark(args) -> dict:
+    gpus_per_node = max(args.gpus_per_node, math.ceil(args.pods / args.nodes))
+
+    parent_pipe, child_pipe = multiprocessing.Pipe()
+    server = multiprocessing.get_context('fork').Process(
+        target=run_api_server, args=(args.nodes, gpus_per_node, child_pipe), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{parent_pipe.recv()}"
+    instances = []
+
+    try:
+        if args.shard_count:
+            instances = start_sharded_instances(base_url, args)
+        else:
+            v1 = client.CoreV1Api(make_api_client(base_url, args))
+
+            scheduler = GPUScheduler(v1=v1, bind_workers=args.bind_workers, queue_depth=max(args.pods, 1000))
+            scheduler.health_server.port = 0
+            logging.getLogger().setLevel(args.log_level)
+            threading.Thread(target=scheduler.run, name="scheduler", daemon=True).start()
+
+            # Wait until the node cache is synced and the pod watch is established
+            deadline = time.monotonic() + 30
+            while not (scheduler.node_cache.has_synced() and scheduler.resource_version is not None):
+                if time.monotonic() > deadline:
+                    raise RuntimeError("scheduler did not start within 30 seconds")
+                time.sleep(0.05)
+            time.sleep(0.5)
+
+        control(base_url, '/_bench/reset', {})
+        cpu_before = [process_cpu_seconds(process.pid) for process in instances]
+        control(base_url, '/_bench/pods', {'items': build_pods(args.pods, args.nodes, gpus_per_node, args.mode,
+                                                               args.namespaces, args.shard_count)})
+
+        deadline = time.monotonic() + args.timeout
+        stats = control(base_url, '/_bench/stats')
+        while stats['bound'] < args.pods and time.monotonic() < deadline:
+            time.sleep(0.05)
+            stats = control(base_url, '/_bench/stats')
+        # Each instance's share of the work; on a host with a core per instance this bounds throughput
+        instance_cpu = [round(process_cpu_seconds(process.pid) - before, 2)
+                        for process, before in zip(instances, cpu_before)]
+    finally:
+        for process in instances:
+            process.terminate()
+        server.terminate()
+
+    latencies = stats['latencies']
+    api_calls = sum(stats['calls'].values())
+    return {
+        'benchmark': 'scheduler',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'config': {'pods': args.pods, 'nodes': args.nodes, 'gpus_per_node': gpus_per_node, 'mode': args.mode,
+                   'bind_workers': args.bind_workers, 'shard_count': args.shard_count,
+                   'instances': args.instances if args.shard_count else 1, 'namespaces': args.namespaces,
+                   'api_qps': args.api_qps, 'api_burst': args.api_burst, 'api_pool_size': args.api_pool_size},
+        'bound': stats['bound'],
+        'complete': stats['bound'] == args.pods,
+        'elapsed_seconds': round(stats['elapsed'], 4),
+        'pods_per_second': round(stats['bound'] / stats['elapsed'], 2) if stats['elapsed'] else 0.0,
+        'latency_ms': {name: round(percentile(latencies, fraction) * 1000, 3)
+                       for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('max', 1.0))},
+        'api_calls': stats['calls'],
+        'instance_cpu_seconds': instance_cpu,
+        'api_calls_per_pod': round(api_calls / args.pods, 3) if args.pods else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GPUScheduler end-to-end throughput benchmark")
+    parser.add_argument('--pods', type=int, default=1000, help="Number of pending pods to create")
+    parser.add_argument('--nodes', type=int, default=50, help="Number of labelled GPU nodes")
+    parser.add_argument('--gpus-per-node', type=int, default=8, help="GPUs per node (raised to fit all pods)")
+    parser.add_argument('--mode', choices=('map', 'count'), default='map',
+                        help="Place pods from a gpu-scheduling-map or a gpu-count annotation")
+    parser.add_argument('--bind-workers', type=int, default=4, help="Bind workers per scheduler instance")
+    parser.add_argument('--shard-count', type=int, default=0, help="Run sharded schedulers with this many shards")
+    parser.add_argument('--instances', type=int, default=1, help="Sharded scheduler processes (with --shard-count)")
+    parser.add_argument('--namespaces', type=int, default=1, help="Namespaces to spread the pods over")
+    parser.add_argument('--api-qps', type=float, default=0, help="Client-side API QPS per instance, 0 for unlimited")
+    parser.add_argument('--api-burst', type=int, default=100, help="Client-side API burst per instance")
+    parser.add_argument('--api-pool-size', type=int, default=64, help="API connections kept per instance")
+    parser.add_argument('--timeout', type=float, default=300, help="Seconds to wait for all pods to bind")
+    parser.add_argument('--log-level', default='WARNING')
+    parser.add_argument('--output', help="Also write the JSON result to this file")
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    sys.exit(0 if result['complete'] else 1)
+
+
+if __name__ == "__main__":
+    main()
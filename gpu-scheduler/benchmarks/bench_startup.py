@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the scheduler and webhook
+
+Every measurement starts a fresh interpreter, as a container restart or a
+failover does:
+
+- import time of `scheduler` and `webhook_server`
+- time to first bind: scheduler process start until a pod that was already
+  pending is bound, against the fake API server through a kubeconfig
+- time to first admission: webhook process start until it answers an
+  AdmissionReview over TLS
+
+Medians over `--runs` are compared against per-metric budgets in
+milliseconds; the command prints the results as JSON and exits non-zero if
+any median is over its budget, so it can gate changes that slow startup:
+
+    python benchmarks/bench_startup.py --runs 5 --output startup.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import shutil
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, PACKAGE_DIR)
+
+from bench_webhook import admission_review, free_port, make_certificate
+from bench_webhook import make_pod as make_review_pod
+from fake_apiserver import FakeAPIServer, make_pod
+
+# Medians above these fail the benchmark
+DEFAULT_BUDGETS_MS = {
+    'scheduler_import': 800,
+    'webhook_import': 150,
+    'first_bind': 3000,
+    'first_admission': 1000
+}
+
+IMPORT_SNIPPET = """
+import sys, time
+sys.path.insert(0, {path!r})
+start = time.perf_counter()
+import {module}
+print((time.perf_counter() - start) * 1000)
+"""
+
+SCHEDULER_SNIPPET = """
+import sys
+sys.path.insert(0, {path!r})
+from scheduler import GPUScheduler
+scheduler = GPUScheduler()
+scheduler.health_server.port = 0
+scheduler.run()
+"""
+
+WEBHOOK_SNIPPET = """
+import sys
+sys.path.insert(0, {path!r})
+from webhook_server import WebhookServer
+WebhookServer(port={port}, cert_file={cert_file!r}, key_file={key_file!r}, metrics_port={metrics_port}).run()
+"""
+
+
+def measure_import(module: str) -> float:
+    """Milliseconds to import `module` in a fresh interpreter"""
+    output = subprocess.run([sys.executable, '-c', IMPORT_SNIPPET.format(path=PACKAGE_DIR, module=module)],
+                            check=True, capture_output=True, text=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def wait_until(condition: Callable[[], bool], process: subprocess.Popen, timeout: float, what: str):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if process.poll() is not None:
+            raise RuntimeError(f"{what}: process exited with code {process.returncode}")
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"{what}: not reached within {timeout} seconds")
+        time.sleep(0.005)
+
+
+def write_kubeconfig(directory: str, port: int) -> str:
+    """Kubeconfig pointing at the fake API server (JSON is valid YAML)"""
+    path = os.path.join(directory, 'kubeconfig')
+    kubeconfig = {
+        'apiVersion': 'v1',
+        'kind': 'Config',
+        'clusters': [{'name': 'bench', 'cluster': {'server': f"http://127.0.0.1:{port}"}}],
+        'users': [{'name': 'bench', 'user': {}}],
+        'contexts': [{'name': 'bench', 'context': {'cluster': 'bench', 'user': 'bench'}}],
+        'current-context': 'bench'
+    }
+    with open(path, 'w') as f:
+        json.dump(kubeconfig, f)
+    return path
+
+
+def measure_first_bind(api: FakeAPIServer, kubeconfig: str, run: int, timeout: float) -> float:
+    """Milliseconds from scheduler process start until an already pending pod is bound"""
+    pod = make_pod(f"startup-{run}", {'gpu-scheduling-map': f"{run}=node{run + 1}:0"})
+    uid = pod['metadata']['uid']
+    api.create_pods([pod])
+
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', SCHEDULER_SNIPPET.format(path=PACKAGE_DIR)],
+                               env=dict(os.environ, KUBECONFIG=kubeconfig),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until(lambda: uid in api.bound_at, process, timeout, "first bind")
+        return (time.perf_counter() - start) * 1000
+    finally:
+        process.kill()
+        process.wait()
+
+
+def admitted(port: int, body: bytes) -> bool:
+    try:
+        connection = http.client.HTTPSConnection('127.0.0.1', port, timeout=1,
+                                                 context=ssl._create_unverified_context())
+        connection.request('POST', '/mutate', body=body, headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        connection.close()
+        return response.status == 200
+    except (OSError, http.client.HTTPException):
+        return False
+
+
+def measure_first_admission(cert_file: str, key_file: str, timeout: float) -> float:
+    """Milliseconds from webhook process start until it answers an AdmissionReview"""
+    port = free_port()
+    snippet = WEBHOOK_SNIPPET.format(path=PACKAGE_DIR, port=port, cert_file=cert_file, key_file=key_file,
+                                     metrics_port=free_port())
+    pod = make_review_pod('startup-0', 'gpu-scheduler', {'gpu-scheduling-map': '0=node1:0'})
+    body = json.dumps(admission_review(pod)).encode()
+
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', snippet], stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    try:
+        wait_until(lambda: admitted(port, body), process, timeout, "first admission")
+        return (time.perf_counter() - start) * 1000
+    finally:
+        process.kill()
+        process.wait()
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {'median': round(statistics.median(samples), 1), 'min': round(min(samples), 1),
+            'max': round(max(samples), 1)}
+
+
+def run_benchmark(args) -> dict:
+    samples: Dict[str, List[float]] = {name: [] for name in DEFAULT_BUDGETS_MS}
+    budgets = {
+        'scheduler_import': args.scheduler_import_budget,
+        'webhook_import': args.webhook_import_budget,
+        'first_bind': args.first_bind_budget,
+        'first_admission': args.first_admission_budget
+    }
+
+    for _ in range(args.runs):
+        samples['scheduler_import'].append(measure_import('scheduler'))
+        samples['webhook_import'].append(measure_import('webhook_server'))
+
+    api = FakeAPIServer()
+    for i in range(args.runs):
+        api.add_node(f"worker{i + 1}", f"node{i + 1}")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        kubeconfig = write_kubeconfig(temp_dir, api.serve())
+        cert_file, key_file = make_certificate(temp_dir)
+        for run in range(args.runs):
+            samples['first_bind'].append(measure_first_bind(api, kubeconfig, run, args.timeout))
+            samples['first_admission'].append(measure_first_admission(cert_file, key_file, args.timeout))
+    finally:
+        api.shutdown()
+        shutil.rmtree(temp_dir)
+
+    results = {name: summarize(values) for name, values in samples.items()}
+    return {
+        'benchmark': 'startup',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'config': {'runs': args.runs},
+        'milliseconds': results,
+        'budgets_ms': budgets,
+        'over_budget': [name for name, budget in budgets.items() if results[name]['median'] > budget]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scheduler and webhook cold-start benchmark")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh processes started per measurement")
+    parser.add_argument('--scheduler-import-budget', type=float, default=DEFAULT_BUDGETS_MS['scheduler_import'],
+                        help="Budget in ms for importing scheduler")
+    parser.add_argument('--webhook-import-budget', type=float, default=DEFAULT_BUDGETS_MS['webhook_import'],
+                        help="Budget in ms for importing webhook_server")
+    parser.add_argument('--first-bind-budget', type=float, default=DEFAULT_BUDGETS_MS['first_bind'],
+                        help="Budget in ms from scheduler start to the first bind")
+    parser.add_argument('--first-admission-budget', type=float, default=DEFAULT_BUDGETS_MS['first_admission'],
+                        help="Budget in ms from webhook start to the first admission response")
+    parser.add_argument('--timeout', type=float, default=60, help="Seconds to wait for each start")
+    parser.add_argument('--output', help="Also write the JSON result to this file")
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    sys.exit(1 if result['over_budget'] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+Latency statistics shared by the benchmark drivers
+"""
+
+import math
+from typing import List
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
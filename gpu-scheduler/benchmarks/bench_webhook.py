@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Load test for the admission webhook over TLS
+
+Starts webhook_server.py on a local port with a throwaway certificate, then
+drives it with AdmissionReviews from keep-alive HTTPS connections and
+reports throughput, p50/p99/p999 latency and the server's RSS as JSON.
+Reviews are generated from a realistic mix, or replayed from a corpus of
+recorded AdmissionReviews (a directory of .json files or a .jsonl file):
+
+    python benchmarks/bench_webhook.py --concurrency 16 --requests 20000 --output webhook.json
+    python benchmarks/bench_webhook.py --corpus recorded-reviews.jsonl --workers 4
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_stats import percentile
+from webhook_server import WebhookServer
+
+
+# Share of each review kind in the generated mix
+DEFAULT_MIX = {
+    'non_gpu': 0.70,
+    'small_map': 0.15,
+    'large_map': 0.05,
+    'long_env': 0.05,
+    'gpu_count': 0.05,
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def admission_review(pod: dict) -> dict:
+    return {
+        'apiVersion': 'admission.k8s.io/v1',
+        'kind': 'AdmissionReview',
+        'request': {
+            'uid': str(uuid.uuid4()),
+            'kind': {'group': '', 'version': 'v1', 'kind': 'Pod'},
+            'resource': {'group': '', 'version': 'v1', 'resource': 'pods'},
+            'namespace': 'default',
+            'operation': 'CREATE',
+            'userInfo': {'username': 'system:serviceaccount:kube-system:statefulset-controller'},
+            'object': pod
+        }
+    }
+
+
+def make_pod(name: str, scheduler_name: str, annotations: Dict[str, str], env_count: int = 3,
+             containers: int = 1) -> dict:
+    """A pod shaped like a StatefulSet replica, with labels, probes and resources"""
+    env = [{'name': f"SETTING_{i}", 'value': f"value-{i}"} for i in range(env_count)]
+    return {
+        'apiVersion': 'v1',
+        'kind': 'Pod',
+        'metadata': {
+            'name': name,
+            'generateName': name.rsplit('-', 1)[0] + '-',
+            'namespace': 'default',
+            'labels': {'app': name.rsplit('-', 1)[0], 'controller-revision-hash': 'abc123',
+                       'statefulset.kubernetes.io/pod-name': name},
+            'annotations': annotations,
+            'ownerReferences': [{'apiVersion': 'apps/v1', 'kind': 'StatefulSet', 'name': name.rsplit('-', 1)[0],
+                                 'uid': str(uuid.uuid4()), 'controller': True}]
+        },
+        'spec': {
+            'schedulerName': scheduler_name,
+            'containers': [{
+                'name': f"main-{c}",
+                'image': 'nvcr.io/nvidia/pytorch:24.01-py3',
+                'env': env,
+                'resources': {'limits': {'cpu': '8', 'memory': '64Gi'}, 'requests': {'cpu': '4', 'memory': '32Gi'}},
+                'readinessProbe': {'httpGet': {'path': '/ready', 'port': 8080}, 'periodSeconds': 10},
+                'volumeMounts': [{'name': 'data', 'mountPath': '/data'}]
+            } for c in range(containers)],
+            'volumes': [{'name': 'data', 'persistentVolumeClaim': {'claimName': f"data-{name}"}}],
+            'tolerations': [{'key': 'nvidia.com/gpu', 'operator': 'Exists', 'effect': 'NoSchedule'}]
+        }
+    }
+
+
+def gpu_map(pods: int, nodes: int = 8, gpus_per_node: int = 8) -> str:
+    return '\n'.join(f"{i}=node{i % nodes + 1}:{(i // nodes) % gpus_per_node}" for i in range(pods))
+
+
+def generate_corpus(size: int, mix: Dict[str, float], seed: int = 1) -> List[Tuple[str, bytes]]:
+    """Generate (kind, encoded AdmissionReview) pairs in the given mix"""
+    rng = random.Random(seed)
+    small_map = gpu_map(16)
+    large_map = gpu_map(2048, nodes=256)
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+
+    corpus = []
+    for i in range(size):
+        kind = rng.choices(kinds, weights)[0]
+        ordinal = i % 16
+        if kind == 'non_gpu':
+            pod = make_pod(f"web-{ordinal}", 'default-scheduler', {'prometheus.io/scrape': 'true'})
+        elif kind == 'small_map':
+            pod = make_pod(f"train-{ordinal}", 'gpu-scheduler', {'gpu-scheduling-map': small_map})
+        elif kind == 'large_map':
+            pod = make_pod(f"big-{i % 2048}", 'gpu-scheduler', {'gpu-scheduling-map': large_map})
+        elif kind == 'long_env':
+            pod = make_pod(f"env-{ordinal}", 'gpu-scheduler', {'gpu-scheduling-map': small_map},
+                           env_count=300, containers=3)
+        else:
+            pod = make_pod(f"auto-{ordinal}", 'gpu-scheduler', {'gpu-count': '2'})
+        corpus.append((kind, json.dumps(admission_review(pod)).encode()))
+    return corpus
+
+
+def load_corpus(path: str) -> List[Tuple[str, bytes]]:
+    """Load recorded AdmissionReviews from a .jsonl file or a directory of .json files"""
+    if os.path.isdir(path):
+        documents = []
+        for name in sorted(os.listdir(path)):
+            if name.endswith('.json'):
+                with open(os.path.join(path, name), 'rb') as f:
+                    documents.append(f.read())
+    else:
+        with open(path, 'rb') as f:
+            documents = [line for line in f.read().splitlines() if line.strip()]
+    return [('recorded', json.dumps(json.loads(document)).encode()) for document in documents]
+
+
+def make_certificate(directory: str) -> Tuple[str, str]:
+    cert_file = os.path.join(directory, 'tls.crt')
+    key_file = os.path.join(directory, 'tls.key')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj', '/CN=localhost',
+         '-keyout', key_file, '-out', cert_file],
+        check=True, capture_output=True
+    )
+    return cert_file, key_file
+
+
+def run_webhook(port: int, cert_file: str, key_file: str, workers: int, metrics_port: int):
+    """Webhook server process entry point"""
+    import logging
+    server = WebhookServer(port=port, cert_file=cert_file, key_file=key_file, workers=workers,
+                           metrics_port=metrics_port)
+    logging.getLogger().setLevel(logging.WARNING)
+    server.run()
+
+
+def wait_for_port(port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"webhook did not listen on port {port} within {timeout} seconds")
+
+
+def process_memory_kib(pid: int) -> Dict[str, int]:
+    """VmRSS and VmHWM of a process and its children, from /proc"""
+    totals = {'rss_kib': 0, 'peak_rss_kib': 0}
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids += [int(child) for child in f.read().split()]
+    except OSError:
+        pass
+    for process_id in pids:
+        try:
+            with open(f"/proc/{process_id}/status") as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        totals['rss_kib'] += int(line.split()[1])
+                    elif line.startswith('VmHWM:'):
+                        totals['peak_rss_kib'] += int(line.split()[1])
+        except OSError:
+            pass
+    return totals
+
+
+def client_thread(port: int, corpus: List[Tuple[str, bytes]], start: int, count: int, results: list):
+    """Send `count` reviews on one keep-alive connection, recording (kind, latency, ok)"""
+    context = ssl._create_unverified_context()
+    connection = http.client.HTTPSConnection('127.0.0.1', port, context=context)
+    headers = {'Content-Type': 'application/json'}
+    for i in range(start, start + count):
+        kind, body = corpus[i % len(corpus)]
+        begin = time.perf_counter()
+        try:
+            connection.request('POST', '/mutate', body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = http.client.HTTPSConnection('127.0.0.1', port, context=context)
+            ok = False
+        results.append((kind, time.perf_counter() - begin, ok))
+    connection.close()
+
+
+def client_process(port: int, corpus: List[Tuple[str, bytes]], threads: int, requests: int, offset: int, queue):
+    """Run `threads` client connections in this process and report their results"""
+    per_thread = requests // threads
+    results: list = []
+    workers = [threading.Thread(target=client_thread,
+                                args=(port, corpus, offset + i * per_thread,
+                                      per_thread + (requests % threads if i == threads - 1 else 0), results))
+               for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    queue.put(results)
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    return {name: round(percentile(latencies, fraction) * 1000, 3)
+            for name, fraction in (('p50', 0.5), ('p99', 0.99), ('p999', 0.999), ('max', 1.0))}
+
+
+def run_benchmark(args) -> dict:
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+    else:
+        corpus = generate_corpus(args.corpus_size, DEFAULT_MIX, args.seed)
+
+    cert_dir = tempfile.mkdtemp()
+    mp_context = multiprocessing.get_context('fork')
+    port = free_port()
+    try:
+        cert_file, key_file = make_certificate(cert_dir)
+        server = mp_context.Process(target=run_webhook,
+                                    args=(port, cert_file, key_file, args.workers, free_port()), daemon=True)
+        server.start()
+        wait_for_port(port)
+        # Give every SO_REUSEPORT worker time to bind before connections are spread over them
+        time.sleep(0.5)
+        baseline = process_memory_kib(server.pid)
+
+        processes = max(1, min(args.client_processes, args.concurrency))
+        queue = mp_context.Queue()
+        clients = []
+        start = time.perf_counter()
+        for p in range(processes):
+            threads = args.concurrency // processes + (1 if p < args.concurrency % processes else 0)
+            requests = args.requests // processes + (args.requests % processes if p == processes - 1 else 0)
+            clients.append(mp_context.Process(target=client_process,
+                                              args=(port, corpus, threads, requests, p * requests, queue)))
+        for client in clients:
+            client.start()
+        results = []
+        for _ in clients:
+            results += queue.get()
+        elapsed = time.perf_counter() - start
+        for client in clients:
+            client.join()
+
+        memory = process_memory_kib(server.pid)
+        server.terminate()
+        server.join()
+    finally:
+        shutil.rmtree(cert_dir)
+
+    by_kind = defaultdict(list)
+    for kind, latency, ok in results:
+        if ok:
+            by_kind[kind].append(latency)
+    successful = [latency for latencies in by_kind.values() for latency in latencies]
+
+    return {
+        'benchmark': 'webhook',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'config': {'requests': args.requests, 'concurrency': args.concurrency, 'workers': args.workers,
+                   'client_processes': processes, 'corpus': args.corpus or 'generated',
+                   'corpus_size': len(corpus)},
+        'requests': len(results),
+        'errors': len(results) - len(successful),
+        'elapsed_seconds': round(elapsed, 4),
+        'requests_per_second': round(len(successful) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': summarize(successful),
+        'latency_ms_by_kind': {kind: dict(summarize(latencies), requests=len(latencies))
+                               for kind, latencies in sorted(by_kind.items())},
+        'server_memory_kib': {'idle_rss': baseline['rss_kib'], 'rss': memory['rss_kib'],
+                              'peak_rss': memory['peak_rss_kib']}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Admission webhook load test")
+    parser.add_argument('--requests', type=int, default=10000, help="Total AdmissionReviews to send")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent keep-alive connections")
+    parser.add_argument('--client-processes', type=int, default=2,
+                        help="Processes the connections are spread over, so the client is not the bottleneck")
+    parser.add_argument('--workers', type=int, default=1, help="Webhook server processes (WEBHOOK_WORKERS)")
+    parser.add_argument('--corpus', help="Replay AdmissionReviews from a .jsonl file or a directory of .json files")
+    parser.add_argument('--corpus-size', type=int, default=2000, help="Number of distinct generated reviews")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="Also write the JSON result to this file")
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    sys.exit(0 if result['errors'] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
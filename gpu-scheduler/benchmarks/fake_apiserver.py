@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Stand-in Kubernetes API server for benchmarks
+
+Serves just enough of the core v1 API for the scheduler: node and pod lists
+with field and label selectors, node and pod watches resuming from a
+resourceVersion, pod bindings and pod patches, plus the Leases used by
+sharded schedulers. Benchmark drivers create pods and read timings through
+the `/_bench` control endpoints.
+"""
+
+import json
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+BINDING_PATHS = (re.compile(r'^/api/v1/namespaces/([^/]+)/bindings$'),
+                 re.compile(r'^/api/v1/namespaces/([^/]+)/pods/[^/]+/binding$'))
+POD_PATH = re.compile(r'^/api/v1/namespaces/([^/]+)/pods/([^/]+)$')
+LEASE_PATH = re.compile(r'^/apis/coordination.k8s.io/v1/namespaces/([^/]+)/leases(?:/([^/]+))?$')
+# Label selector terms: `key in (a,b)`, `key notin (a,b)`, `key=value`, `key!=value`, `key` and `!key`
+LABEL_TERM = re.compile(r'\s*(!?)([\w./-]+)\s*(?:(==|=|!=)\s*([\w./-]*)|\s+(in|notin)\s*\(([^)]*)\))?\s*(?:,|$)')
+
+
+def make_node(name: str, logical_name: str, gpu_count: int = 8) -> dict:
+    """Build a node labelled with its logical GPU node name"""
+    return {
+        'apiVersion': 'v1',
+        'kind': 'Node',
+        'metadata': {'name': name, 'uid': str(uuid.uuid4()), 'labels': {'gpu-node-name': logical_name}},
+        'status': {'capacity': {'nvidia.com/gpu': str(gpu_count)}}
+    }
+
+
+def make_pod(name: str, annotations: Dict[str, str], namespace: str = 'default',
+             scheduler_name: str = 'gpu-scheduler', labels: Optional[Dict[str, str]] = None) -> dict:
+    """Build a pending pod for the scheduler"""
+    return {
+        'apiVersion': 'v1',
+        'kind': 'Pod',
+        'metadata': {'name': name, 'namespace': namespace, 'uid': str(uuid.uuid4()),
+                     'annotations': annotations, 'labels': labels or {}},
+        'spec': {'schedulerName': scheduler_name, 'containers': [{'name': 'main', 'image': 'busybox'}]},
+        'status': {'phase': 'Pending'}
+    }
+
+
+def field_value(obj: dict, path: str) -> str:
+    """Resolve a field selector path such as spec.nodeName"""
+    value = obj
+    for part in path.split('.'):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value or ''
+
+
+def selector_view(obj: dict) -> dict:
+    """Copy of the fields that field selectors can match on"""
+    metadata = obj.get('metadata', {})
+    return {
+        'metadata': {'name': metadata.get('name'), 'namespace': metadata.get('namespace'),
+                     'labels': dict(metadata.get('labels') or {})},
+        'spec': {key: obj.get('spec', {}).get(key) for key in ('schedulerName', 'nodeName')},
+        'status': {'phase': obj.get('status', {}).get('phase')}
+    }
+
+
+def matches_selector(obj: dict, field_selector: str) -> bool:
+    """Whether an object matches a comma-separated field selector of = and != terms"""
+    for term in filter(None, field_selector.split(',')):
+        if '!=' in term:
+            path, expected = term.split('!=', 1)
+            if field_value(obj, path) == expected:
+                return False
+        else:
+            path, expected = term.split('=', 1)
+            if field_value(obj, path.rstrip('=')) != expected.lstrip('='):
+                return False
+    return True
+
+
+def matches_labels(obj: dict, label_selector: str) -> bool:
+    """Whether an object's labels match a label selector"""
+    labels = obj.get('metadata', {}).get('labels') or {}
+    position = 0
+    while position < len(label_selector):
+        match = LABEL_TERM.match(label_selector, position)
+        if not match or match.end() == position:
+            raise ValueError(f"unsupported label selector: {label_selector}")
+        position = match.end()
+        negated, key, operator, value, set_operator, values = match.groups()
+        if operator:
+            if (labels.get(key) == value) != (operator != '!='):
+                return False
+        elif set_operator:
+            in_set = labels.get(key) in {item.strip() for item in values.split(',')}
+            if in_set != (set_operator == 'in'):
+                return False
+        elif (key in labels) == bool(negated):
+            return False
+    return True
+
+
+def status_body(reason: str, code: int) -> dict:
+    return {'kind': 'Status', 'apiVersion': 'v1', 'status': 'Success' if code < 400 else 'Failure',
+            'reason': reason, 'code': code}
+
+
+class ObjectStore:
+    """Objects of one kind with a replayable event log"""
+
+    def __init__(self, server: 'FakeAPIServer'):
+        self.server = server
+        self.objects: Dict[Tuple[str, str], dict] = {}
+        # (resourceVersion, encoded watch event line, selector fields at that version)
+        self.events: List[Tuple[int, bytes, dict]] = []
+
+    def put(self, obj: dict, event_type: str):
+        """Store an object and publish an event; caller holds the server condition"""
+        metadata = obj['metadata']
+        metadata['resourceVersion'] = str(self.server.next_resource_version())
+        key = (metadata.get('namespace', ''), metadata['name'])
+        if event_type == 'DELETED':
+            self.objects.pop(key, None)
+        else:
+            self.objects[key] = obj
+        line = json.dumps({'type': event_type, 'object': obj}).encode() + b'\n'
+        self.events.append((int(metadata['resourceVersion']), line, selector_view(obj)))
+        self.server.changed.notify_all()
+
+    def list(self, field_selector: str = '', label_selector: str = '') -> List[dict]:
+        return [obj for obj in self.objects.values()
+                if matches_selector(obj, field_selector) and matches_labels(obj, label_selector)]
+
+
+class FakeAPIServer:
+    """In-memory API server state shared by all request handler threads"""
+
+    def __init__(self):
+        self.changed = threading.Condition()
+        self.resource_version = 0
+        self.nodes = ObjectStore(self)
+        self.pods = ObjectStore(self)
+        # Always empty: lets the schedulers' map ConfigMap cache sync
+        self.configmaps = ObjectStore(self)
+        self.leases: Dict[Tuple[str, str], dict] = {}
+        self.calls: Counter = Counter()
+        self.created_at: Dict[str, float] = {}
+        self.bound_at: Dict[str, float] = {}
+        self.httpd: Optional[ThreadingHTTPServer] = None
+
+    def next_resource_version(self) -> int:
+        self.resource_version += 1
+        return self.resource_version
+
+    def add_node(self, name: str, logical_name: str, gpu_count: int = 8):
+        with self.changed:
+            self.nodes.put(make_node(name, logical_name, gpu_count), 'ADDED')
+
+    def create_pods(self, pods: List[dict]):
+        with self.changed:
+            for pod in pods:
+                self.created_at[pod['metadata']['uid']] = time.monotonic()
+                self.pods.put(pod, 'ADDED')
+
+    def bind(self, namespace: str, name: str, node_name: str) -> bool:
+        with self.changed:
+            pod = self.pods.objects.get((namespace, name))
+            if pod is None or pod['spec'].get('nodeName'):
+                return False
+            self.bound_at[pod['metadata']['uid']] = time.monotonic()
+            pod['spec']['nodeName'] = node_name
+            self.pods.put(pod, 'MODIFIED')
+            return True
+
+    def patch_pod(self, namespace: str, name: str, patch: dict) -> Optional[dict]:
+        with self.changed:
+            pod = self.pods.objects.get((namespace, name))
+            if pod is None:
+                return None
+            annotations = (patch.get('metadata') or {}).get('annotations') or {}
+            pod['metadata'].setdefault('annotations', {}).update(annotations)
+            self.pods.put(pod, 'MODIFIED')
+            return pod
+
+    def lease_request(self, method: str, namespace: str, name: Optional[str], body: Optional[dict],
+                      label_selector: str = '') -> Tuple[int, dict]:
+        """Serve a Lease request with optimistic concurrency; returns (status, body)"""
+        with self.changed:
+            if name is None and method == 'GET':
+                items = [lease for (lease_namespace, _), lease in self.leases.items()
+                         if lease_namespace == namespace and matches_labels(lease, label_selector)]
+                return 200, {'apiVersion': 'coordination.k8s.io/v1', 'kind': 'LeaseList', 'items': items,
+                             'metadata': {'resourceVersion': str(self.resource_version)}}
+            if method == 'POST':
+                name = body['metadata']['name']
+                if (namespace, name) in self.leases:
+                    return 409, status_body('AlreadyExists', 409)
+            else:
+                current = self.leases.get((namespace, name))
+                if current is None:
+                    return 404, status_body('NotFound', 404)
+                if method == 'GET':
+                    return 200, current
+                if method == 'DELETE':
+                    del self.leases[(namespace, name)]
+                    return 200, status_body('Success', 200)
+                if body['metadata'].get('resourceVersion') != current['metadata']['resourceVersion']:
+                    return 409, status_body('Conflict', 409)
+
+            body['metadata']['namespace'] = namespace
+            body['metadata']['resourceVersion'] = str(self.next_resource_version())
+            self.leases[(namespace, name)] = body
+            return (201 if method == 'POST' else 200), body
+
+    def stats(self) -> dict:
+        """Creation-to-bind latencies and API call counts"""
+        with self.changed:
+            latencies = sorted(self.bound_at[uid] - created for uid, created in self.created_at.items()
+                               if uid in self.bound_at)
+            first_created = min(self.created_at.values(), default=0.0)
+            last_bound = max(self.bound_at.values(), default=0.0)
+            return {
+                'created': len(self.created_at),
+                'bound': len(self.bound_at),
+                'latencies': latencies,
+                'elapsed': max(last_bound - first_created, 0.0),
+                'calls': dict(self.calls)
+            }
+
+    def reset_stats(self):
+        with self.changed:
+            self.calls.clear()
+            self.created_at.clear()
+            self.bound_at.clear()
+
+    def serve(self, port: int = 0) -> int:
+        """Start serving in a background thread and return the bound port"""
+        handler = type('BoundHandler', (FakeAPIHandler,), {'api': self})
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, name="fake-apiserver", daemon=True).start()
+        return self.httpd.server_address[1]
+
+    def shutdown(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+
+class FakeAPIHandler(BaseHTTPRequestHandler):
+    """Routes core v1 requests to the FakeAPIServer state"""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; without TCP_NODELAY each response waits on a delayed ACK
+    disable_nagle_algorithm = True
+    api: FakeAPIServer = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        # Benchmarks kill scheduler processes with keep-alive connections still open
+        try:
+            super().handle()
+        except ConnectionResetError:
+            pass
+
+    def send_json(self, obj, status: int = 200):
+        body = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def not_found(self):
+        self.send_json(status_body('NotFound', 404), 404)
+
+    def handle_lease(self, method: str, query: Optional[dict] = None, body: Optional[dict] = None) -> bool:
+        """Serve the request if it is for a Lease"""
+        match = LEASE_PATH.match(urlparse(self.path).path)
+        if not match:
+            return False
+        self.api.calls[f"{method} lease"] += 1
+        status, response = self.api.lease_request(method, match.group(1), match.group(2), body,
+                                                  (query or {}).get('labelSelector', ''))
+        self.send_json(response, status)
+        return True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if url.path == '/_bench/stats':
+            self.send_json(self.api.stats())
+            return
+        if self.handle_lease('GET', query):
+            return
+
+        store = {'/api/v1/nodes': self.api.nodes, '/api/v1/pods': self.api.pods,
+                 '/api/v1/configmaps': self.api.configmaps}.get(url.path)
+        if store is None:
+            self.not_found()
+            return
+
+        watching = query.get('watch', '').lower() in ('true', '1')
+        self.api.calls[f"{'WATCH' if watching else 'LIST'} {url.path}"] += 1
+        if watching:
+            self.stream_watch(store, query)
+            return
+
+        with self.api.changed:
+            items = store.list(query.get('fieldSelector', ''), query.get('labelSelector', ''))
+            metadata = {'resourceVersion': str(self.api.resource_version)}
+            # Pages continue from an offset; good enough for lists that only grow during a sweep
+            limit = int(query.get('limit') or 0)
+            if limit:
+                offset = int(query.get('continue') or 0)
+                if offset + limit < len(items):
+                    metadata['continue'] = str(offset + limit)
+                items = items[offset:offset + limit]
+            self.send_json({'apiVersion': 'v1', 'kind': 'List', 'items': items, 'metadata': metadata})
+
+    def stream_watch(self, store: ObjectStore, query: dict):
+        """Stream events after the requested resourceVersion until the watch times out"""
+        field_selector = query.get('fieldSelector', '')
+        label_selector = query.get('labelSelector', '')
+        resource_version = int(query.get('resourceVersion') or 0)
+        deadline = time.monotonic() + float(query.get('timeoutSeconds') or 3600)
+
+        # Chunked encoding lets the client read each event as it arrives
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        position = 0
+        try:
+            while time.monotonic() < deadline:
+                with self.api.changed:
+                    while position < len(store.events) and store.events[position][0] <= resource_version:
+                        position += 1
+                    if position == len(store.events):
+                        self.api.changed.wait(min(1.0, max(deadline - time.monotonic(), 0)))
+                        continue
+                    pending = store.events[position:]
+                    position = len(store.events)
+
+                lines = b''.join(line for _, line, fields in pending if matches_selector(fields, field_selector) and matches_labels(fields, label_selector))
+                if lines:
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(lines), lines))
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self.read_json()
+
+        if url.path == '/_bench/pods':
+            self.api.create_pods(body['items'])
+            self.send_json({'created': True})
+            return
+        if url.path == '/_bench/reset':
+            self.api.reset_stats()
+            self.send_json({'reset': True})
+            return
+        if self.handle_lease('POST', body=body):
+            return
+
+        match = next(filter(None, (pattern.match(url.path) for pattern in BINDING_PATHS)), None)
+        if not match:
+            self.not_found()
+            return
+
+        self.api.calls['POST binding'] += 1
+        if not self.api.bind(match.group(1), body['metadata']['name'], body['target']['name']):
+            self.send_json(status_body('Conflict', 409), 409)
+            return
+        self.send_json(body, 201)
+
+    def do_PUT(self):
+        if not self.handle_lease('PUT', body=self.read_json()):
+            self.not_found()
+
+    def do_DELETE(self):
+        self.read_json()
+        if not self.handle_lease('DELETE'):
+            self.not_found()
+
+    def do_PATCH(self):
+        url = urlparse(self.path)
+        body = self.read_json()
+        match = POD_PATH.match(url.path)
+        if not match:
+            self.not_found()
+            return
+
+        self.api.calls['PATCH pod'] += 1
+        pod = self.api.patch_pod(match.group(1), match.group(2), body)
+        if pod is None:
+            self.not_found()
+            return
+        self.send_json(pod)
+
+
+def main():
+    """Run a standalone fake API server with labelled GPU nodes"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--nodes', type=int, default=10)
+    parser.add_argument('--gpus-per-node', type=int, default=8)
+    args = parser.parse_args()
+
+    api = FakeAPIServer()
+    for i in range(args.nodes):
+        api.add_node(f"worker{i + 1}", f"node{i + 1}", args.gpus_per_node)
+    port = api.serve(args.port)
+    print(f"Fake API server listening on http://127.0.0.1:{port} with {args.nodes} nodes")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        api.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+On-demand profiling and inspection for the scheduler and webhook
+
+Nothing here runs until an endpoint is called: a CPU profile samples every
+thread's stack for a bounded window, allocation tracking is switched on only
+for its window, and a thread dump is a single snapshot.
+"""
+
+import collections
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+
+# Longest profile or allocation window a request may ask for
+MAX_WINDOW_SECONDS = 60.0
+DEFAULT_WINDOW_SECONDS = 10.0
+DEFAULT_INTERVAL_SECONDS = 0.005
+DEFAULT_LIMIT = 30
+
+# Only one profile or allocation trace runs at a time
+_session_lock = threading.Lock()
+
+
+class DebugBusy(Exception):
+    """Another profile or allocation trace is already running"""
+
+
+def _frame_key(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+def sample_stacks(seconds: float, interval: float = DEFAULT_INTERVAL_SECONDS) -> Tuple[collections.Counter, int]:
+    """
+    Sample the stacks of all other threads every `interval` seconds
+
+    Returns (collapsed stack -> samples, number of sampling rounds). Stacks
+    are root-first and `;`-separated, as used by flame graph tools.
+    """
+    own_thread = threading.get_ident()
+    stacks: collections.Counter = collections.Counter()
+    rounds = 0
+    deadline = time.monotonic() + seconds
+
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            names = []
+            while frame is not None:
+                names.append(_frame_key(frame))
+                frame = frame.f_back
+            stacks[';'.join(reversed(names))] += 1
+        rounds += 1
+        time.sleep(interval)
+
+    return stacks, rounds
+
+
+def format_profile(stacks: collections.Counter, rounds: int, limit: int = DEFAULT_LIMIT) -> str:
+    """Summarize sampled stacks as top functions by own and total samples"""
+    own: collections.Counter = collections.Counter()
+    total: collections.Counter = collections.Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        own[frames[-1]] += count
+        for name in set(frames):
+            total[name] += count
+
+    samples = sum(stacks.values())
+    lines = [f"{samples} samples over {rounds} rounds", "", "Top functions by own samples:"]
+    for name, count in own.most_common(limit):
+        lines.append(f"{count:8d} {100.0 * count / max(samples, 1):6.1f}%  {name}")
+    lines += ["", "Top functions by total samples (including callees):"]
+    for name, count in total.most_common(limit):
+        lines.append(f"{count:8d} {100.0 * count / max(samples, 1):6.1f}%  {name}")
+    return '\n'.join(lines) + '\n'
+
+
+def cpu_profile(seconds: float = DEFAULT_WINDOW_SECONDS, interval: float = DEFAULT_INTERVAL_SECONDS,
+                limit: int = DEFAULT_LIMIT, collapsed: bool = False) -> str:
+    """Profile all threads for a bounded window and return the report"""
+    if not _session_lock.acquire(blocking=False):
+        raise DebugBusy("a profile is already running")
+    try:
+        stacks, rounds = sample_stacks(min(seconds, MAX_WINDOW_SECONDS), max(interval, 0.001))
+    finally:
+        _session_lock.release()
+
+    if collapsed:
+        return ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    return format_profile(stacks, rounds, limit)
+
+
+def thread_dump() -> str:
+    """Return the current stack of every thread"""
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    sections = []
+    for thread_id, frame in sys._current_frames().items():
+        stack = ''.join(traceback.format_stack(frame))
+        sections.append(f"Thread {names.get(thread_id, 'unknown')} ({thread_id}):\n{stack}")
+    return '\n'.join(sections)
+
+
+def allocation_profile(seconds: float = DEFAULT_WINDOW_SECONDS, limit: int = DEFAULT_LIMIT, frames: int = 1) -> str:
+    """Trace allocations for a bounded window and return the largest growth by source line"""
+    if not _session_lock.acquire(blocking=False):
+        raise DebugBusy("a profile is already running")
+    if tracemalloc.is_tracing():
+        _session_lock.release()
+        raise DebugBusy("tracemalloc is already tracing")
+    try:
+        tracemalloc.start(max(frames, 1))
+        before = tracemalloc.take_snapshot()
+        time.sleep(min(seconds, MAX_WINDOW_SECONDS))
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        _session_lock.release()
+
+    key_type = 'traceback' if frames > 1 else 'lineno'
+    lines = [f"Traced memory: {current / 1024:.1f} KiB current, {peak / 1024:.1f} KiB peak", "",
+             "Top allocation sites by growth:"]
+    for stat in after.compare_to(before, key_type)[:limit]:
+        lines.append(str(stat))
+    return '\n'.join(lines) + '\n'
+
+
+def handle_debug_request(path: str, query: str = '') -> Optional[Tuple[int, str]]:
+    """
+    Serve a /debug/* request, returning (status, plain text body)
+
+    Returns None for paths that are not debug endpoints.
+    """
+    params: Dict[str, str] = {key: values[-1] for key, values in parse_qs(query).items()}
+    try:
+        seconds = float(params.get('seconds', DEFAULT_WINDOW_SECONDS))
+        limit = int(params.get('limit', DEFAULT_LIMIT))
+        if path == '/debug/profile':
+            interval = float(params.get('interval', DEFAULT_INTERVAL_SECONDS))
+            return 200, cpu_profile(seconds, interval, limit, collapsed=params.get('format') == 'collapsed')
+        if path == '/debug/threads':
+            return 200, thread_dump()
+        if path == '/debug/allocations':
+            return 200, allocation_profile(seconds, limit, int(params.get('frames', 1)))
+    except ValueError as e:
+        return 400, f"invalid parameter: {e}\n"
+    except DebugBusy as e:
+        return 409, f"{e}\n"
+    return None
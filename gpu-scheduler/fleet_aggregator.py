@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Fleet validation: collect the GPU assignments gpu-scheduler-check pods push
+and compare them with the pods' gpu-scheduling-map
+
+Check pods POST a compact report of their node and CUDA_VISIBLE_DEVICES to
+`/reports` once and again only when it changes. `/summary` lists the checked
+pods and nodes (one paginated list each) and answers with a single pass/fail
+result and every mismatch, so a rollout is verified without reading logs.
+"""
+
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+
+from kubernetes import client
+from kubernetes.config.config_exception import ConfigException
+from kubernetes.config.incluster_config import load_incluster_config
+
+import metrics
+from metrics import Counter, Gauge
+from gpu_ledger import format_device_mask, parse_device_mask
+from log_pipeline import setup_logging_from_env
+from map_configmaps import KubernetesConfigMapSource, MapConfigMapCache
+from node_cache import GPU_NODE_LABEL
+from scheduling_map import ASSIGNED_DEVICES_ANNOTATION, ASSIGNED_NODE_ANNOTATION, GPU_COUNT_ANNOTATION, \
+    compile_scheduling_map
+
+
+REPORTS = Counter('gpu_fleet_reports_total', 'GPU assignment reports received from check pods')
+PODS_MATCHED = Gauge('gpu_fleet_pods_matched', 'Checked pods whose reported assignment matched their map '
+                                               'at the last summary')
+PODS_FAILING = Gauge('gpu_fleet_pods_failing', 'Checked pods that were pending, missing a report or mismatched '
+                                               'at the last summary')
+
+# Largest /reports request body accepted
+MAX_REPORT_BODY = 1 << 20
+
+
+class AssignmentReport(NamedTuple):
+    """The node and devices one check pod runs with"""
+    namespace: str
+    pod: str
+    uid: str
+    node: str
+    devices: str
+
+
+def normalize_devices(devices: str) -> str:
+    """A device list in canonical "0,1,3" form, or stripped as-is if it holds anything but indices"""
+    mask = parse_device_mask(devices)
+    return format_device_mask(mask) if mask else devices.strip()
+
+
+def pod_index(pod_name: str) -> Optional[int]:
+    """StatefulSet ordinal at the end of a pod name, as the scheduler reads it"""
+    index = pod_name.rsplit('-', 1)[-1]
+    return int(index) if '-' in pod_name and index.isdigit() else None
+
+
+class FleetAggregator:
+    """
+    Latest report of every check pod, compared with the pods' maps on demand
+
+    Reports are kept by namespace and pod name; a report whose pod UID no
+    longer matches (the pod was replaced) counts as missing. Summaries are
+    cached for `summary_ttl` seconds so dashboards polling /summary do not
+    each relist the fleet.
+    """
+
+    def __init__(self, v1, namespace: str, label_selector: str = '', page_size: int = 500,
+                 summary_ttl: float = 2.0):
+        self.v1 = v1
+        self.namespace = namespace
+        self.label_selector = label_selector
+        self.page_size = page_size
+        self.summary_ttl = summary_ttl
+        # Maps referenced by ConfigMap are read on demand and kept for the fetch TTL
+        self.map_configmaps = MapConfigMapCache(KubernetesConfigMapSource(v1))
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._reports: Dict[Tuple[str, str], AssignmentReport] = {}
+        self._summary: Optional[dict] = None
+        self._summary_time = 0.0
+
+    def add_reports(self, entries: List[dict]) -> int:
+        """Store a batch of reports and return how many were valid"""
+        reports = []
+        for entry in entries:
+            if not isinstance(entry, dict) or not entry.get('pod') or not entry.get('node'):
+                continue
+            reports.append(AssignmentReport(str(entry.get('namespace') or self.namespace), str(entry['pod']),
+                                            str(entry.get('uid', '')), str(entry['node']),
+                                            str(entry.get('devices', ''))))
+        with self._lock:
+            for report in reports:
+                self._reports[(report.namespace, report.pod)] = report
+            self._summary = None
+        REPORTS.inc(len(reports))
+        return len(reports)
+
+    def __len__(self) -> int:
+        return len(self._reports)
+
+    def list_pods(self) -> List[dict]:
+        """Every checked pod as raw JSON, a page at a time"""
+        pods = []
+        continue_token = None
+        while True:
+            response = self.v1.list_namespaced_pod(self.namespace, label_selector=self.label_selector,
+                                                   limit=self.page_size, _continue=continue_token,
+                                                   _preload_content=False)
+            page = json.loads(response.data)
+            pods.extend(page.get('items') or [])
+            continue_token = (page.get('metadata') or {}).get('continue')
+            if not continue_token:
+                return pods
+
+    def logical_node_names(self) -> Dict[str, str]:
+        """Actual node name to gpu-node-name label of every GPU node"""
+        response = self.v1.list_node(label_selector=GPU_NODE_LABEL, _preload_content=False)
+        return {node['metadata']['name']: node['metadata']['labels'][GPU_NODE_LABEL]
+                for node in json.loads(response.data).get('items') or []}
+
+    def check_pod(self, pod: dict, report: Optional[AssignmentReport],
+                  logical_names: Dict[str, str]) -> Optional[str]:
+        """Why a bound pod's report does not match its assignment, or None if it does"""
+        metadata = pod['metadata']
+        annotations = metadata.get('annotations') or {}
+        bound_node = pod['spec']['nodeName']
+        if report is None or (report.uid and report.uid != metadata.get('uid')):
+            return "no report"
+        if report.node != bound_node:
+            return f"reported node {report.node} but bound to {bound_node}"
+
+        # Automatic placements are recorded on the pod; map entries name a logical node
+        if GPU_COUNT_ANNOTATION in annotations and ASSIGNED_DEVICES_ANNOTATION in annotations:
+            expected_node = annotations.get(ASSIGNED_NODE_ANNOTATION, bound_node)
+            expected_devices = annotations[ASSIGNED_DEVICES_ANNOTATION]
+            if expected_node != bound_node:
+                return f"bound to {bound_node} but assigned {expected_node}"
+        else:
+            gpu_map = self.map_configmaps.resolve(metadata.get('namespace', self.namespace),
+                                                  annotations.get('gpu-scheduling-map', ''))
+            ordinal = pod_index(metadata['name'])
+            assignment = compile_scheduling_map(gpu_map).get(ordinal) if gpu_map and ordinal is not None else None
+            if assignment is None:
+                return "no gpu-scheduling-map entry"
+            expected_node, expected_devices = assignment
+            logical_name = logical_names.get(bound_node)
+            if logical_name != expected_node:
+                return f"on {bound_node} ({GPU_NODE_LABEL}={logical_name}) but map assigns {expected_node}"
+
+        if normalize_devices(report.devices) != normalize_devices(expected_devices):
+            return f"CUDA_VISIBLE_DEVICES {report.devices} but assigned {expected_devices}"
+        return None
+
+    def summary(self) -> dict:
+        """Pass/fail result over every checked pod, with the pods that failed and why"""
+        now = time.monotonic()
+        with self._lock:
+            if self._summary is not None and now - self._summary_time < self.summary_ttl:
+                return self._summary
+
+        started = time.perf_counter()
+        pods = self.list_pods()
+        logical_names = self.logical_node_names()
+        with self._lock:
+            reports = dict(self._reports)
+
+        matched = 0
+        pending = []
+        mismatches = []
+        for pod in pods:
+            metadata = pod['metadata']
+            if (pod.get('status') or {}).get('phase') in ('Succeeded', 'Failed'):
+                continue
+            name = metadata['name']
+            if not (pod.get('spec') or {}).get('nodeName'):
+                pending.append(name)
+                continue
+            reason = self.check_pod(pod, reports.get((metadata.get('namespace', self.namespace), name)),
+                                    logical_names)
+            if reason is None:
+                matched += 1
+            else:
+                mismatches.append({'pod': name, 'node': pod['spec']['nodeName'], 'reason': reason})
+
+        # Reports of pods that are gone are dropped
+        current = {(pod['metadata'].get('namespace', self.namespace), pod['metadata']['name']) for pod in pods}
+        with self._lock:
+            for key in [key for key in self._reports if key not in current]:
+                del self._reports[key]
+
+        checked = matched + len(pending) + len(mismatches)
+        summary = {
+            'status': 'pass' if checked and matched == checked else 'fail',
+            'namespace': self.namespace,
+            'pods': checked,
+            'matched': matched,
+            'pending': pending,
+            'mismatches': mismatches,
+            'elapsed_seconds': round(time.perf_counter() - started, 4)
+        }
+        PODS_MATCHED.set(matched)
+        PODS_FAILING.set(checked - matched)
+        with self._lock:
+            self._summary = summary
+            self._summary_time = time.monotonic()
+        return summary
+
+
+class AggregatorRequestHandler(BaseHTTPRequestHandler):
+    """Accepts report batches and serves the fleet summary for one FleetAggregator"""
+
+    # Hundreds of check pods post at once over short connections
+    disable_nagle_algorithm = True
+    aggregator: FleetAggregator = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status: int, body: bytes, content_type: str = 'application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/reports':
+            self.send_body(404, b'{"error": "not found"}')
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_REPORT_BODY:
+            self.send_body(413, b'{"error": "request too large"}')
+            return
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError:
+            self.send_body(400, b'{"error": "invalid JSON"}')
+            return
+
+        # A single report, a list of reports or {"reports": [...]}
+        entries = body.get('reports', [body]) if isinstance(body, dict) else body
+        accepted = self.aggregator.add_reports(entries if isinstance(entries, list) else [])
+        self.send_body(200, json.dumps({'accepted': accepted}).encode())
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/summary':
+            try:
+                summary = self.aggregator.summary()
+            except Exception as e:
+                self.aggregator.logger.error(f"Error building fleet summary: {e}")
+                self.send_body(503, json.dumps({'status': 'error', 'error': str(e)}).encode())
+                return
+            self.send_body(200, json.dumps(summary).encode())
+        elif path == '/health':
+            self.send_body(200, b'{"status": "healthy", "service": "gpu-fleet-aggregator"}')
+        elif path == '/metrics':
+            self.send_body(200, metrics.render().encode(), metrics.CONTENT_TYPE)
+        else:
+            self.send_body(404, b'{"error": "not found"}')
+
+
+def create_server(aggregator: FleetAggregator, port: int = 8090) -> ThreadingHTTPServer:
+    """HTTP server for an aggregator; port 0 picks an ephemeral port"""
+    handler = type('FleetHandler', (AggregatorRequestHandler,), {'aggregator': aggregator})
+    server = ThreadingHTTPServer(('0.0.0.0', port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    """Main entry point"""
+    setup_logging_from_env('gpu-fleet-aggregator')
+    logger = logging.getLogger(__name__)
+    try:
+        load_incluster_config()
+    except ConfigException:
+        from kubernetes.config.kube_config import load_kube_config
+        load_kube_config()
+
+    aggregator = FleetAggregator(
+        client.CoreV1Api(),
+        namespace=os.environ.get('POD_NAMESPACE', 'default'),
+        label_selector=os.environ.get('CHECK_POD_SELECTOR', ''),
+        page_size=int(os.environ.get('LIST_PAGE_SIZE', '500')),
+        summary_ttl=float(os.environ.get('SUMMARY_TTL_SECONDS', '2'))
+    )
+    # Stop like on Ctrl-C on pod termination
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    server = create_server(aggregator, int(os.environ.get('AGGREGATOR_PORT', '8090')))
+    logger.info(f"Fleet aggregator listening on port {server.server_address[1]} for pods in "
+                f"{aggregator.namespace} matching '{aggregator.label_selector}'")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down fleet aggregator")
+
+
+if __name__ == "__main__":
+    main()
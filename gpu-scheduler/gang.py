@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Gang scheduling: hold the members of a multi-pod GPU job until all can be placed
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from scheduling_map import GANG_ANNOTATION, GANG_SIZE_ANNOTATION
+
+
+class Gang:
+    """Pods collected so far for one gang"""
+
+    def __init__(self, namespace: str, name: str, size: int):
+        self.namespace = namespace
+        self.name = name
+        self.size = size
+        self.pods: Dict[str, object] = {}
+        self.first_seen = time.monotonic()
+        self.last_attempt = 0.0
+        self.scheduling = False
+
+    def is_complete(self) -> bool:
+        """Whether every member of the gang has arrived"""
+        return len(self.pods) >= self.size
+
+
+class GangCoordinator:
+    """
+    Collects pods by their gpu-gang annotation and releases each gang as a unit
+
+    Once all `gpu-gang-size` members of a gang have arrived, `schedule_group`
+    is called with the whole group. It must either place every member or
+    place none and return False, in which case the gang is held and retried
+    every `retry_interval` seconds. Gangs still waiting `timeout` seconds after
+    their first member arrived are dropped and their members handed to
+    `on_timeout` to be retried later. The members are remembered, so a
+    member arriving after the timeout rejoins them instead of starting a
+    gang that can never complete.
+    """
+
+    def __init__(self, schedule_group: Callable[[List[object]], bool], timeout: float = 300,
+                 retry_interval: float = 2.0, on_timeout: Optional[Callable[[List[object]], None]] = None):
+        self.schedule_group = schedule_group
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.on_timeout = on_timeout
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._gangs: Dict[Tuple[str, str], Gang] = {}
+        # Members of gangs that timed out, by gang, until the gang forms again
+        self._expired: Dict[Tuple[str, str], Dict[str, object]] = {}
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, pod):
+        """Add a gang member, scheduling the gang if it is now complete"""
+        annotations = pod.metadata.annotations or {}
+        gang_name = annotations.get(GANG_ANNOTATION)
+        size_value = annotations.get(GANG_SIZE_ANNOTATION, '')
+        if not size_value.isdigit() or int(size_value) < 1:
+            self.logger.warning(f"Pod {pod.metadata.name} in gang {gang_name} has invalid "
+                                f"{GANG_SIZE_ANNOTATION} annotation '{size_value}'")
+            return
+
+        key = (pod.metadata.namespace, gang_name)
+        with self._lock:
+            gang = self._gangs.get(key)
+            if gang is None:
+                gang = self._gangs[key] = Gang(pod.metadata.namespace, gang_name, int(size_value))
+                gang.pods.update(self._expired.pop(key, {}))
+            gang.pods[pod.metadata.uid] = pod
+            self.logger.info(f"Gang {gang_name}: {len(gang.pods)}/{gang.size} members collected")
+
+        self.try_schedule(gang)
+
+    def discard(self, pod):
+        """Forget a member that was deleted while its gang was held"""
+        gang_name = (pod.metadata.annotations or {}).get(GANG_ANNOTATION)
+        if not gang_name:
+            return
+        key = (pod.metadata.namespace, gang_name)
+        with self._lock:
+            gang = self._gangs.get(key)
+            if gang:
+                gang.pods.pop(pod.metadata.uid, None)
+                if not gang.pods and not gang.scheduling:
+                    del self._gangs[key]
+            expired = self._expired.get(key)
+            if expired is not None:
+                expired.pop(pod.metadata.uid, None)
+                if not expired:
+                    del self._expired[key]
+
+    def try_schedule(self, gang: Gang) -> bool:
+        """Schedule a complete gang unless another thread is already doing so"""
+        with self._lock:
+            if not gang.is_complete() or gang.scheduling:
+                return False
+            gang.scheduling = True
+            gang.last_attempt = time.monotonic()
+            pods = list(gang.pods.values())
+
+        scheduled = False
+        try:
+            scheduled = self.schedule_group(pods)
+        except Exception as e:
+            self.logger.error(f"Error scheduling gang {gang.name}: {e}")
+
+        with self._lock:
+            gang.scheduling = False
+            if scheduled:
+                self._gangs.pop((gang.namespace, gang.name), None)
+
+        if scheduled:
+            self.logger.info(f"Gang {gang.name}: all {len(pods)} members placed")
+        else:
+            self.logger.info(f"Gang {gang.name}: cannot place all {len(pods)} members yet, holding")
+        return scheduled
+
+    def check(self):
+        """Retry held gangs that are due and drop gangs that timed out"""
+        now = time.monotonic()
+        due = []
+        expired = []
+        with self._lock:
+            for key, gang in list(self._gangs.items()):
+                if gang.scheduling:
+                    continue
+                if now - gang.first_seen >= self.timeout:
+                    del self._gangs[key]
+                    self._expired[key] = dict(gang.pods)
+                    expired.append(gang)
+                elif gang.is_complete() and now - gang.last_attempt >= self.retry_interval:
+                    due.append(gang)
+
+        for gang in expired:
+            self.logger.warning(f"Gang {gang.name} timed out with {len(gang.pods)}/{gang.size} members; "
+                                f"releasing held pods for retry")
+            if self.on_timeout:
+                self.on_timeout(list(gang.pods.values()))
+        for gang in due:
+            self.try_schedule(gang)
+
+    def start(self):
+        """Start retrying and expiring held gangs in a background thread"""
+        self._thread = threading.Thread(target=self.run, name="gang-coordinator", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stopped.set()
+
+    def run(self):
+        """Periodically retry and expire held gangs until stopped"""
+        while not self._stopped.wait(min(self.retry_interval, 1.0)):
+            self.check()
+
+    def __len__(self) -> int:
+        return len(self._gangs)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+In-memory ledger of GPU device allocations per node
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+def parse_device_mask(gpu_devices: str) -> Optional[int]:
+    """
+    Convert a device list such as "0,1,3" into a bitmap of device indices
+
+    Returns None when the list contains anything other than device indices
+    (for example GPU UUIDs), since those cannot be tracked by index.
+    """
+    mask = 0
+    for device in gpu_devices.split(','):
+        device = device.strip()
+        if not device:
+            continue
+        if not device.isdigit():
+            return None
+        mask |= 1 << int(device)
+    return mask
+
+
+def format_device_mask(mask: int) -> str:
+    """Convert a device bitmap back into a comma-separated device list"""
+    devices = []
+    index = 0
+    while mask:
+        if mask & 1:
+            devices.append(str(index))
+        mask >>= 1
+        index += 1
+    return ','.join(devices)
+
+
+class DeviceLedger:
+    """
+    Record of which GPU device indices are in use on which node
+
+    Each node is a single integer bitmap of allocated device indices and each
+    pod holds one (node, bitmap) entry, so allocate, free and conflict checks
+    are constant-time bit operations regardless of cluster size.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nodes: Dict[str, int] = {}
+        self._pods: Dict[str, Tuple[str, int, str]] = {}
+
+    def allocate(self, uid: str, node_name: str, mask: int, pod_name: str = '') -> bool:
+        """
+        Allocate devices on a node to a pod
+
+        Returns False without changing anything if any of the devices are held
+        by another pod. Allocating the same devices to the same pod again is
+        a no-op; allocating different ones moves the pod's allocation.
+        """
+        with self._lock:
+            previous = self._pods.get(uid)
+            if previous == (node_name, mask, pod_name):
+                return True
+
+            in_use = self._nodes.get(node_name, 0)
+            if previous and previous[0] == node_name:
+                in_use &= ~previous[1]
+            if in_use & mask:
+                return False
+
+            if previous:
+                self._free(previous[0], previous[1])
+            self._pods[uid] = (node_name, mask, pod_name)
+            self._nodes[node_name] = self._nodes.get(node_name, 0) | mask
+            return True
+
+    def release(self, uid: str) -> bool:
+        """Free a pod's devices; returns False if it held none"""
+        with self._lock:
+            entry = self._pods.pop(uid, None)
+            if entry is None:
+                return False
+            self._free(entry[0], entry[1])
+            return True
+
+    def _free(self, node_name: str, mask: int):
+        """Clear bits on a node, dropping nodes with no allocations"""
+        remaining = self._nodes.get(node_name, 0) & ~mask
+        if remaining:
+            self._nodes[node_name] = remaining
+        else:
+            self._nodes.pop(node_name, None)
+
+    def retain(self, uids: Set[str]):
+        """Free every allocation whose pod UID is not in `uids`"""
+        with self._lock:
+            for uid in [uid for uid in self._pods if uid not in uids]:
+                node_name, mask, _ = self._pods.pop(uid)
+                self._free(node_name, mask)
+
+    def conflicts(self, node_name: str, mask: int) -> int:
+        """Return the subset of `mask` already allocated on the node"""
+        return self._nodes.get(node_name, 0) & mask
+
+    def allocated(self, node_name: str) -> int:
+        """Return the bitmap of allocated devices on a node"""
+        return self._nodes.get(node_name, 0)
+
+    def holders(self, node_name: str, mask: int) -> List[str]:
+        """Names of pods holding any of the given devices on a node"""
+        with self._lock:
+            return [name or uid for uid, (node, held, name) in self._pods.items()
+                    if node == node_name and held & mask]
+
+    def allocation(self, uid: str) -> Optional[Tuple[str, int]]:
+        """Return the (node, bitmap) held by a pod"""
+        entry = self._pods.get(uid)
+        return (entry[0], entry[1]) if entry else None
+
+    def nodes(self) -> Iterable[str]:
+        """Nodes with at least one allocated device"""
+        return list(self._nodes)
+
+    def __len__(self) -> int:
+        return len(self._pods)
@@ -3,38 +3,129 @@
 Health check server for GPU scheduler
 """
 
+import json
 import logging
 import threading
-from flask import Flask, jsonify
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+import metrics
+from debug import handle_debug_request
+
+
+class HealthRequestHandler(BaseHTTPRequestHandler):
+    """Serves probes, metrics and debug endpoints for one HealthServer"""
+
+    # Probes open a new connection each time; answer in one write without Nagle delays
+    disable_nagle_algorithm = True
+    health: 'HealthServer' = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status: int, body: bytes, content_type: str = 'application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path
+
+        if path == '/health':
+            self.send_body(200, self.health.healthy_body)
+        elif path == '/ready':
+            self.send_body(*self.health.readiness())
+        elif path.startswith('/ready/') and path[len('/ready/'):] in self.health.component_checks:
+            self.send_body(*self.health.readiness(path[len('/ready/'):]))
+        elif path == '/metrics':
+            self.send_body(200, metrics.render().encode(), metrics.CONTENT_TYPE)
+        elif path.startswith('/debug/') and self.health.debug:
+            result = handle_debug_request(path, url.query)
+            if result is None:
+                self.send_body(404, b'{"error": "unknown debug endpoint"}')
+            else:
+                status, body = result
+                self.send_body(status, body.encode(), 'text/plain; charset=utf-8')
+        else:
+            self.send_body(404, b'{"error": "not found"}')
 
 
 class HealthServer:
-    """Simple health check server"""
-    
-    def __init__(self, port: int = 8080):
+    """
+    Minimal health check server on the standard library HTTP server
+
+    `/ready` runs every readiness check and answers 503 listing the failing
+    ones, so it reflects real state such as caches synced rather than just
+    the process being up. Checks added for a component are served only on
+    `/ready/<component>`: they report on one part of the process without
+    taking the whole pod, and every container sharing it, out of service.
+    """
+
+    def __init__(self, port: int = 8080, ready_check: Optional[Callable[[], bool]] = None,
+                 service: str = "gpu-scheduler", debug: bool = False):
         self.port = port
-        self.app = Flask(__name__)
-        self.setup_routes()
+        self.service = service
+        self.debug = debug
+        self.checks: Dict[str, Callable[[], bool]] = {}
+        self.component_checks: Dict[str, Dict[str, Callable[[], bool]]] = {}
+        if ready_check:
+            self.add_readiness_check("ready", ready_check)
+        self.healthy_body = json.dumps({"status": "healthy", "service": service}).encode()
+        self.server: Optional[ThreadingHTTPServer] = None
         self.logger = logging.getLogger(__name__)
-        
-    def setup_routes(self):
-        """Setup health check routes"""
-        
-        @self.app.route('/health')
-        def health():
-            return jsonify({"status": "healthy", "service": "gpu-scheduler"})
-            
-        @self.app.route('/ready')
-        def ready():
-            return jsonify({"status": "ready", "service": "gpu-scheduler"})
-            
+
+    def add_readiness_check(self, name: str, check: Callable[[], bool], component: Optional[str] = None):
+        """Require `check` to pass for the server, or only `component`, to report ready"""
+        if component is None:
+            self.checks[name] = check
+        else:
+            self.component_checks.setdefault(component, {})[name] = check
+
+    def readiness(self, component: Optional[str] = None):
+        """Return (status code, JSON body) for the readiness probe of the server or a component"""
+        checks = self.checks if component is None else self.component_checks[component]
+        failing = []
+        for name, check in checks.items():
+            try:
+                passed = check()
+            except Exception as e:
+                self.logger.warning(f"Readiness check {name} failed: {e}")
+                passed = False
+            if not passed:
+                failing.append(name)
+
+        if failing:
+            body = {"status": "not ready", "service": self.service, "failing": failing}
+            return 503, json.dumps(body).encode()
+        return 200, json.dumps({"status": "ready", "service": self.service}).encode()
+
+    def bind(self):
+        """Bind the listening socket; with port 0 an ephemeral port is chosen and stored in `port`"""
+        handler = type('HealthHandler', (HealthRequestHandler,), {'health': self})
+        self.server = ThreadingHTTPServer(('0.0.0.0', self.port), handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+
     def run(self):
         """Run the health server"""
+        if self.server is None:
+            self.bind()
         self.logger.info(f"Starting health server on port {self.port}")
-        self.app.run(host='0.0.0.0', port=self.port, debug=False)
-        
+        self.server.serve_forever()
+
     def start_background(self):
         """Start health server in background thread"""
-        thread = threading.Thread(target=self.run, daemon=True)
+        self.bind()
+        thread = threading.Thread(target=self.run, name="health-server", daemon=True)
         thread.start()
-        self.logger.info("Health server started in background")
\ No newline at end of file
+        self.logger.info("Health server started in background")
+
+    def stop(self):
+        """Stop serving and close the socket"""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Deferred package initialisation for heavy dependencies
+
+`import kubernetes` runs the package __init__, which imports the kubeconfig
+loader (google-auth, oauthlib, cryptography), the dynamic client, websocket
+streaming and the client's own leader election on top of the typed client.
+The scheduler only needs the typed client, watch and the in-cluster config
+loader, so the package is registered without running its __init__ and
+submodules are imported when first used. Code elsewhere in the process that
+reads an attribute the deferred __init__ would have set, such as
+`kubernetes.config.load_kube_config`, runs that __init__ on first access.
+"""
+
+import importlib
+import importlib.util
+import sys
+
+
+def register_package(name: str):
+    """Make package `name` importable without executing its __init__ until one of its attributes is missing"""
+    if name in sys.modules:
+        return
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.submodule_search_locations is None:
+        return
+    module = importlib.util.module_from_spec(spec)
+    initialized = False
+
+    def __getattr__(attribute: str):
+        # Submodules are imported on their own; anything else the __init__
+        # defines finishes the import the first time it is needed
+        if importlib.util.find_spec(f"{name}.{attribute}") is not None:
+            return importlib.import_module(f"{name}.{attribute}")
+        nonlocal initialized
+        if initialized:
+            raise AttributeError(f"module {name!r} has no attribute {attribute!r}")
+        initialized = True
+        spec.loader.exec_module(module)
+        return getattr(module, attribute)
+
+    module.__getattr__ = __getattr__
+    sys.modules[name] = module
+    parent, _, child = name.rpartition('.')
+    if parent:
+        setattr(sys.modules[parent], child, module)
+
+
+def defer_kubernetes_init():
+    """Import kubernetes submodules on demand instead of all at once"""
+    register_package('kubernetes')
+    register_package('kubernetes.config')
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Lease-based leader election for running warm standby scheduler replicas
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+
+
+def micro_time() -> str:
+    """Current time in the RFC 3339 microsecond format used by Lease timestamps"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+class LeaderElector:
+    """
+    Leader election on a coordination.k8s.io Lease, modelled on client-go
+
+    Every replica tries to acquire or renew the lease every `retry_period`
+    seconds. A lease is considered expired once its holder has not renewed
+    it for `lease_duration` seconds, measured on this replica's own clock
+    from when the current record was first observed, so clock skew between
+    replicas does not matter. A leader that cannot renew within
+    `renew_deadline` seconds steps down.
+    """
+
+    def __init__(self, coordination_v1, lease_name: str, namespace: str, identity: str,
+                 on_started_leading: Optional[Callable[[], None]] = None,
+                 on_stopped_leading: Optional[Callable[[], None]] = None,
+                 lease_duration: int = 15, renew_deadline: float = 10, retry_period: float = 2):
+        self.api = coordination_v1
+        self.lease_name = lease_name
+        self.namespace = namespace
+        self.identity = identity
+        self.on_started_leading = on_started_leading
+        self.on_stopped_leading = on_stopped_leading
+        self.lease_duration = lease_duration
+        self.renew_deadline = renew_deadline
+        self.retry_period = retry_period
+        self.logger = logging.getLogger(__name__)
+
+        self._leading = threading.Event()
+        self._stopped = threading.Event()
+        self._observed_record = None
+        self._observed_at = 0.0
+        self._last_renewed = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def is_leader(self) -> bool:
+        """Whether this replica currently holds the lease"""
+        return self._leading.is_set()
+
+    def start(self):
+        """Run the election loop in a background thread"""
+        self._thread = threading.Thread(target=self.run, name="leader-election", daemon=True)
+        self._thread.start()
+
+    def run(self):
+        """Try to acquire or renew the lease until stopped"""
+        self.logger.info(f"Starting leader election for lease {self.namespace}/{self.lease_name} as {self.identity}")
+        while not self._stopped.is_set():
+            try:
+                acquired = self.try_acquire_or_renew()
+            except Exception as e:
+                self.logger.error(f"Error updating lease {self.lease_name}: {e}")
+                acquired = False
+
+            now = time.monotonic()
+            if acquired:
+                self._last_renewed = now
+                if not self._leading.is_set():
+                    self._set_leading(True)
+            elif self._leading.is_set() and now - self._last_renewed > self.renew_deadline:
+                self.logger.warning(f"Could not renew lease {self.lease_name} within {self.renew_deadline}s")
+                self._set_leading(False)
+
+            self._stopped.wait(self.retry_period)
+
+    def _set_leading(self, leading: bool):
+        """Flip leadership state and run the matching callback"""
+        if leading:
+            self._leading.set()
+            self.logger.info(f"{self.identity} became leader")
+            callback = self.on_started_leading
+        else:
+            self._leading.clear()
+            self.logger.warning(f"{self.identity} stopped leading")
+            callback = self.on_stopped_leading
+
+        if callback:
+            try:
+                callback()
+            except Exception as e:
+                self.logger.error(f"Leader election callback failed: {e}")
+
+    def try_acquire_or_renew(self) -> bool:
+        """Acquire the lease if it is free or expired, or renew it if we hold it"""
+        try:
+            lease = self.api.read_namespaced_lease(self.lease_name, self.namespace)
+        except ApiException as e:
+            if e.status != 404:
+                raise
+            return self._create_lease()
+
+        spec = lease.spec or client.V1LeaseSpec()
+        record = (spec.holder_identity, spec.renew_time, spec.lease_transitions)
+        now = time.monotonic()
+        if record != self._observed_record:
+            self._observed_record = record
+            self._observed_at = now
+
+        holder = spec.holder_identity
+        duration = spec.lease_duration_seconds or self.lease_duration
+        if holder and holder != self.identity and now - self._observed_at < duration:
+            return False
+
+        if holder != self.identity:
+            spec.acquire_time = micro_time()
+            spec.lease_transitions = (spec.lease_transitions or 0) + 1
+        spec.holder_identity = self.identity
+        spec.lease_duration_seconds = self.lease_duration
+        spec.renew_time = micro_time()
+        lease.spec = spec
+
+        try:
+            # Replace carries the read resourceVersion, so a concurrent update by another replica wins
+            self.api.replace_namespaced_lease(self.lease_name, self.namespace, lease)
+        except ApiException as e:
+            if e.status == 409:
+                return False
+            raise
+        return True
+
+    def _create_lease(self) -> bool:
+        """Create the lease with ourselves as holder"""
+        now = micro_time()
+        lease = client.V1Lease(
+            metadata=client.V1ObjectMeta(name=self.lease_name, namespace=self.namespace),
+            spec=client.V1LeaseSpec(
+                holder_identity=self.identity,
+                lease_duration_seconds=self.lease_duration,
+                acquire_time=now,
+                renew_time=now,
+                lease_transitions=0
+            )
+        )
+        try:
+            self.api.create_namespaced_lease(self.namespace, lease)
+        except ApiException as e:
+            if e.status == 409:
+                return False
+            raise
+        return True
+
+    def release(self):
+        """Stop the election and give up the lease so a standby can take over immediately"""
+        self._stopped.set()
+        if not self._leading.is_set():
+            return
+
+        try:
+            lease = self.api.read_namespaced_lease(self.lease_name, self.namespace)
+            if lease.spec and lease.spec.holder_identity == self.identity:
+                lease.spec.holder_identity = None
+                lease.spec.lease_duration_seconds = 1
+                lease.spec.renew_time = micro_time()
+                self.api.replace_namespaced_lease(self.lease_name, self.namespace, lease)
+                self.logger.info(f"Released lease {self.lease_name}")
+        except ApiException as e:
+            self.logger.warning(f"Could not release lease {self.lease_name}: {e}")
+        finally:
+            self._set_leading(False)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Non-blocking log pipeline shared by the scheduler and the webhook
+
+Records are sampled per call site and put on a bounded in-memory queue;
+a background listener thread formats them (as text or one JSON object per
+line) and writes them out. Threads that log never wait on stream I/O: when
+the queue is full the record is dropped and counted instead, so a slow log
+consumer cannot stall the watch loop or an admission response.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional, Tuple
+
+from metrics import Counter
+
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+DEFAULT_QUEUE_SIZE = 10000
+
+# Per call site and second: log the first SAMPLE_INITIAL records, then every SAMPLE_THEREAFTER-th
+SAMPLE_INITIAL = 10
+SAMPLE_THEREAFTER = 100
+
+DROPPED_RECORDS = Counter('gpu_log_records_dropped_total', 'Log records dropped because the log queue was full')
+SAMPLED_RECORDS = Counter('gpu_log_records_sampled_total', 'Repetitive log records left out by sampling')
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+STANDARD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, with `extra` fields as top-level keys"""
+
+    def __init__(self, service: str):
+        super().__init__()
+        self.service = service
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created))
+                    + f".{int(record.msecs):03d}Z",
+            'level': record.levelname,
+            'service': self.service,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName
+        }
+        for key, value in vars(record).items():
+            if key not in STANDARD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Rate-limit records per call site below `unsampled_level`
+
+    Each call site (logger, file and line) logs its first `initial` records
+    every second and then every `thereafter`-th. The next record logged
+    from a call site carries `sampled_out`, the number left out before it.
+    """
+
+    def __init__(self, initial: int = SAMPLE_INITIAL, thereafter: int = SAMPLE_THEREAFTER,
+                 unsampled_level: int = logging.WARNING):
+        super().__init__()
+        self.initial = initial
+        self.thereafter = max(thereafter, 1)
+        self.unsampled_level = unsampled_level
+        # call site -> [second, records this second, records left out since the last one logged]
+        self.sites: Dict[Tuple[str, str, int], List[int]] = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.unsampled_level:
+            return True
+
+        second = int(record.created)
+        key = (record.name, record.pathname, record.lineno)
+        with self.lock:
+            site = self.sites.get(key)
+            if site is None:
+                site = self.sites[key] = [second, 0, 0]
+            elif site[0] != second:
+                site[0] = second
+                site[1] = 0
+            site[1] += 1
+            count = site[1]
+            if count > self.initial and (count - self.initial) % self.thereafter:
+                site[2] += 1
+                SAMPLED_RECORDS.inc()
+                return False
+            skipped, site[2] = site[2], 0
+
+        if skipped:
+            record.sampled_out = skipped
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves this process, so only the message is resolved
+        # here; formatting, including tracebacks, happens on the writer thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DROPPED_RECORDS.inc()
+
+
+class LogPipeline:
+    """Bounded queue between the logging threads and one writer thread"""
+
+    def __init__(self, output: logging.Handler, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 sampler: Optional[SamplingFilter] = None):
+        self.output = output
+        self.queue_size = queue_size
+        self.handler = DroppingQueueHandler(queue.Queue(queue_size))
+        if sampler:
+            self.handler.addFilter(sampler)
+        self.listener: Optional[QueueListener] = None
+
+    def start(self):
+        self.listener = QueueListener(self.handler.queue, self.output, respect_handler_level=True)
+        self.listener.start()
+
+    def stop(self):
+        """Flush queued records and stop the writer thread"""
+        if self.listener:
+            try:
+                self.listener.stop()
+            except queue.Full:
+                pass
+            self.listener = None
+
+    def restart_in_child(self):
+        """Give a forked process its own queue and writer thread"""
+        self.handler.queue = queue.Queue(self.queue_size)
+        self.start()
+
+
+_pipeline: Optional[LogPipeline] = None
+
+
+def _after_fork_in_child():
+    # Threads do not survive fork; without this, workers' records would fill a queue nobody reads
+    if _pipeline and _pipeline.listener:
+        _pipeline.restart_in_child()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def setup_logging(service: str, level: str = 'INFO', log_format: str = 'text',
+                  queue_size: int = DEFAULT_QUEUE_SIZE, sample_initial: int = SAMPLE_INITIAL,
+                  sample_thereafter: int = SAMPLE_THEREAFTER) -> LogPipeline:
+    """
+    Route the root logger through a sampled, queue-backed pipeline to stderr
+
+    `log_format` is 'text' or 'json'. A sample_initial below zero disables
+    sampling. Calling it again replaces the previous pipeline.
+    """
+    global _pipeline
+
+    output = logging.StreamHandler(sys.stderr)
+    if log_format == 'json':
+        output.setFormatter(JSONFormatter(service))
+    else:
+        output.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    sampler = SamplingFilter(sample_initial, sample_thereafter) if sample_initial >= 0 else None
+    pipeline = LogPipeline(output, queue_size, sampler)
+
+    root = logging.getLogger()
+    if _pipeline:
+        root.removeHandler(_pipeline.handler)
+        _pipeline.stop()
+    root.addHandler(pipeline.handler)
+    root.setLevel(level.upper())
+    pipeline.start()
+    _pipeline = pipeline
+    return pipeline
+
+
+def setup_logging_from_env(service: str) -> LogPipeline:
+    """setup_logging configured by LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE and LOG_SAMPLE_* variables"""
+    return setup_logging(
+        service,
+        level=os.environ.get('LOG_LEVEL', 'INFO'),
+        log_format=os.environ.get('LOG_FORMAT', 'text').lower(),
+        queue_size=int(os.environ.get('LOG_QUEUE_SIZE', str(DEFAULT_QUEUE_SIZE))),
+        sample_initial=int(os.environ.get('LOG_SAMPLE_INITIAL', str(SAMPLE_INITIAL))),
+        sample_thereafter=int(os.environ.get('LOG_SAMPLE_THEREAFTER', str(SAMPLE_THEREAFTER)))
+    )
+
+
+@atexit.register
+def _flush_at_exit():
+    if _pipeline:
+        _pipeline.stop()
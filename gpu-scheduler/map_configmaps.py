@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Watch-backed cache of scheduling maps held in ConfigMaps
+
+A gpu-scheduling-map annotation of the form "configmap:<name>[/<key>]" names
+a ConfigMap in the pod's namespace holding the map, so a StatefulSet's pod
+template carries a short reference instead of the whole map. Both the
+scheduler and the webhook keep these ConfigMaps in memory from a list and
+watch. The webhook never imports the Kubernetes client, so the cache reads
+through a small source interface with one implementation on the client and
+one on the standard library.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote, urlencode
+
+from metrics import Counter
+
+
+# Annotation value prefix referencing a ConfigMap that holds the map
+MAP_REFERENCE_PREFIX = 'configmap:'
+
+# Key read from a referenced ConfigMap when the reference names none
+DEFAULT_MAP_KEY = 'gpu-scheduling-map'
+
+# Label (any value) of the ConfigMaps kept in the cache by the watch
+MAP_CONFIGMAP_LABEL = 'gpu-scheduling-map'
+
+# Unlabelled ConfigMaps read on demand are kept this long, and at most this many
+FETCH_TTL = 30.0
+MAX_FETCHED = 1024
+
+SERVICE_ACCOUNT_DIR = '/var/run/secrets/kubernetes.io/serviceaccount'
+
+CONFIGMAP_READS = Counter('gpu_scheduling_map_configmap_reads_total',
+                          'Scheduling map ConfigMaps read directly because the watch cache did not hold them')
+
+# (event type, namespace, name, data, resourceVersion)
+ConfigMapEvent = Tuple[str, Optional[str], Optional[str], Optional[Dict[str, str]], Optional[str]]
+
+
+def map_reference(annotation_value: str) -> Optional[Tuple[str, str]]:
+    """(ConfigMap name, key) of a "configmap:<name>[/<key>]" annotation, or None for an inline map"""
+    if not annotation_value.startswith(MAP_REFERENCE_PREFIX):
+        return None
+    name, _, key = annotation_value[len(MAP_REFERENCE_PREFIX):].strip().partition('/')
+    return name, key or DEFAULT_MAP_KEY
+
+
+class APIError(Exception):
+    """An API server error response, with the HTTP status like ApiException"""
+
+    def __init__(self, status: int, reason: str = ''):
+        super().__init__(f"({status}) {reason}")
+        self.status = status
+        self.reason = reason
+
+
+class KubernetesConfigMapSource:
+    """Reads ConfigMaps through the Kubernetes client, for the scheduler"""
+
+    def __init__(self, v1):
+        self.v1 = v1
+        self._watch = None
+
+    def list(self, label_selector: str) -> Tuple[List[Tuple[str, str, Dict[str, str]]], Optional[str]]:
+        configmaps = self.v1.list_config_map_for_all_namespaces(label_selector=label_selector)
+        items = [(configmap.metadata.namespace, configmap.metadata.name, configmap.data or {})
+                 for configmap in configmaps.items]
+        return items, configmaps.metadata.resource_version
+
+    def watch(self, label_selector: str, resource_version: Optional[str], timeout: int) -> Iterator[ConfigMapEvent]:
+        from kubernetes import watch
+
+        self._watch = watch.Watch()
+        try:
+            for event in self._watch.stream(
+                self.v1.list_config_map_for_all_namespaces,
+                label_selector=label_selector,
+                resource_version=resource_version,
+                allow_watch_bookmarks=True,
+                timeout_seconds=timeout
+            ):
+                metadata = event['raw_object'].get('metadata', {})
+                yield (event['type'], metadata.get('namespace'), metadata.get('name'),
+                       event['raw_object'].get('data') or {}, metadata.get('resourceVersion'))
+        finally:
+            self._watch.stop()
+
+    def get(self, namespace: str, name: str) -> Optional[Dict[str, str]]:
+        try:
+            configmap = self.v1.read_namespaced_config_map(name, namespace)
+        except Exception as e:
+            if getattr(e, 'status', None) == 404:
+                return None
+            raise
+        return configmap.data or {}
+
+    def stop(self):
+        if self._watch:
+            self._watch.stop()
+
+
+class InClusterConfigMapSource:
+    """
+    Reads ConfigMaps from the API server with the pod's service account token
+
+    Uses only the standard library, so the webhook can watch map ConfigMaps
+    without importing the Kubernetes client. The token is re-read for every
+    request because the kubelet rotates it.
+    """
+
+    def __init__(self, host: Optional[str] = None, port: Optional[str] = None,
+                 account_dir: str = SERVICE_ACCOUNT_DIR, timeout: float = 10):
+        self.host = host or os.environ.get('KUBERNETES_SERVICE_HOST', '')
+        self.port = int(port or os.environ.get('KUBERNETES_SERVICE_PORT', '443'))
+        self.token_file = os.path.join(account_dir, 'token')
+        self.ca_file = os.path.join(account_dir, 'ca.crt')
+        self.timeout = timeout
+        self._context = None
+        self._response = None
+
+    @staticmethod
+    def available(account_dir: str = SERVICE_ACCOUNT_DIR) -> bool:
+        """Whether this process runs in a pod with a service account token"""
+        return bool(os.environ.get('KUBERNETES_SERVICE_HOST')) and os.path.exists(os.path.join(account_dir, 'token'))
+
+    def request(self, path: str, params: Optional[Dict[str, str]] = None, timeout: Optional[float] = None):
+        """GET an API path, returning the open response or raising APIError"""
+        import http.client
+        import ssl
+
+        if self._context is None:
+            self._context = ssl.create_default_context(cafile=self.ca_file)
+        with open(self.token_file) as f:
+            token = f.read().strip()
+
+        connection = http.client.HTTPSConnection(self.host, self.port, context=self._context,
+                                                 timeout=timeout or self.timeout)
+        query = f"?{urlencode(params)}" if params else ''
+        connection.request('GET', f"{path}{query}", headers={'Authorization': f"Bearer {token}",
+                                                             'Accept': 'application/json'})
+        response = connection.getresponse()
+        if response.status != 200:
+            reason = response.read(512).decode(errors='replace')
+            connection.close()
+            raise APIError(response.status, reason)
+        return response
+
+    def list(self, label_selector: str) -> Tuple[List[Tuple[str, str, Dict[str, str]]], Optional[str]]:
+        with self.request('/api/v1/configmaps', {'labelSelector': label_selector}) as response:
+            body = json.loads(response.read())
+        items = [(item['metadata'].get('namespace'), item['metadata'].get('name'), item.get('data') or {})
+                 for item in body.get('items') or []]
+        return items, body.get('metadata', {}).get('resourceVersion')
+
+    def watch(self, label_selector: str, resource_version: Optional[str], timeout: int) -> Iterator[ConfigMapEvent]:
+        params = {'watch': 'true', 'labelSelector': label_selector, 'allowWatchBookmarks': 'true',
+                  'timeoutSeconds': str(timeout)}
+        if resource_version:
+            params['resourceVersion'] = resource_version
+        self._response = response = self.request('/api/v1/configmaps', params, timeout=timeout + 30)
+        try:
+            for line in response:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                obj = event.get('object') or {}
+                if event.get('type') == 'ERROR':
+                    raise APIError(obj.get('code', 500), obj.get('message', ''))
+                metadata = obj.get('metadata', {})
+                yield (event['type'], metadata.get('namespace'), metadata.get('name'), obj.get('data') or {},
+                       metadata.get('resourceVersion'))
+        finally:
+            response.close()
+
+    def get(self, namespace: str, name: str) -> Optional[Dict[str, str]]:
+        try:
+            with self.request(f"/api/v1/namespaces/{quote(namespace)}/configmaps/{quote(name)}") as response:
+                return json.loads(response.read()).get('data') or {}
+        except APIError as e:
+            if e.status == 404:
+                return None
+            raise
+
+    def stop(self):
+        if self._response is not None:
+            self._response.close()
+
+
+class MapConfigMapCache:
+    """
+    Informer-style cache of the ConfigMaps holding scheduling maps
+
+    Lists the ConfigMaps labelled `gpu-scheduling-map` once, then keeps them
+    current from a watch, so resolving a pod's map reference needs no API
+    round trip. A referenced ConfigMap the watch has not delivered, such as
+    one without the label, is read directly and kept for `fetch_ttl` seconds.
+    """
+
+    def __init__(self, source, watch_timeout: int = 3600, fetch_ttl: float = FETCH_TTL):
+        self.source = source
+        self.watch_timeout = watch_timeout
+        self.fetch_ttl = fetch_ttl
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._configmaps: Dict[Tuple[str, str], Dict[str, str]] = {}
+        # (namespace, name) -> (data or None if missing, when it was read)
+        self._fetched: Dict[Tuple[str, str], Tuple[Optional[Dict[str, str]], float]] = {}
+        self._resource_version: Optional[str] = None
+        self._synced = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def resolve(self, namespace: str, annotation_value: str) -> Optional[str]:
+        """
+        The map text of a gpu-scheduling-map annotation
+
+        Inline maps are returned unchanged; references return the map held
+        in the ConfigMap, or None if it or its key does not exist.
+        """
+        reference = map_reference(annotation_value)
+        if reference is None:
+            return annotation_value
+
+        name, key = reference
+        data = self.data(namespace, name)
+        value = data.get(key) if data is not None else None
+        if value is None:
+            self.logger.warning(f"Scheduling map ConfigMap {namespace}/{name} has no key {key}"
+                                if data is not None else f"Scheduling map ConfigMap {namespace}/{name} not found")
+        return value
+
+    def data(self, namespace: str, name: str) -> Optional[Dict[str, str]]:
+        """A map ConfigMap's data from the cache, reading it directly on a miss"""
+        key = (namespace, name)
+        data = self._configmaps.get(key)
+        if data is not None:
+            return data
+
+        now = time.monotonic()
+        fetched = self._fetched.get(key)
+        if fetched is not None and now - fetched[1] < self.fetch_ttl:
+            return fetched[0]
+
+        CONFIGMAP_READS.inc()
+        try:
+            data = self.source.get(namespace, name)
+        except Exception as e:
+            self.logger.error(f"Error reading scheduling map ConfigMap {namespace}/{name}: {e}")
+            return None
+        with self._lock:
+            if len(self._fetched) >= MAX_FETCHED:
+                self._fetched.clear()
+            self._fetched[key] = (data, now)
+        return data
+
+    def has_synced(self) -> bool:
+        """Whether the initial ConfigMap list has been loaded"""
+        return self._synced.is_set()
+
+    def __len__(self) -> int:
+        return len(self._configmaps)
+
+    def start(self):
+        """Start the list/watch loop in a background thread"""
+        self._thread = threading.Thread(target=self.run, name="map-configmaps", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the list/watch loop"""
+        self._stopped.set()
+        self.source.stop()
+
+    def run(self):
+        """List map ConfigMaps, then watch for changes until stopped"""
+        retry_count = 0
+
+        while not self._stopped.is_set():
+            try:
+                if self._resource_version is None:
+                    self.relist()
+                for event in self.source.watch(MAP_CONFIGMAP_LABEL, self._resource_version, self.watch_timeout):
+                    self.handle_event(*event)
+                    if self._stopped.is_set():
+                        break
+                retry_count = 0
+
+            except Exception as e:
+                if getattr(e, 'status', None) == 410:
+                    self.logger.info("Scheduling map ConfigMap watch expired, relisting")
+                    self._resource_version = None
+                    continue
+                self.logger.error(f"Scheduling map ConfigMap cache error: {e}")
+                retry_count += 1
+
+            if retry_count:
+                delay = min(2 ** retry_count, 60) + random.uniform(0, 1)
+                self.logger.info(f"Retrying scheduling map ConfigMap cache in {delay:.1f} seconds...")
+                self._stopped.wait(delay)
+
+    def relist(self):
+        """Replace the cache contents with a fresh list of map ConfigMaps"""
+        items, resource_version = self.source.list(MAP_CONFIGMAP_LABEL)
+        with self._lock:
+            self._configmaps = {(namespace, name): data for namespace, name, data in items}
+            self._resource_version = resource_version
+        self._synced.set()
+        self.logger.info(f"Scheduling map ConfigMap cache synced: {len(items)} ConfigMaps")
+
+    def handle_event(self, event_type: str, namespace: Optional[str], name: Optional[str],
+                     data: Optional[Dict[str, str]], resource_version: Optional[str]):
+        """Apply a single ConfigMap watch event"""
+        if resource_version:
+            self._resource_version = resource_version
+        if event_type == 'BOOKMARK':
+            return
+
+        key = (namespace, name)
+        with self._lock:
+            self._fetched.pop(key, None)
+            if event_type == 'DELETED':
+                self._configmaps.pop(key, None)
+            else:
+                self._configmaps[key] = data or {}
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Minimal Prometheus metrics: counters, gauges and histograms in text format
+
+Each update is a bucket search and an add under an uncontended lock, so
+instrumenting the watch, bind and admission paths costs under a
+microsecond. Values can be moved into shared memory before forking worker
+processes; every process then writes its own slot and `/metrics` reports
+the sum.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, List, Optional, Sequence
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds, for API calls and request handling
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Seconds, for in-memory operations such as cache lookups and map parsing
+FAST_BUCKETS = (0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001,
+                0.0025, 0.01, 0.1)
+
+
+def format_value(value: float) -> str:
+    """Format a sample value or bucket bound"""
+    if value == float('inf'):
+        return '+Inf'
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self.metrics: List['Metric'] = []
+
+    def register(self, metric: 'Metric'):
+        self.metrics.append(metric)
+
+    def share(self, processes: int):
+        """Move all values to shared memory with one slot per process; call before forking"""
+        for metric in self.metrics:
+            metric.share(processes)
+
+    def use_slot(self, index: int):
+        """Write this process's updates to slot `index` of the shared values"""
+        for metric in self.metrics:
+            metric.use_slot(index)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class Metric(ABC):
+    """Base class holding a fixed-size block of float values"""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, size: int, registry: Optional[Registry] = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self._size = size
+        self._values = [0.0] * size
+        self._processes = 1
+        self._offset = 0
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def share(self, processes: int):
+        import multiprocessing
+        values = multiprocessing.RawArray('d', processes * self._size)
+        values[:self._size] = self.totals()
+        self._values = values
+        self._processes = processes
+
+    def use_slot(self, index: int):
+        self._offset = index * self._size
+
+    def totals(self) -> List[float]:
+        """Values summed over all process slots"""
+        totals = [0.0] * self._size
+        for process in range(self._processes):
+            base = process * self._size
+            for i in range(self._size):
+                totals[i] += self._values[base + i]
+        return totals
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Exposition lines for the current values, without HELP and TYPE"""
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, registry: Optional[Registry] = REGISTRY):
+        super().__init__(name, documentation, 1, registry)
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._values[self._offset] += amount
+
+    def value(self) -> float:
+        return self.totals()[0]
+
+    def samples(self) -> List[str]:
+        return [f"{self.name} {format_value(self.value())}"]
+
+
+class Gauge(Metric):
+    """Value that can go up and down, or is read from a function at scrape time"""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, registry: Optional[Registry] = REGISTRY):
+        super().__init__(name, documentation, 1, registry)
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        with self._lock:
+            self._values[self._offset] = value
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._values[self._offset] += amount
+
+    def dec(self, amount: float = 1):
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]):
+        """Report the result of `function` instead of a stored value; costs nothing until scraped"""
+        self._function = function
+
+    def value(self) -> float:
+        if self._function is not None:
+            return float(self._function())
+        return self.totals()[0]
+
+    def samples(self) -> List[str]:
+        return [f"{self.name} {format_value(self.value())}"]
+
+
+class Timer:
+    """Context manager observing the elapsed time of its block into a histogram"""
+
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram: 'Histogram'):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 registry: Optional[Registry] = REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        # One count per bucket, one for +Inf, then the sum
+        super().__init__(name, documentation, len(self.buckets) + 2, registry)
+        self._sum_index = len(self.buckets) + 1
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._values[self._offset + index] += 1
+            self._values[self._offset + self._sum_index] += value
+
+    def time(self) -> Timer:
+        """Time a block: `with histogram.time(): ...`"""
+        return Timer(self)
+
+    def count(self) -> int:
+        return int(sum(self.totals()[:self._sum_index]))
+
+    def samples(self) -> List[str]:
+        totals = self.totals()
+        lines = []
+        cumulative = 0.0
+        for bound, count in zip(self.buckets + (float('inf'),), totals):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{format_value(bound)}"}} {format_value(cumulative)}')
+        lines.append(f"{self.name}_sum {format_value(totals[self._sum_index])}")
+        lines.append(f"{self.name}_count {format_value(cumulative)}")
+        return lines
+
+
+def render() -> str:
+    """Render the default registry"""
+    return REGISTRY.render()
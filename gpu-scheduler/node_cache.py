@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Watch-backed node cache for logical-to-actual node name lookups
+"""
+
+import logging
+import random
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+
+GPU_NODE_LABEL = 'gpu-node-name'
+
+# Node label overriding the number of GPUs on a node without an nvidia.com/gpu capacity
+GPU_COUNT_LABEL = 'gpu-device-count'
+GPU_RESOURCE = 'nvidia.com/gpu'
+
+
+class NodeCache:
+    """
+    Informer-style cache of cluster nodes.
+
+    Lists nodes once, then keeps the cache current from a node watch and
+    maintains an in-memory index of the `gpu-node-name` label to the actual
+    Kubernetes node name so lookups need no API round trip.
+    """
+
+    def __init__(self, v1, label_key: str = GPU_NODE_LABEL, watch_timeout: int = 3600, default_gpu_count: int = 8):
+        self.v1 = v1
+        self.label_key = label_key
+        self.default_gpu_count = default_gpu_count
+        self.watch_timeout = watch_timeout
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._logical_by_node: Dict[str, str] = {}
+        self._index: Dict[str, str] = {}
+        self._gpu_counts: Dict[str, int] = {}
+        self._resource_version: Optional[str] = None
+        self._synced = threading.Event()
+        self._stopped = threading.Event()
+        self._watch: Optional[watch.Watch] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def lookup(self, logical_node_name: str) -> Optional[str]:
+        """Return the actual node name for a logical node name, if known"""
+        return self._index.get(logical_node_name)
+
+    def gpu_nodes(self) -> List[Tuple[str, int]]:
+        """Return (actual node name, GPU count) for every node with the gpu-node-name label"""
+        with self._lock:
+            return [(node_name, self._gpu_counts.get(node_name, self.default_gpu_count))
+                    for node_name in self._logical_by_node]
+
+    def gpu_count(self, node) -> int:
+        """Number of GPU devices on a node from its capacity, label or the default"""
+        capacity = getattr(getattr(node, 'status', None), 'capacity', None) or {}
+        labels = node.metadata.labels or {}
+        for value in (capacity.get(GPU_RESOURCE), labels.get(GPU_COUNT_LABEL)):
+            if value is not None and str(value).isdigit():
+                return int(value)
+        return self.default_gpu_count
+
+    def has_synced(self) -> bool:
+        """Whether the initial node list has been loaded"""
+        return self._synced.is_set()
+
+    def wait_for_sync(self, timeout: Optional[float] = None) -> bool:
+        """Block until the initial node list has been loaded"""
+        return self._synced.wait(timeout)
+
+    def __len__(self) -> int:
+        return len(self._logical_by_node)
+
+    def start(self):
+        """Start the list/watch loop in a background thread"""
+        self._thread = threading.Thread(target=self.run, name="node-cache", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the list/watch loop"""
+        self._stopped.set()
+        if self._watch:
+            self._watch.stop()
+
+    def run(self):
+        """List nodes, then watch for changes until stopped"""
+        retry_count = 0
+
+        while not self._stopped.is_set():
+            try:
+                if self._resource_version is None:
+                    self.relist()
+                self.watch_nodes()
+                retry_count = 0
+
+            except ApiException as e:
+                if e.status == 410:
+                    self.logger.info("Node watch expired, relisting nodes")
+                    self._resource_version = None
+                    continue
+                self.logger.error(f"Node cache API error: {e}")
+                retry_count += 1
+
+            except Exception as e:
+                self.logger.error(f"Unexpected node cache error: {e}")
+                retry_count += 1
+
+            if retry_count:
+                delay = min(2 ** retry_count, 60) + random.uniform(0, 1)
+                self.logger.info(f"Retrying node cache in {delay:.1f} seconds...")
+                self._stopped.wait(delay)
+
+    def relist(self):
+        """Replace the cache contents with a fresh node list"""
+        nodes = self.v1.list_node()
+
+        logical_by_node = {}
+        index = {}
+        gpu_counts = {}
+        for node in nodes.items:
+            logical_name = (node.metadata.labels or {}).get(self.label_key)
+            if logical_name:
+                logical_by_node[node.metadata.name] = logical_name
+                index[logical_name] = node.metadata.name
+                gpu_counts[node.metadata.name] = self.gpu_count(node)
+
+        with self._lock:
+            self._logical_by_node = logical_by_node
+            self._index = index
+            self._gpu_counts = gpu_counts
+            self._resource_version = nodes.metadata.resource_version
+
+        self._synced.set()
+        self.logger.info(f"Node cache synced: {len(nodes.items)} nodes, {len(index)} with {self.label_key} label")
+
+    def watch_nodes(self):
+        """Apply node watch events to the cache from the last seen resource version"""
+        self._watch = watch.Watch()
+        try:
+            for event in self._watch.stream(
+                self.v1.list_node,
+                resource_version=self._resource_version,
+                allow_watch_bookmarks=True,
+                timeout_seconds=self.watch_timeout
+            ):
+                self.handle_event(event)
+                if self._stopped.is_set():
+                    break
+        finally:
+            self._watch.stop()
+
+    def handle_event(self, event: dict):
+        """Apply a single node watch event"""
+        event_type = event['type']
+
+        if event_type == 'BOOKMARK':
+            metadata = event['raw_object'].get('metadata', {})
+            self._resource_version = metadata.get('resourceVersion', self._resource_version)
+            return
+
+        node = event['object']
+        node_name = node.metadata.name
+        logical_name = (node.metadata.labels or {}).get(self.label_key)
+
+        with self._lock:
+            previous = self._logical_by_node.pop(node_name, None)
+            self._gpu_counts.pop(node_name, None)
+            if previous and self._index.get(previous) == node_name:
+                del self._index[previous]
+
+            if event_type != 'DELETED' and logical_name:
+                existing = self._index.get(logical_name)
+                if existing and existing != node_name:
+                    self.logger.warning(
+                        f"Nodes {existing} and {node_name} share {self.label_key}={logical_name}, using {node_name}"
+                    )
+                self._logical_by_node[node_name] = logical_name
+                self._index[logical_name] = node_name
+                self._gpu_counts[node_name] = self.gpu_count(node)
+
+            self._resource_version = node.metadata.resource_version
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Automatic GPU placement for pods without an explicit scheduling map entry
+"""
+
+from typing import Iterable, Optional, Tuple
+
+from gpu_ledger import DeviceLedger
+
+
+BINPACK = 'binpack'
+SPREAD = 'spread'
+STRATEGIES = (BINPACK, SPREAD)
+
+
+def lowest_free_devices(free_mask: int, count: int) -> int:
+    """Return a bitmap of the `count` lowest set bits of `free_mask`"""
+    chosen = 0
+    for _ in range(count):
+        lowest = free_mask & -free_mask
+        chosen |= lowest
+        free_mask ^= lowest
+    return chosen
+
+
+def choose_placement(nodes: Iterable[Tuple[str, int]], ledger: DeviceLedger, gpu_count: int,
+                     strategy: str = BINPACK) -> Optional[Tuple[str, int]]:
+    """
+    Choose a node and device bitmap for a pod requesting `gpu_count` GPUs
+
+    `nodes` yields (node name, number of GPUs on the node). With `binpack`
+    the node with the fewest free devices that still fits is chosen, keeping
+    whole nodes free for large requests; with `spread` the node with the most
+    free devices is chosen. Ties go to the first node in name order. Devices
+    are the lowest free indices on the chosen node. Returns None if no node
+    has enough free devices.
+    """
+    best_node = None
+    best_free_mask = 0
+    best_free = 0
+
+    for node_name, node_gpu_count in nodes:
+        free_mask = ((1 << node_gpu_count) - 1) & ~ledger.allocated(node_name)
+        free = free_mask.bit_count()
+        if free < gpu_count:
+            continue
+
+        if best_node is None:
+            better = True
+        elif free != best_free:
+            better = free < best_free if strategy == BINPACK else free > best_free
+        else:
+            better = node_name < best_node
+
+        if better:
+            best_node, best_free_mask, best_free = node_name, free_mask, free
+
+    if best_node is None:
+        return None
+    return best_node, lowest_free_devices(best_free_mask, gpu_count)
@@ -9,20 +9,187 @@ import time
 import logging
 import json
 import random
-from typing import Dict, List, Optional, Tuple
-from kubernetes import client, config, watch
+import signal
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+from lazy_imports import defer_kubernetes_init
+# Skip the kubernetes package __init__ so the kubeconfig loader and its auth
+# plugins are only imported when running outside a cluster
+defer_kubernetes_init()
+from kubernetes import client, watch
 from kubernetes.client.rest import ApiException
+from kubernetes.config.config_exception import ConfigException
+from kubernetes.config.incluster_config import load_incluster_config
+from api_transport import create_api_client
+from gang import GangCoordinator
+from gpu_ledger import DeviceLedger, format_device_mask, parse_device_mask
 from health_server import HealthServer
+from leader_election import LeaderElector
+from log_pipeline import setup_logging_from_env
+from map_configmaps import KubernetesConfigMapSource, MapConfigMapCache
+from metrics import FAST_BUCKETS, Counter, Gauge, Histogram
+from node_cache import NodeCache
+from placement import BINPACK, choose_placement
+from scheduling_map import (
+    ASSIGNED_DEVICES_ANNOTATION, ASSIGNED_NODE_ANNOTATION, GANG_ANNOTATION, GPU_COUNT_ANNOTATION,
+    compile_scheduling_map
+)
+from scheduling_queue import RetryRateLimiter, SchedulingQueue
+from shard_membership import ShardMembership
+from sharding import SHARD_BY_NAMESPACE, pod_shard, shard_selector
+
+
+# Upper bound on concurrent binding calls when a gang is released
+MAX_GANG_BIND_CONCURRENCY = 32
+
+# Longest a bind worker waits for the initial node list before falling back to node lookups
+NODE_SYNC_TIMEOUT = 30
+
+# Pod watches are re-established this often, resuming from the last resourceVersion
+POD_WATCH_TIMEOUT = 300
+
+# Sharded instances reconnect sooner so a change of owned shards takes effect quickly
+SHARDED_POD_WATCH_TIMEOUT = 30
+
+EVENT_TO_BIND_SECONDS = Histogram('gpu_scheduler_event_to_bind_seconds',
+                                  'Time from a pending pod first being seen to its successful bind')
+BIND_API_SECONDS = Histogram('gpu_scheduler_bind_api_seconds', 'Latency of pod binding API calls')
+NODE_LOOKUP_SECONDS = Histogram('gpu_scheduler_node_lookup_seconds',
+                                'Time to resolve a logical node name to an actual node', buckets=FAST_BUCKETS)
+BIND_FAILURES = Counter('gpu_scheduler_bind_failures_total', 'Pod bindings or assignment records that failed')
+WATCH_EXPIRED = Counter('gpu_scheduler_watch_expired_total',
+                        'Pod watch restarts from a relist after 410 Gone')
+SKIPPED_PODS = Counter('gpu_scheduler_skipped_pods_total',
+                       'Pods left pending because they have no usable GPU assignment')
+QUEUE_DEPTH = Gauge('gpu_scheduler_queue_depth', 'Pods waiting for a bind worker')
+PENDING_PODS = Gauge('gpu_scheduler_pending_pods', 'Unbound pods known to the scheduler')
+RETRIES = Counter('gpu_scheduler_retries_total', 'Pods re-queued for another attempt after failing to bind')
+POD_WATCH_CONNECTED = Gauge('gpu_scheduler_pod_watch_connected', 'Whether the pod watch is connected')
+POD_WATCH_EVENT_AGE = Gauge('gpu_scheduler_pod_watch_event_age_seconds',
+                            'Seconds since the pod watch last delivered an event, 0 before the first one')
+RETRY_WAITING = Gauge('gpu_scheduler_retry_waiting_pods', 'Pods waiting out a retry backoff before being re-queued')
+RETRY_DELAY_SECONDS = Histogram('gpu_scheduler_retry_delay_seconds',
+                                'Backoff applied to failed pods before their next attempt',
+                                buckets=(0.1, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 60.0, 120.0, 300.0))
+RESYNC_SECONDS = Histogram('gpu_scheduler_resync_seconds', 'Duration of periodic sweeps for missed pending pods')
+RESYNC_MISSED_PODS = Counter('gpu_scheduler_resync_missed_pods_total',
+                             'Pending pods found by a resync sweep that the watch had missed')
+IS_LEADER = Gauge('gpu_scheduler_leader', 'Whether this replica holds the scheduler lease')
+SHARD_MEMBERS = Gauge('gpu_scheduler_shard_members', 'Live scheduler instances in the shard group')
+OWNED_SHARDS = Gauge('gpu_scheduler_owned_shards', 'Pod shards this scheduler instance watches and binds')
+RESHARDS = Counter('gpu_scheduler_reshards_total', 'Changes of the shards owned by this scheduler instance')
+
+
+class UnschedulablePod(Exception):
+    """A pod whose GPU annotations can never be satisfied, so retrying it does not help"""
 
 
 class GPUScheduler:
     """Custom Kubernetes scheduler for GPU device assignment"""
     
-    def __init__(self, scheduler_name: str = "gpu-scheduler"):
+    def __init__(self, scheduler_name: str = "gpu-scheduler", bind_workers: int = 4, queue_depth: int = 1000,
+                 placement_strategy: str = BINPACK, gang_timeout: float = 300,
+                 leader_election: bool = False, lease_namespace: str = "default", identity: Optional[str] = None,
+                 debug_endpoints: bool = False, ready_max_event_age: float = 600,
+                 retry_base_delay: float = 1.0, retry_max_delay: float = 60.0, retry_qps: float = 10.0,
+                 retry_burst: int = 100, resync_interval: float = 300, resync_page_size: int = 500,
+                 shard_count: int = 0, shard_by: str = SHARD_BY_NAMESPACE, api_qps: float = 50,
+                 api_burst: int = 100, api_pool_size: int = 64, api_connect_timeout: float = 5,
+                 api_request_timeout: float = 30,
+                 v1: Optional[client.CoreV1Api] = None, coordination_v1: Optional[client.CoordinationV1Api] = None):
+        if shard_count and leader_election:
+            raise ValueError("Sharding and leader election are mutually exclusive: every shard member binds pods")
         self.scheduler_name = scheduler_name
+        self.bind_workers = bind_workers
+        self.placement_strategy = placement_strategy
         self.setup_logging()
-        self.setup_kubernetes_client()
-        self.health_server = HealthServer()
+        if v1 is None:
+            self.setup_kubernetes_client(api_qps, api_burst, api_pool_size, api_connect_timeout, api_request_timeout)
+        else:
+            self.v1 = v1
+            self.lease_api_client = None
+        self.node_cache = NodeCache(self.v1)
+        # Scheduling maps that pods reference by ConfigMap instead of carrying inline
+        self.map_configmaps = MapConfigMapCache(KubernetesConfigMapSource(self.v1))
+        # Failed pods are retried with per-pod backoff under one retry rate limit
+        self.queue = SchedulingQueue(maxsize=queue_depth,
+                                     rate_limiter=RetryRateLimiter(retry_base_delay, retry_max_delay, retry_qps,
+                                                                   retry_burst))
+        self.workers: List[threading.Thread] = []
+        self.ledger = DeviceLedger()
+        # Serializes automatic placement so concurrent workers never pick the same free devices
+        self.placement_lock = threading.Lock()
+        self.gangs = GangCoordinator(self.schedule_gang, timeout=gang_timeout, on_timeout=self.release_gang)
+        # The pod watch covers all of our pods: pending ones are scheduled and
+        # bound or finished ones keep the device ledger current
+        self.pod_field_selector = f"spec.schedulerName={scheduler_name}"
+        # Resync sweeps only need our unbound pods, listed a page at a time
+        self.pending_field_selector = f"spec.schedulerName={scheduler_name},spec.nodeName="
+        # Sharded instances watch their own shards' pods through a label selector,
+        # plus every bound pod so the device ledger covers all shards
+        self.bound_field_selector = f"spec.schedulerName={scheduler_name},spec.nodeName!="
+        self.shard_count = shard_count
+        self.shard_by = shard_by
+        self.owned_shards: Set[int] = set()
+        self.pod_label_selector: Optional[str] = None
+        self.reshard = threading.Event()
+        self.bound_resource_version: Optional[str] = None
+        self.resync_interval = resync_interval
+        self.resync_page_size = resync_page_size
+        self.resync_stopped = threading.Event()
+        # Last resourceVersion seen by the pod watch; None forces a relist
+        self.resource_version: Optional[str] = None
+        # Unbound pods seen by the watch, kept on standbys too so a new leader can start binding at once
+        self.pending_pods: Dict[str, client.V1Pod] = {}
+        # When each pending pod was first seen, for event-to-bind latency
+        self.pending_since: Dict[str, float] = {}
+        # Pending pods handed to the scheduling queue, so a resync can tell which ones were missed
+        self.queued_uids: Set[str] = set()
+        # Members of partially bound gangs, retried on their own instead of waiting for their gang again
+        self.gang_stragglers: Set[str] = set()
+        self.pending_lock = threading.Lock()
+        self.elector: Optional[LeaderElector] = None
+        self.sharding: Optional[ShardMembership] = None
+        if shard_count:
+            self.sharding = ShardMembership(
+                coordination_v1 or client.CoordinationV1Api(self.lease_api_client or self.v1.api_client),
+                group=scheduler_name,
+                namespace=lease_namespace,
+                identity=identity or socket.gethostname(),
+                shard_count=shard_count,
+                on_change=self.on_shards_changed
+            )
+        if leader_election:
+            self.elector = LeaderElector(
+                coordination_v1 or client.CoordinationV1Api(self.lease_api_client or self.v1.api_client),
+                lease_name=scheduler_name,
+                namespace=lease_namespace,
+                identity=identity or socket.gethostname(),
+                on_started_leading=self.on_started_leading,
+                on_stopped_leading=self.on_stopped_leading
+            )
+        # Readiness: node cache synced. The pod watch being connected with its
+        # last event (bookmarks and reconnects included) no older than
+        # ready_max_event_age is reported on /ready/scheduler only, since the
+        # webhook shares the pod and must stay in its Service through API blips
+        self.watch_connected = False
+        self.last_event_time = 0.0
+        self.ready_max_event_age = ready_max_event_age
+        self.health_server = HealthServer(debug=debug_endpoints)
+        self.health_server.add_readiness_check("node_cache_synced", self.node_cache.has_synced)
+        self.health_server.add_readiness_check("pod_watch_connected", lambda: self.watch_connected, "scheduler")
+        self.health_server.add_readiness_check("recent_pod_event", self.has_recent_event, "scheduler")
+        POD_WATCH_CONNECTED.set_function(lambda: self.watch_connected)
+        POD_WATCH_EVENT_AGE.set_function(lambda: time.monotonic() - self.last_event_time if self.last_event_time else 0)
+        QUEUE_DEPTH.set_function(lambda: len(self.queue))
+        RETRY_WAITING.set_function(lambda: self.queue.waiting)
+        PENDING_PODS.set_function(lambda: len(self.pending_pods))
+        IS_LEADER.set_function(self.is_leader)
+        if self.sharding:
+            SHARD_MEMBERS.set_function(lambda: len(self.sharding.members()))
+            OWNED_SHARDS.set_function(lambda: len(self.owned_shards))
         
     def setup_logging(self):
         """Configure logging"""
@@ -32,60 +199,37 @@ class GPUScheduler:
         )
         self.logger = logging.getLogger(__name__)
         
-    def setup_kubernetes_client(self):
-        """Setup Kubernetes API client"""
+    def setup_kubernetes_client(self, qps: float = 50, burst: int = 100, pool_size: int = 64,
+                                connect_timeout: float = 5, request_timeout: float = 30):
+        """
+        Setup Kubernetes API client
+
+        Every API object shares one pooled client whose requests are limited
+        to `qps` per second with bursts of `burst`, like client-go's.
+        """
         try:
             # Try to load in-cluster config first
-            config.load_incluster_config()
+            load_incluster_config()
             self.logger.info("Loaded in-cluster Kubernetes config")
-        except config.ConfigException:
-            # Fall back to kubeconfig
+        except ConfigException:
+            # Fall back to kubeconfig, imported only when needed
             try:
-                config.load_kube_config()
+                from kubernetes.config.kube_config import load_kube_config
+                load_kube_config()
                 self.logger.info("Loaded kubeconfig")
-            except config.ConfigException as e:
+            except ConfigException as e:
                 self.logger.error(f"Could not load Kubernetes config: {e}")
                 sys.exit(1)
                 
-        self.v1 = client.CoreV1Api()
-        self.logger.info("Kubernetes client initialized")
-        
-    def parse_gpu_scheduling_map(self, annotation_value: str) -> Dict[int, Tuple[str, str]]:
-        """
-        Parse the gpu-scheduling-map annotation
-        
-        Format: "0=node1:0,1\n1=node2:2\n2=node3:0,1,2"
-        Returns: {0: ("node1", "0,1"), 1: ("node2", "2"), 2: ("node3", "0,1,2")}
-        """
-        scheduling_map = {}
-        
-        try:
-            lines = annotation_value.strip().split('\n')
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                # Parse format: "0=node1:0,1"
-                if '=' not in line:
-                    continue
-                    
-                pod_index_str, node_gpu_str = line.split('=', 1)
-                pod_index = int(pod_index_str.strip())
-                
-                if ':' not in node_gpu_str:
-                    continue
-                    
-                node_name, gpu_devices = node_gpu_str.split(':', 1)
-                node_name = node_name.strip()
-                gpu_devices = gpu_devices.strip()
-                
-                scheduling_map[pod_index] = (node_name, gpu_devices)
-                
-        except Exception as e:
-            self.logger.error(f"Error parsing GPU scheduling map: {e}")
-            
-        return scheduling_map
+        api_client = create_api_client(pool_size=pool_size, qps=qps, burst=burst, connect_timeout=connect_timeout,
+                                       request_timeout=request_timeout)
+        self.v1 = client.CoreV1Api(api_client)
+        # Lease renewals get their own unthrottled client, so a burst of binds
+        # can never hold them back long enough to lose the lease
+        self.lease_api_client = create_api_client(pool_size=2, qps=0, connect_timeout=connect_timeout,
+                                                  request_timeout=request_timeout)
+        self.logger.info(f"Kubernetes client initialized (pool size {pool_size}, "
+                         f"QPS {qps if qps > 0 else 'unlimited'}, burst {burst})")
         
     def get_pod_index(self, pod_name: str) -> Optional[int]:
         """
@@ -106,23 +250,34 @@ class GPUScheduler:
     def get_actual_node_name(self, logical_node_name: str) -> Optional[str]:
         """
         Map logical node name (e.g., 'node1') to actual Kubernetes node name.
-        Uses node labels to find the mapping.
+        Uses the node cache's gpu-node-name label index, falling back to
+        listing nodes until the cache has synced.
         """
+        if self.node_cache.has_synced():
+            with NODE_LOOKUP_SECONDS.time():
+                actual_node_name = self.node_cache.lookup(logical_node_name)
+            if not actual_node_name:
+                self.logger.warning(f"No node found with gpu-node-name label: {logical_node_name}")
+            return actual_node_name
+
+        with NODE_LOOKUP_SECONDS.time():
+            return self.list_actual_node_name(logical_node_name)
+
+    def list_actual_node_name(self, logical_node_name: str) -> Optional[str]:
+        """Look up the actual node name by listing all nodes"""
         try:
-            self.logger.info(f"Looking up actual node name for logical node: {logical_node_name}")
+            self.logger.debug(f"Looking up actual node name for logical node: {logical_node_name}")
             
             # Get all nodes
             nodes = self.v1.list_node()
-            self.logger.info(f"Found {len(nodes.items)} nodes in cluster")
+            self.logger.debug(f"Found {len(nodes.items)} nodes in cluster")
             
             # Look for node with matching gpu-node-name label
             for node in nodes.items:
                 node_labels = node.metadata.labels or {}
                 gpu_node_name = node_labels.get('gpu-node-name')
-                self.logger.info(f"Node {node.metadata.name} has gpu-node-name label: {gpu_node_name}")
-                
                 if gpu_node_name == logical_node_name:
-                    self.logger.info(f"Found matching node: {node.metadata.name} for logical name {logical_node_name}")
+                    self.logger.debug(f"Found matching node: {node.metadata.name} for logical name {logical_node_name}")
                     return node.metadata.name
                     
             self.logger.warning(f"No node found with gpu-node-name label: {logical_node_name}")
@@ -153,61 +308,607 @@ class GPUScheduler:
             )
             
             # Bind the pod to the node
-            self.v1.create_namespaced_binding(
-                namespace=namespace,
-                body=binding
-            )
+            with BIND_API_SECONDS.time():
+                self.v1.create_namespaced_binding(
+                    namespace=namespace,
+                    body=binding
+                )
             
-            self.logger.info(f"Successfully scheduled pod {pod_name} to node {node_name} (GPU devices: {cuda_devices})")
+            self.logger.info(f"Successfully scheduled pod {pod_name} to node {node_name} (GPU devices: {cuda_devices})",
+                             extra={'pod': pod_name, 'namespace': namespace, 'node': node_name,
+                                    'devices': cuda_devices})
             return True
             
         except ApiException as e:
             self.logger.error(f"Error scheduling pod {pod_name}: {e}")
             return False
             
-    def process_pod(self, pod: client.V1Pod):
-        """Process a pod for GPU scheduling"""
-        pod_name = pod.metadata.name
-        namespace = pod.metadata.namespace
-        
-        # Check if pod has GPU scheduling annotation
-        if not pod.metadata.annotations:
-            return
-            
-        gpu_map_annotation = pod.metadata.annotations.get("gpu-scheduling-map")
+    def get_map_annotation(self, pod: client.V1Pod) -> Optional[str]:
+        """A pod's gpu-scheduling-map, read from the ConfigMap its annotation references if it does"""
+        gpu_map_annotation = (pod.metadata.annotations or {}).get("gpu-scheduling-map")
         if not gpu_map_annotation:
-            return
-            
-        self.logger.info(f"Processing pod {pod_name} with GPU scheduling annotation")
+            return None
+        return self.map_configmaps.resolve(pod.metadata.namespace, gpu_map_annotation)
         
-        # Parse the scheduling map
-        scheduling_map = self.parse_gpu_scheduling_map(gpu_map_annotation)
+    def get_map_assignment(self, pod_name: str, gpu_map_annotation: str, warn: bool = True) -> Optional[Tuple[str, str]]:
+        """Look up a pod's (logical node, devices) in its gpu-scheduling-map annotation"""
+        log = self.logger.warning if warn else self.logger.debug
+        
+        # Parse the scheduling map (compiled once per distinct annotation)
+        scheduling_map = compile_scheduling_map(gpu_map_annotation)
         if not scheduling_map:
-            self.logger.warning(f"No valid scheduling map found for pod {pod_name}")
-            return
+            log(f"No valid scheduling map found for pod {pod_name}")
+            return None
             
         # Get pod index
         pod_index = self.get_pod_index(pod_name)
         if pod_index is None:
-            self.logger.warning(f"Could not determine pod index for {pod_name}")
-            return
+            log(f"Could not determine pod index for {pod_name}")
+            return None
             
         # Find scheduling assignment
-        if pod_index not in scheduling_map:
-            self.logger.warning(f"No scheduling assignment found for pod index {pod_index}")
+        assignment = scheduling_map.get(pod_index)
+        if assignment is None:
+            log(f"No scheduling assignment found for pod index {pod_index}")
+        return assignment
+        
+    def has_recent_event(self) -> bool:
+        """Whether the pod watch delivered an event within ready_max_event_age seconds"""
+        return time.monotonic() - self.last_event_time <= self.ready_max_event_age
+        
+    def is_leader(self) -> bool:
+        """Whether this replica may bind pods"""
+        return self.elector is None or self.elector.is_leader()
+        
+    def owns_pod(self, pod: client.V1Pod) -> bool:
+        """Whether this instance schedules a pod: always, unless sharded"""
+        return self.sharding is None or pod_shard(pod, self.shard_count, self.shard_by) in self.owned_shards
+        
+    def on_shards_changed(self, owned: Set[int]):
+        """Switch the pod watch to a new set of owned shards"""
+        RESHARDS.inc()
+        self.owned_shards = owned
+        self.pod_label_selector = shard_selector(owned)
+        # The watch loop relists with the new selector; pods of shards we lost are dropped there
+        self.reshard.set()
+        
+    def pod_selectors(self) -> dict:
+        """Selectors for listing and watching the pods this instance handles"""
+        selectors = {'field_selector': self.pod_field_selector}
+        if self.pod_label_selector:
+            selectors['label_selector'] = self.pod_label_selector
+        return selectors
+        
+    def on_started_leading(self):
+        """Queue every pending pod collected while on standby"""
+        # Flushing may block on a full queue, so keep it off the lease renewal thread
+        threading.Thread(target=self.enqueue_pending_pods, name="pending-flush", daemon=True).start()
+        
+    def on_stopped_leading(self):
+        """Log the step-down; bind workers drop queued pods while on standby"""
+        self.logger.warning("Lost scheduler leadership, continuing as warm standby")
+        
+    def enqueue_pending_pods(self):
+        """Queue all pending pods for binding"""
+        with self.pending_lock:
+            pods = list(self.pending_pods.values())
+        self.logger.info(f"Became leader, queueing {len(pods)} pending pods")
+        for pod in pods:
+            if not self.is_leader():
+                return
+            self.enqueue_pod(pod)
+            
+    def add_pending_pod(self, pod: client.V1Pod, enqueue: bool = True):
+        """Remember an unbound pod and queue it if we are the leader"""
+        with self.pending_lock:
+            self.pending_pods[pod.metadata.uid] = pod
+            self.pending_since.setdefault(pod.metadata.uid, time.monotonic())
+        if enqueue and self.is_leader():
+            self.enqueue_pod(pod)
+            
+    def remove_pending_pod(self, pod: client.V1Pod):
+        """Forget a pod that was bound or deleted"""
+        with self.pending_lock:
+            self.pending_pods.pop(pod.metadata.uid, None)
+            self.pending_since.pop(pod.metadata.uid, None)
+            self.queued_uids.discard(pod.metadata.uid)
+            self.gang_stragglers.discard(pod.metadata.uid)
+        self.queue.discard(pod.metadata.uid)
+            
+    def process_pod(self, pod: client.V1Pod):
+        """Process a pod for GPU scheduling"""
+        annotations = pod.metadata.annotations or {}
+        
+        # Gang members are held until their whole group can be placed
+        if annotations.get(GANG_ANNOTATION):
+            with self.pending_lock:
+                straggler = pod.metadata.uid in self.gang_stragglers
+            if not straggler:
+                self.gangs.add(pod)
+                return
+            
+        if not annotations.get("gpu-scheduling-map") and not annotations.get(GPU_COUNT_ANNOTATION):
+            SKIPPED_PODS.inc()
+            return
+            
+        try:
+            reservation = self.reserve_pod(pod)
+        except UnschedulablePod as e:
+            # Only an update of the pod queues it again
+            self.logger.error(f"Not scheduling pod {pod.metadata.name}: {e}")
+            SKIPPED_PODS.inc()
+            self.queue.forget(pod.metadata.uid)
+            return
+        if reservation is not None and self.bind_reserved_pod(pod, *reservation):
+            self.queue.forget(pod.metadata.uid)
+            return
+        # A missing node, taken devices and API errors can clear up
+        self.retry_pod(pod)
+        
+    def retry_pod(self, pod: client.V1Pod):
+        """Queue a pod that could not be placed or bound for another attempt after a backoff"""
+        with self.pending_lock:
+            pending = pod.metadata.uid in self.pending_pods
+        if not pending:
+            # Bound or deleted meanwhile
             return
             
-        logical_node_name, cuda_devices = scheduling_map[pod_index]
+        delay = self.queue.add_rate_limited(pod.metadata.uid, pod)
+        if delay is not None:
+            RETRIES.inc()
+            RETRY_DELAY_SECONDS.observe(delay)
+            self.logger.info(f"Retrying pod {pod.metadata.name} in {delay:.1f}s "
+                             f"(attempt {self.queue.rate_limiter.failures(pod.metadata.uid) + 1})")
+            
+    def release_gang(self, pods: List[client.V1Pod]):
+        """Retry the members of a gang that timed out, so they rejoin it after a backoff"""
+        for pod in pods:
+            with self.pending_lock:
+                self.queued_uids.discard(pod.metadata.uid)
+            self.retry_pod(pod)
+            
+    def reserve_pod(self, pod: client.V1Pod) -> Optional[Tuple[str, str]]:
+        """
+        Resolve a pod's node and GPU devices and reserve the devices in the ledger
+
+        Returns (actual node name, GPU devices), or None if the pod has no GPU
+        scheduling annotation or cannot be placed now. Raises UnschedulablePod
+        if its annotations name no assignment at all.
+        """
+        pod_name = pod.metadata.name
+        
+        # Check if pod has GPU scheduling annotation
+        annotations = pod.metadata.annotations or {}
+        gpu_map_annotation = self.get_map_annotation(pod)
+        gpu_count = annotations.get(GPU_COUNT_ANNOTATION)
+        if not gpu_map_annotation and not gpu_count:
+            return None
+            
+        self.logger.info(f"Processing pod {pod_name} with GPU scheduling annotation")
+        
+        # Explicit map entries win; pods requesting a GPU count are placed automatically otherwise
+        assignment = None
+        if gpu_map_annotation:
+            assignment = self.get_map_assignment(pod_name, gpu_map_annotation, warn=not gpu_count)
+        if assignment is None:
+            if gpu_count:
+                return self.auto_place_pod(pod, gpu_count)
+            raise UnschedulablePod("its gpu-scheduling-map has no usable entry for it")
+            
+        logical_node_name, cuda_devices = assignment
         
         # Map logical node name to actual Kubernetes node name
         actual_node_name = self.get_actual_node_name(logical_node_name)
         if not actual_node_name:
             self.logger.error(f"Could not map logical node name '{logical_node_name}' to actual node")
-            return
+            return None
+            
+        # Reserve the devices so no other pod can be bound to them
+        device_mask = parse_device_mask(cuda_devices)
+        if device_mask is not None and not self.ledger.allocate(pod.metadata.uid, actual_node_name, device_mask, pod_name):
+            conflict = format_device_mask(self.ledger.conflicts(actual_node_name, device_mask))
+            holders = ', '.join(self.ledger.holders(actual_node_name, device_mask))
+            self.logger.error(f"GPU devices {conflict} on node {actual_node_name} are already allocated to "
+                              f"{holders}; not scheduling pod {pod_name}")
+            return None
+            
+        return actual_node_name, cuda_devices
+        
+    def auto_place_pod(self, pod: client.V1Pod, gpu_count_value: str) -> Optional[Tuple[str, str]]:
+        """Choose and reserve a node and devices for a pod requesting a GPU count"""
+        pod_name = pod.metadata.name
+        
+        gpu_count = int(gpu_count_value) if str(gpu_count_value).isdigit() else 0
+        if gpu_count < 1:
+            raise UnschedulablePod(f"invalid {GPU_COUNT_ANNOTATION} annotation '{gpu_count_value}'")
+            
+        nodes = self.node_cache.gpu_nodes()
+        candidates = [nodes]
+        if self.sharding:
+            # Shard members try their own nodes first so instances rarely pick
+            # devices on the same node, then the rest of the cluster: the ledger
+            # holds every bound pod, so a member whose nodes are full still
+            # places pods other members' nodes have room for
+            owned = [node for node in nodes if self.sharding.owns_node(node[0])]
+            candidates = [owned, [node for node in nodes if not self.sharding.owns_node(node[0])]]
+            
+        with self.placement_lock:
+            placement = None
+            for candidate_nodes in candidates:
+                placement = choose_placement(candidate_nodes, self.ledger, gpu_count, self.placement_strategy)
+                if placement is not None:
+                    break
+            if placement is None:
+                self.logger.warning(f"No node has {gpu_count} free GPU devices for pod {pod_name}")
+                return None
+            node_name, device_mask = placement
+            self.ledger.allocate(pod.metadata.uid, node_name, device_mask, pod_name)
+            
+        cuda_devices = format_device_mask(device_mask)
+        self.logger.info(f"Placed pod {pod_name} on node {node_name} (GPU devices: {cuda_devices}, "
+                         f"strategy: {self.placement_strategy})")
+        return node_name, cuda_devices
+        
+    def bind_reserved_pod(self, pod: client.V1Pod, node_name: str, cuda_devices: str) -> bool:
+        """Bind a pod whose devices are reserved, releasing them if binding fails"""
+        pod_name = pod.metadata.name
+        namespace = pod.metadata.namespace
+        annotations = pod.metadata.annotations or {}
+        
+        # Pods requesting a GPU count have CUDA_VISIBLE_DEVICES pointed at the
+        # assigned-devices annotation by the webhook, so it must be recorded
+        # before the pod is bound and its containers start
+        if GPU_COUNT_ANNOTATION in annotations and \
+                not self.record_assignment(pod_name, namespace, node_name, cuda_devices):
+            self.ledger.release(pod.metadata.uid)
+            BIND_FAILURES.inc()
+            return False
             
         # Schedule the pod (environment variables are handled by webhook)
-        self.schedule_pod(pod_name, namespace, actual_node_name, cuda_devices)
+        if not self.schedule_pod(pod_name, namespace, node_name, cuda_devices):
+            self.ledger.release(pod.metadata.uid)
+            BIND_FAILURES.inc()
+            return False
+            
+        first_seen = self.pending_since.get(pod.metadata.uid)
+        if first_seen is not None:
+            EVENT_TO_BIND_SECONDS.observe(time.monotonic() - first_seen)
+        return True
+        
+    def schedule_gang(self, pods: List[client.V1Pod]) -> bool:
+        """
+        Reserve devices for every member of a gang, then bind them all in parallel
+
+        If any member cannot be placed, every reservation is rolled back and
+        nothing is bound, so the gang never holds part of its GPUs. Members
+        whose bind fails are retried on their own.
+        """
+        if not self.is_leader():
+            return False
+            
+        reservations = []
+        for pod in pods:
+            try:
+                reservation = self.reserve_pod(pod)
+            except UnschedulablePod as e:
+                self.logger.error(f"Not scheduling gang member {pod.metadata.name}: {e}")
+                reservation = None
+            if reservation is None:
+                for reserved_pod, _ in reservations:
+                    self.ledger.release(reserved_pod.metadata.uid)
+                return False
+            reservations.append((pod, reservation))
+            
+        with ThreadPoolExecutor(max_workers=min(len(reservations), MAX_GANG_BIND_CONCURRENCY)) as executor:
+            results = list(executor.map(lambda entry: self.bind_reserved_pod(entry[0], *entry[1]), reservations))
+            
+        # Members released by an earlier timeout may still be waiting to be retried
+        for (pod, _), bound in zip(reservations, results):
+            if bound:
+                self.queue.discard(pod.metadata.uid)
+                
+        if not all(results):
+            self.logger.error(f"Bound {sum(results)} of {len(results)} gang members; retrying the others on their own")
+            # Their gang is gone, so they are bound like single pods; binding
+            # already released their reserved devices
+            for (pod, _), bound in zip(reservations, results):
+                if not bound:
+                    with self.pending_lock:
+                        self.queued_uids.discard(pod.metadata.uid)
+                        self.gang_stragglers.add(pod.metadata.uid)
+                    self.retry_pod(pod)
+        return True
+        
+    def record_assignment(self, pod_name: str, namespace: str, node_name: str, cuda_devices: str) -> bool:
+        """Record an automatic placement in the pod's annotations"""
+        try:
+            self.v1.patch_namespaced_pod(
+                name=pod_name,
+                namespace=namespace,
+                body={'metadata': {'annotations': {
+                    ASSIGNED_NODE_ANNOTATION: node_name,
+                    ASSIGNED_DEVICES_ANNOTATION: cuda_devices
+                }}}
+            )
+            return True
+            
+        except ApiException as e:
+            self.logger.error(f"Error recording GPU assignment for pod {pod_name}: {e}")
+            return False
+            
+    def get_bound_devices(self, pod: client.V1Pod) -> Optional[str]:
+        """Return the GPU devices a bound pod was scheduled with"""
+        annotations = pod.metadata.annotations or {}
+        if ASSIGNED_DEVICES_ANNOTATION in annotations:
+            return annotations[ASSIGNED_DEVICES_ANNOTATION]
+            
+        gpu_map_annotation = self.get_map_annotation(pod)
+        pod_index = self.get_pod_index(pod.metadata.name)
+        if not gpu_map_annotation or pod_index is None:
+            return None
+            
+        assignment = compile_scheduling_map(gpu_map_annotation).get(pod_index)
+        return assignment[1] if assignment else None
+        
+    def track_bound_pod(self, pod: client.V1Pod):
+        """Record the devices held by a pod that is already bound to a node"""
+        cuda_devices = self.get_bound_devices(pod)
+        if cuda_devices is None:
+            return
+            
+        device_mask = parse_device_mask(cuda_devices)
+        if device_mask is None:
+            return
+            
+        node_name = pod.spec.node_name
+        if not self.ledger.allocate(pod.metadata.uid, node_name, device_mask, pod.metadata.name):
+            holders = ', '.join(self.ledger.holders(node_name, device_mask))
+            self.logger.warning(f"Pod {pod.metadata.name} is bound to node {node_name} with GPU devices "
+                                f"{cuda_devices} also allocated to {holders}")
+        
+    def bind_worker(self):
+        """Take pods off the scheduling queue and bind them until shutdown"""
+        if not self.node_cache.wait_for_sync(timeout=NODE_SYNC_TIMEOUT):
+            self.logger.warning("Node cache not synced yet, falling back to node listing")
+            
+        while True:
+            entry = self.queue.get()
+            if entry is None:
+                return
+                
+            uid, pod = entry
+            # A retried pod may have been updated while it waited
+            pod = self.pending_pods.get(uid, pod)
+            try:
+                # A replica that lost the lease or the pod's shard leaves it to the new owner
+                if self.is_leader() and self.owns_pod(pod):
+                    self.process_pod(pod)
+            except Exception as e:
+                self.logger.error(f"Unexpected error processing pod {pod.metadata.name}: {e}")
+            finally:
+                self.queue.done(uid)
+                
+    def start_workers(self):
+        """Start the pool of bind workers"""
+        for i in range(self.bind_workers):
+            worker = threading.Thread(target=self.bind_worker, name=f"bind-worker-{i}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+        self.logger.info(f"Started {self.bind_workers} bind workers (queue depth {self.queue.maxsize})")
+        
+    def enqueue_pod(self, pod: client.V1Pod):
+        """Queue a pod for binding, blocking while the queue is full"""
+        if len(self.queue) >= self.queue.maxsize:
+            self.logger.warning(f"Scheduling queue full ({self.queue.maxsize}), applying backpressure to watch")
+        if not self.queue.add(pod.metadata.uid, pod):
+            self.logger.debug(f"Pod {pod.metadata.name} already queued")
+        with self.pending_lock:
+            if pod.metadata.uid in self.pending_pods:
+                self.queued_uids.add(pod.metadata.uid)
+            
+    def relist_pods(self):
+        """
+        List our pods, queue pending ones, rebuild the device ledger and
+        resume watching from the list's resourceVersion
+        """
+        pods = self.v1.list_pod_for_all_namespaces(**self.pod_selectors())
+        self.logger.info(f"Listed {len(pods.items)} pods (resourceVersion {pods.metadata.resource_version})")
+        
+        active_uids = set()
+        pending = []
+        for pod in pods.items:
+            if self.is_finished(pod):
+                continue
+            active_uids.add(pod.metadata.uid)
+            if pod.spec.node_name:
+                self.track_bound_pod(pod)
+            else:
+                pending.append(pod)
+                
+        now = time.monotonic()
+        with self.pending_lock:
+            self.pending_pods = {pod.metadata.uid: pod for pod in pending}
+            self.pending_since = {uid: self.pending_since.get(uid, now) for uid in self.pending_pods}
+            self.queued_uids &= self.pending_pods.keys()
+            self.gang_stragglers &= self.pending_pods.keys()
+        if self.is_leader():
+            for pod in pending:
+                self.enqueue_pod(pod)
+                
+        # Free devices held by pods that disappeared while we were not watching;
+        # sharded instances only list their own shards and leave this to relist_bound_pods
+        if not self.sharding:
+            self.ledger.retain(active_uids)
+        self.resource_version = pods.metadata.resource_version
+        self.last_event_time = time.monotonic()
+        
+    @staticmethod
+    def is_finished(pod: client.V1Pod) -> bool:
+        """Whether a pod has terminated and no longer holds its devices"""
+        return bool(pod.status and pod.status.phase in ('Succeeded', 'Failed'))
+        
+    def resync_pods(self) -> int:
+        """
+        Sweep our pending pods page by page and queue the ones the watch missed
+
+        A pod was missed if it is not known as pending or, on the leader, is
+        not handed to the scheduling queue: never queued, or released by the
+        gang coordinator when its gang timed out. Only one page is held at a
+        time.
+        Known pending pods that were not listed are gone and are forgotten.
+        Returns the number of missed pods.
+        """
+        started = time.monotonic()
+        leader = self.is_leader()
+        listed: Set[str] = set()
+        missed = 0
+        continue_token = None
         
+        while True:
+            page = self.v1.list_pod_for_all_namespaces(field_selector=self.pending_field_selector,
+                                                       limit=self.resync_page_size, _continue=continue_token)
+            for pod in page.items:
+                if pod.spec.node_name or self.is_finished(pod) or not self.owns_pod(pod):
+                    continue
+                uid = pod.metadata.uid
+                listed.add(uid)
+                with self.pending_lock:
+                    known = uid in self.pending_pods and (not leader or uid in self.queued_uids)
+                if not known:
+                    missed += 1
+                    self.logger.info(f"Resync found missed pending pod {pod.metadata.name}")
+                    self.add_pending_pod(pod)
+            continue_token = page.metadata._continue
+            if not continue_token:
+                break
+                
+        with self.pending_lock:
+            gone = [pod for uid, pod in self.pending_pods.items()
+                    if uid not in listed and self.pending_since.get(uid, started) < started]
+        for pod in gone:
+            self.remove_pending_pod(pod)
+            
+        RESYNC_MISSED_PODS.inc(missed)
+        self.logger.info(f"Resync listed {len(listed)} pending pods: {missed} missed, {len(gone)} gone")
+        return missed
+        
+    def resync_loop(self):
+        """Run a resync sweep every resync_interval seconds until stopped"""
+        while not self.resync_stopped.wait(self.resync_interval):
+            try:
+                with RESYNC_SECONDS.time():
+                    self.resync_pods()
+            except ApiException as e:
+                # An expired continue token or API error; the next sweep starts over
+                self.logger.warning(f"Resync sweep failed: {e}")
+            except Exception as e:
+                self.logger.error(f"Unexpected resync error: {e}")
+                
+    def relist_bound_pods(self):
+        """List every bound pod of ours across all shards and rebuild the device ledger"""
+        pods = self.v1.list_pod_for_all_namespaces(field_selector=self.bound_field_selector)
+        active_uids = set()
+        for pod in pods.items:
+            if not self.is_finished(pod):
+                active_uids.add(pod.metadata.uid)
+                self.track_bound_pod(pod)
+                
+        # Keep reservations of our own pending pods that are being bound
+        with self.pending_lock:
+            active_uids.update(self.pending_pods)
+        self.ledger.retain(active_uids)
+        self.bound_resource_version = pods.metadata.resource_version
+        
+    @staticmethod
+    def ledger_view(raw: dict) -> client.V1Pod:
+        """A pod with just the fields the device ledger reads, built without full deserialization"""
+        metadata = raw.get('metadata', {})
+        return client.V1Pod(
+            metadata=client.V1ObjectMeta(name=metadata.get('name'), namespace=metadata.get('namespace'),
+                                         uid=metadata.get('uid'), annotations=metadata.get('annotations'),
+                                         resource_version=metadata.get('resourceVersion')),
+            spec=client.V1PodSpec(containers=[], node_name=raw.get('spec', {}).get('nodeName')),
+            status=client.V1PodStatus(phase=raw.get('status', {}).get('phase'))
+        )
+        
+    def handle_bound_pod_event(self, event: dict):
+        """Apply a bound pod watch event, carrying the raw pod, to the device ledger"""
+        metadata = event['raw_object'].get('metadata', {})
+        self.bound_resource_version = metadata.get('resourceVersion', self.bound_resource_version)
+        if event['type'] == 'BOOKMARK':
+            return
+            
+        pod = self.ledger_view(event['raw_object'])
+        if event['type'] == 'DELETED' or self.is_finished(pod):
+            self.ledger.release(pod.metadata.uid)
+        else:
+            self.track_bound_pod(pod)
+            
+    def watch_bound_pods(self):
+        """Keep the device ledger current with pods bound by every shard member"""
+        # Every member sees every bind here, so events are left as raw JSON:
+        # deserializing full pod models would cost each member more than its own shards do
+        list_raw_pods = lambda **kwargs: self.v1.list_pod_for_all_namespaces(**kwargs)
+        retry_count = 0
+        while True:
+            w = watch.Watch()
+            try:
+                if self.bound_resource_version is None:
+                    self.relist_bound_pods()
+                for event in w.stream(
+                    list_raw_pods,
+                    field_selector=self.bound_field_selector,
+                    resource_version=self.bound_resource_version,
+                    allow_watch_bookmarks=True,
+                    timeout_seconds=POD_WATCH_TIMEOUT
+                ):
+                    self.handle_bound_pod_event(event)
+                retry_count = 0
+                
+            except ApiException as e:
+                if e.status == 410:
+                    self.bound_resource_version = None
+                    continue
+                self.logger.error(f"Bound pod watch API error: {e}")
+                retry_count += 1
+                
+            except Exception as e:
+                self.logger.error(f"Unexpected bound pod watch error: {e}")
+                retry_count += 1
+                
+            finally:
+                w.stop()
+                
+            if retry_count:
+                time.sleep(min(2 ** retry_count, 60) + random.uniform(0, 1))
+                
+    def handle_pod_event(self, event: dict):
+        """Apply a pod watch event and track the watch's resourceVersion"""
+        event_type = event['type']
+        self.last_event_time = time.monotonic()
+        
+        if event_type == 'BOOKMARK':
+            metadata = event['raw_object'].get('metadata', {})
+            self.resource_version = metadata.get('resourceVersion', self.resource_version)
+            return
+            
+        pod = event['object']
+        self.resource_version = pod.metadata.resource_version
+        
+        if event_type == 'DELETED' or self.is_finished(pod):
+            self.remove_pending_pod(pod)
+            self.ledger.release(pod.metadata.uid)
+            self.gangs.discard(pod)
+        elif pod.spec.node_name:
+            self.remove_pending_pod(pod)
+            self.track_bound_pod(pod)
+        elif event_type == 'ADDED':
+            self.logger.info(f"New pod to schedule: {pod.metadata.name}")
+            self.add_pending_pod(pod)
+        else:
+            # Keep the standby copy current without requeueing
+            self.add_pending_pod(pod, enqueue=False)
+            
     def run(self):
         """Main scheduler loop"""
         self.logger.info(f"Starting GPU scheduler: {self.scheduler_name}")
@@ -216,6 +917,29 @@ class GPUScheduler:
         # Start health server in background
         self.health_server.start_background()
         
+        # Nodes and pods are listed concurrently; bind workers hold off
+        # until the node cache syncs so the first binds use the cache
+        self.node_cache.start()
+        self.map_configmaps.start()
+        
+        # Bind workers take pods off the queue so API calls never stall the watch
+        self.start_workers()
+        self.gangs.start()
+        
+        # Catch pending pods the watch missed, such as during a watch gap
+        if self.resync_interval > 0:
+            threading.Thread(target=self.resync_loop, name="pod-resync", daemon=True).start()
+        
+        # Standbys keep watching so their caches are warm when they take over
+        if self.elector:
+            self.elector.start()
+            
+        # Shard members learn their shards before the first list
+        if self.sharding:
+            self.sharding.start()
+            threading.Thread(target=self.watch_bound_pods, name="bound-pod-watch", daemon=True).start()
+        watch_timeout = SHARDED_POD_WATCH_TIMEOUT if self.sharding else POD_WATCH_TIMEOUT
+        
         retry_count = 0
         max_retries = 5
         base_delay = 1.0
@@ -224,32 +948,55 @@ class GPUScheduler:
             w = watch.Watch()
             
             try:
-                self.logger.info(f"Starting watch stream (attempt {retry_count + 1})")
+                if self.reshard.is_set():
+                    self.reshard.clear()
+                    self.resource_version = None
+                    
+                if self.sharding and not self.owned_shards:
+                    # More members than shards: stay idle until shards are rebalanced
+                    self.reshard.wait(watch_timeout)
+                    continue
+                    
+                # Only relist when there is no resourceVersion to resume from
+                if self.resource_version is None:
+                    self.relist_pods()
+                    
+                self.logger.info(f"Starting watch stream from resourceVersion {self.resource_version} "
+                                 f"(attempt {retry_count + 1})")
+                self.watch_connected = True
+                self.last_event_time = time.monotonic()
                 
                 # Watch for pods that need to be scheduled
                 for event in w.stream(
                     self.v1.list_pod_for_all_namespaces,
-                    field_selector=f"spec.schedulerName={self.scheduler_name},spec.nodeName=",
-                    timeout_seconds=3600  # Restart watch every hour as additional safety
+                    resource_version=self.resource_version,
+                    allow_watch_bookmarks=True,
+                    timeout_seconds=watch_timeout,
+                    **self.pod_selectors()
                 ):
-                    event_type = event['type']
-                    pod = event['object']
-                    
-                    if event_type == 'ADDED':
-                        self.logger.info(f"New pod to schedule: {pod.metadata.name}")
-                        self.process_pod(pod)
+                    self.handle_pod_event(event)
                     
                     # Reset retry count on successful event processing
                     retry_count = 0
+                    if self.reshard.is_set():
+                        break
                         
             except KeyboardInterrupt:
                 self.logger.info("Scheduler stopping...")
+                self.resync_stopped.set()
+                if self.elector:
+                    self.elector.release()
+                if self.sharding:
+                    self.sharding.release()
+                self.queue.shutdown()
                 break
                 
             except ApiException as e:
                 if e.status == 410:  # Resource version expired
                     self.logger.warning(f"Watch stream expired (resource version too old): {e}")
-                    self.logger.info("Restarting watch stream with fresh resource version...")
+                    self.logger.info("Relisting pods for a fresh resource version...")
+                    self.resource_version = None
+                    WATCH_EXPIRED.inc()
                     retry_count = 0  # Don't count 410 errors as retries
                     
                 else:
@@ -279,15 +1026,43 @@ class GPUScheduler:
                 time.sleep(delay)
                 
             finally:
+                self.watch_connected = False
                 w.stop()
                 
-            # Brief pause before restarting watch (for 410 errors)
+            # Brief pause before resuming the watch
             time.sleep(0.1)
 
 
 def main():
     """Main entry point"""
-    scheduler = GPUScheduler()
+    setup_logging_from_env('gpu-scheduler')
+    scheduler = GPUScheduler(
+        scheduler_name=os.environ.get('SCHEDULER_NAME', 'gpu-scheduler'),
+        bind_workers=int(os.environ.get('BIND_WORKERS', '4')),
+        queue_depth=int(os.environ.get('SCHEDULING_QUEUE_DEPTH', '1000')),
+        placement_strategy=os.environ.get('PLACEMENT_STRATEGY', BINPACK),
+        gang_timeout=float(os.environ.get('GANG_TIMEOUT_SECONDS', '300')),
+        leader_election=os.environ.get('LEADER_ELECTION', 'false').lower() == 'true',
+        lease_namespace=os.environ.get('POD_NAMESPACE', 'default'),
+        identity=os.environ.get('POD_NAME'),
+        debug_endpoints=os.environ.get('DEBUG_ENDPOINTS', 'false').lower() == 'true',
+        ready_max_event_age=float(os.environ.get('READY_MAX_EVENT_AGE_SECONDS', '600')),
+        retry_base_delay=float(os.environ.get('RETRY_BASE_DELAY_SECONDS', '1')),
+        retry_max_delay=float(os.environ.get('RETRY_MAX_DELAY_SECONDS', '60')),
+        retry_qps=float(os.environ.get('RETRY_QPS', '10')),
+        retry_burst=int(os.environ.get('RETRY_BURST', '100')),
+        resync_interval=float(os.environ.get('RESYNC_INTERVAL_SECONDS', '300')),
+        resync_page_size=int(os.environ.get('RESYNC_PAGE_SIZE', '500')),
+        shard_count=int(os.environ.get('SHARD_COUNT', '0')),
+        shard_by=os.environ.get('SHARD_BY', SHARD_BY_NAMESPACE),
+        api_qps=float(os.environ.get('API_QPS', '50')),
+        api_burst=int(os.environ.get('API_BURST', '100')),
+        api_pool_size=int(os.environ.get('API_POOL_SIZE', '64')),
+        api_connect_timeout=float(os.environ.get('API_CONNECT_TIMEOUT_SECONDS', '5')),
+        api_request_timeout=float(os.environ.get('API_REQUEST_TIMEOUT_SECONDS', '30'))
+    )
+    # Stop like on Ctrl-C so a leader releases its lease on pod termination
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
     scheduler.run()
 
 
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Shared parser for the gpu-scheduling-map annotation
+
+Annotations are compiled once into an immutable, ordinal-indexed map and kept
+in a bounded LRU keyed by the annotation's hash, so every replica of a
+StatefulSet reuses the same compiled map in both the scheduler and the webhook.
+Range lines ("0-63=node[1-8]:0-7") are kept as rules and expanded per lookup,
+so their size and parse cost do not grow with the number of replicas.
+"""
+
+import bisect
+import hashlib
+import heapq
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from metrics import FAST_BUCKETS, Histogram
+
+
+# Pod annotation requesting automatic placement of this many GPUs
+GPU_COUNT_ANNOTATION = 'gpu-count'
+
+# Annotations recording an automatic placement, set by the scheduler before binding
+ASSIGNED_NODE_ANNOTATION = 'gpu-assigned-node'
+ASSIGNED_DEVICES_ANNOTATION = 'gpu-assigned-devices'
+
+# Annotations grouping pods that must be placed together, and the group's size
+GANG_ANNOTATION = 'gpu-gang'
+GANG_SIZE_ANNOTATION = 'gpu-gang-size'
+
+# Maximum number of distinct compiled maps kept in memory
+MAX_CACHED_MAPS = 256
+
+# Ordinal tables sparser than this fall back to a dict instead of a dense array
+DENSE_SLACK = 1024
+
+MAP_PARSE_SECONDS = Histogram('gpu_scheduling_map_parse_seconds',
+                              'Time to compile a gpu-scheduling-map annotation not found in the cache',
+                              buckets=FAST_BUCKETS)
+
+
+class SchedulingMapError(NamedTuple):
+    """A single annotation line that could not be parsed"""
+    line_number: int
+    line: str
+    reason: str
+
+
+# "node[1-8]" or "gpu-[01-16].rack1": a node name with one numeric range in brackets
+NODE_RANGE_PATTERN = re.compile(r'^([^\[\]]*)\[(\d+)-(\d+)\]([^\[\]]*)$')
+
+
+class MapRange(NamedTuple):
+    """
+    A range line: ordinals first..last spread in order over a node range
+
+    Each node's devices are split into equal slots of `per_pod` devices and
+    ordinals fill the slots of one node before moving to the next, so
+    "0-15=node[1-8]:0-7" gives ordinals 0 and 1 devices 0-3 and 4-7 on node1,
+    ordinals 2 and 3 the same devices on node2, and so on.
+    """
+    first: int
+    last: int
+    node_prefix: str
+    node_suffix: str
+    # First node number and its zero-padded width, or None for a single named node
+    node_first: Optional[int]
+    node_width: int
+    devices: Tuple[str, ...]
+    per_pod: int
+
+    def assignment(self, ordinal: int) -> Tuple[str, str]:
+        """The (node, devices) of an ordinal within the range"""
+        node_offset, slot = divmod(ordinal - self.first, len(self.devices) // self.per_pod)
+        node = self.node_prefix
+        if self.node_first is not None:
+            node = f"{node}{str(self.node_first + node_offset).zfill(self.node_width)}{self.node_suffix}"
+        return node, ','.join(self.devices[slot * self.per_pod:(slot + 1) * self.per_pod])
+
+
+def parse_int_range(text: str) -> Tuple[int, int]:
+    """Parse "3" or "0-63" into (first, last), raising ValueError if malformed or empty"""
+    first_text, _, last_text = text.strip().partition('-')
+    first = int(first_text)
+    last = int(last_text) if last_text else first
+    if first < 0 or last < first:
+        raise ValueError(f"empty range '{text.strip()}'")
+    return first, last
+
+
+def parse_devices(text: str) -> Tuple[str, ...]:
+    """Expand a device list such as "0-3,6,7" into ("0", "1", "2", "3", "6", "7")"""
+    devices: List[str] = []
+    for part in text.split(','):
+        first, last = parse_int_range(part)
+        devices.extend(str(device) for device in range(first, last + 1))
+    return tuple(devices)
+
+
+def parse_map_range(first: int, last: int, node_text: str, device_text: str) -> MapRange:
+    """Build the rule for a range line, raising ValueError with the reason it is invalid"""
+    match = NODE_RANGE_PATTERN.match(node_text)
+    if match:
+        node_prefix, node_first_text, node_last_text, node_suffix = match.groups()
+        node_first, node_last = int(node_first_text), int(node_last_text)
+        if node_last < node_first:
+            raise ValueError(f"empty node range '{node_text}'")
+        # A zero-padded start ("[01-16]") keeps node numbers at its width
+        node_width = len(node_first_text) if node_first_text.startswith('0') else 0
+        node_count = node_last - node_first + 1
+    elif '[' in node_text or ']' in node_text:
+        raise ValueError(f"invalid node range '{node_text}'")
+    else:
+        node_prefix, node_suffix, node_first, node_width, node_count = node_text, '', None, 0, 1
+
+    try:
+        devices = parse_devices(device_text)
+    except ValueError:
+        raise ValueError(f"invalid device range '{device_text}'") from None
+
+    pods = last - first + 1
+    gpus = node_count * len(devices)
+    per_pod = gpus // pods
+    if not per_pod or gpus % pods or len(devices) % per_pod:
+        raise ValueError(f"{pods} pods do not divide evenly over {node_count} x {len(devices)} GPUs")
+    return MapRange(first, last, node_prefix, node_suffix, node_first, node_width, devices, per_pod)
+
+
+class CompiledSchedulingMap:
+    """
+    Immutable, ordinal-indexed form of a gpu-scheduling-map annotation
+
+    Entries are stored as a dense tuple of (node, devices) indexed by pod
+    ordinal, so lookups are a single index operation. Range lines are kept
+    as MapRange rules sorted by first ordinal and found by bisection; a
+    single-ordinal line inside a range overrides the range for that ordinal.
+    """
+
+    __slots__ = ('_dense', '_sparse', '_ranges', '_range_starts', '_count', 'errors')
+
+    def __init__(self, assignments: Dict[int, Tuple[str, str]], errors: Tuple[SchedulingMapError, ...] = (),
+                 ranges: Tuple[MapRange, ...] = ()):
+        self._ranges = tuple(sorted(ranges))
+        self._range_starts = tuple(rule.first for rule in self._ranges)
+        self._dense: Tuple[Optional[Tuple[str, str]], ...] = ()
+        self._sparse: Optional[Dict[int, Tuple[str, str]]] = None
+        self.errors = errors
+
+        covered = sum(1 for ordinal in assignments if self._range_for(ordinal) is not None)
+        self._count = len(assignments) - covered + sum(rule.last - rule.first + 1 for rule in self._ranges)
+
+        max_ordinal = max(assignments, default=-1)
+        if max_ordinal < 2 * len(assignments) + DENSE_SLACK:
+            dense = [None] * (max_ordinal + 1)
+            for ordinal, entry in assignments.items():
+                dense[ordinal] = entry
+            self._dense = tuple(dense)
+        else:
+            self._sparse = dict(assignments)
+
+    def _range_for(self, ordinal: int) -> Optional[MapRange]:
+        """The range rule covering an ordinal, if any"""
+        position = bisect.bisect_right(self._range_starts, ordinal) - 1
+        if position >= 0 and ordinal <= self._ranges[position].last:
+            return self._ranges[position]
+        return None
+
+    def get(self, ordinal: int) -> Optional[Tuple[str, str]]:
+        """Return the (node, devices) assignment for a pod ordinal"""
+        if self._sparse is not None:
+            entry = self._sparse.get(ordinal)
+        elif 0 <= ordinal < len(self._dense):
+            entry = self._dense[ordinal]
+        else:
+            entry = None
+        if entry is None and self._ranges:
+            rule = self._range_for(ordinal)
+            if rule is not None:
+                return rule.assignment(ordinal)
+        return entry
+
+    def __contains__(self, ordinal: int) -> bool:
+        return self.get(ordinal) is not None
+
+    def __getitem__(self, ordinal: int) -> Tuple[str, str]:
+        entry = self.get(ordinal)
+        if entry is None:
+            raise KeyError(ordinal)
+        return entry
+
+    def __len__(self) -> int:
+        return self._count
+
+    def ranges(self) -> Tuple[MapRange, ...]:
+        """The range rules, sorted by first ordinal"""
+        return self._ranges
+
+    def items(self) -> Iterator[Tuple[int, Tuple[str, str]]]:
+        """Iterate over (ordinal, (node, devices)) in ordinal order, expanding ranges"""
+        if self._sparse is not None:
+            explicit = iter(sorted(self._sparse))
+        else:
+            explicit = (ordinal for ordinal, entry in enumerate(self._dense) if entry is not None)
+        previous = None
+        for ordinal in heapq.merge(explicit, *(range(rule.first, rule.last + 1) for rule in self._ranges)):
+            if ordinal != previous:
+                previous = ordinal
+                yield ordinal, self.get(ordinal)
+
+    def to_dict(self) -> Dict[int, Tuple[str, str]]:
+        """Return the assignments as a plain dict"""
+        return dict(self.items())
+
+
+def parse_scheduling_map(annotation_value: str) -> CompiledSchedulingMap:
+    """
+    Parse a gpu-scheduling-map annotation without caching
+
+    Format: "0=node1:0,1\\n1=node2:2\\n2=node3:0,1,2"
+    Range lines ("0-63=node[1-8]:0-7") spread a range of ordinals over the
+    GPUs of a range of nodes, see MapRange. Lines that cannot be parsed, and
+    ranges overlapping an earlier range, are skipped and reported in `errors`.
+    """
+    assignments = {}
+    ranges: List[MapRange] = []
+    errors = []
+
+    for line_number, raw_line in enumerate(annotation_value.split('\n'), start=1):
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        # Parse format: "0=node1:0,1"
+        if '=' not in line:
+            errors.append(SchedulingMapError(line_number, line, "missing '='"))
+            continue
+
+        pod_index_str, node_gpu_str = line.split('=', 1)
+        pod_index_str = pod_index_str.strip()
+        is_range = '-' in pod_index_str[1:]
+        try:
+            first, last = parse_int_range(pod_index_str) if is_range else (int(pod_index_str), None)
+        except ValueError:
+            errors.append(SchedulingMapError(line_number, line, f"invalid pod index '{pod_index_str}'"))
+            continue
+
+        if first < 0:
+            errors.append(SchedulingMapError(line_number, line, f"negative pod index {first}"))
+            continue
+
+        if ':' not in node_gpu_str:
+            errors.append(SchedulingMapError(line_number, line, "missing ':' between node and GPU devices"))
+            continue
+
+        node_name, gpu_devices = node_gpu_str.split(':', 1)
+        if not is_range:
+            assignments[first] = (node_name.strip(), gpu_devices.strip())
+            continue
+
+        try:
+            rule = parse_map_range(first, last, node_name.strip(), gpu_devices.strip())
+        except ValueError as e:
+            errors.append(SchedulingMapError(line_number, line, str(e)))
+            continue
+        overlapping = next((other for other in ranges if other.first <= last and first <= other.last), None)
+        if overlapping is not None:
+            errors.append(SchedulingMapError(line_number, line,
+                                             f"overlaps range {overlapping.first}-{overlapping.last}"))
+            continue
+        ranges.append(rule)
+
+    return CompiledSchedulingMap(assignments, tuple(errors), tuple(ranges))
+
+
+_cache: 'OrderedDict[bytes, CompiledSchedulingMap]' = OrderedDict()
+_cache_lock = threading.Lock()
+_logger = logging.getLogger(__name__)
+
+
+def compile_scheduling_map(annotation_value: str) -> CompiledSchedulingMap:
+    """
+    Return the compiled map for an annotation, parsing it at most once
+
+    Compiled maps are kept in a bounded LRU keyed by the annotation's hash.
+    Parse errors are logged once, when the annotation is first compiled.
+    """
+    key = hashlib.blake2b(annotation_value.encode(), digest_size=16).digest()
+
+    with _cache_lock:
+        compiled = _cache.get(key)
+        if compiled is not None:
+            _cache.move_to_end(key)
+            return compiled
+
+    with MAP_PARSE_SECONDS.time():
+        compiled = parse_scheduling_map(annotation_value)
+    for error in compiled.errors:
+        _logger.warning(f"gpu-scheduling-map line {error.line_number} ('{error.line}'): {error.reason}")
+
+    with _cache_lock:
+        _cache[key] = compiled
+        if len(_cache) > MAX_CACHED_MAPS:
+            _cache.popitem(last=False)
+
+    return compiled
+
+
+def clear_cache():
+    """Drop all compiled maps"""
+    with _cache_lock:
+        _cache.clear()
+
+
+def cache_size() -> int:
+    """Number of compiled maps currently cached"""
+    return len(_cache)
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Bounded scheduling queue between the pod watch and the bind workers
+"""
+
+import heapq
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+
+class RetryRateLimiter:
+    """
+    Delay before retrying an item: exponential backoff per item, combined
+    with a token bucket shared by all retries
+
+    An item's nth consecutive failure waits base_delay * 2^(n-1), capped at
+    max_delay. The bucket holds `burst` retries and refills at `qps`, so
+    when many items fail together, as in an API server outage, retries are
+    spread out instead of arriving in a burst. A `qps` of 0 or less turns the
+    bucket off, like API_QPS=0 does for API requests.
+    """
+
+    def __init__(self, base_delay: float = 1.0, max_delay: float = 60.0, qps: float = 10.0, burst: int = 100):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.qps = qps
+        self.burst = burst
+        self._failures: Dict[str, int] = {}
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def when(self, key: str) -> float:
+        """Record a failure of `key` and return the seconds to wait before retrying it"""
+        with self._lock:
+            failures = self._failures.get(key, 0) + 1
+            self._failures[key] = failures
+            backoff = min(self.base_delay * 2 ** min(failures - 1, 32), self.max_delay)
+
+            if self.qps <= 0:
+                # No global retry rate limit, as with API_QPS=0
+                return backoff
+
+            # Reserve a token; a negative balance is the wait for tokens already promised
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.qps) - 1
+            self._last = now
+            bucket_delay = -self._tokens / self.qps if self._tokens < 0 else 0.0
+
+            return max(backoff, bucket_delay)
+
+    def forget(self, key: str):
+        """Reset the backoff of `key` after it succeeded or went away"""
+        with self._lock:
+            self._failures.pop(key, None)
+
+    def failures(self, key: str) -> int:
+        with self._lock:
+            return self._failures.get(key, 0)
+
+
+class SchedulingQueue:
+    """
+    Bounded FIFO of pods waiting to be bound, deduplicated by pod UID
+
+    `add` blocks while the queue is full so a burst of pod events applies
+    backpressure to the watch stream instead of growing memory without bound.
+    A UID that is already queued or being processed is not queued twice;
+    a queued entry is refreshed with the newest pod object instead.
+    Items that failed are re-queued with `add_rate_limited`, which holds
+    them back for a delay chosen by the rate limiter without blocking.
+    """
+
+    def __init__(self, maxsize: int = 1000, rate_limiter: Optional[RetryRateLimiter] = None):
+        self.maxsize = maxsize
+        self.rate_limiter = rate_limiter or RetryRateLimiter()
+        self._keys: Deque[str] = deque()
+        self._items: Dict[str, Any] = {}
+        self._processing: Set[str] = set()
+        # Retries waiting out their delay: key -> (ready time, item), and a heap of (ready time, key)
+        self._waiting: Dict[str, Tuple[float, Any]] = {}
+        self._delayed: List[Tuple[float, str]] = []
+        # Retries that became ready while their key was still being processed
+        self._dirty: Dict[str, Any] = {}
+        self._shutdown = False
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+    def add(self, key: str, item: Any, timeout: Optional[float] = None) -> bool:
+        """
+        Queue an item, blocking while the queue is full
+
+        Returns False if the key is already queued, waiting to be retried or
+        being processed, the queue is shut down, or the timeout expired
+        before space was available.
+        """
+        with self._lock:
+            if key in self._items:
+                self._items[key] = item
+                return False
+            if key in self._waiting:
+                # Keep the retry delay; only refresh the pod object
+                self._waiting[key] = (self._waiting[key][0], item)
+                return False
+            if key in self._processing or self._shutdown:
+                return False
+
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while len(self._items) >= self.maxsize and not self._shutdown:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._not_full.wait(remaining)
+
+            # Re-check after waiting: another producer may have queued this key
+            if self._shutdown or key in self._items or key in self._processing:
+                return False
+
+            self._keys.append(key)
+            self._items[key] = item
+            self._not_empty.notify()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Tuple[str, Any]]:
+        """
+        Take the next item and mark it as processing
+
+        Returns None once the queue is shut down and drained, or on timeout.
+        Callers must call `done` with the key when finished.
+        """
+        with self._lock:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                now = time.monotonic()
+                self._promote_ready(now)
+                if self._items:
+                    break
+                if self._shutdown:
+                    return None
+                remaining = None if deadline is None else deadline - now
+                if remaining is not None and remaining <= 0:
+                    return None
+                # Wake up for the next retry that becomes ready
+                if self._delayed:
+                    until_ready = max(self._delayed[0][0] - now, 0.0)
+                    remaining = until_ready if remaining is None else min(remaining, until_ready)
+                self._not_empty.wait(remaining)
+
+            key = self._keys.popleft()
+            while key not in self._items:
+                # Discarded while queued
+                key = self._keys.popleft()
+            item = self._items.pop(key)
+            self._processing.add(key)
+            self._not_full.notify()
+            return key, item
+
+    def done(self, key: str):
+        """Mark a key as no longer being processed"""
+        with self._lock:
+            self._processing.discard(key)
+            if key in self._dirty:
+                self._append(key, self._dirty.pop(key))
+
+    def add_rate_limited(self, key: str, item: Any) -> Optional[float]:
+        """
+        Queue an item for retry once the rate limiter allows it
+
+        Usually called by the worker still processing `key`. Never blocks;
+        returns the delay, or None if the key is already queued or waiting
+        to be retried or the queue is shut down.
+        """
+        with self._lock:
+            if self._shutdown or key in self._items or key in self._waiting or key in self._dirty:
+                return None
+            # Only a retry that is scheduled counts as a failure and takes a token;
+            # the limiter's lock is never held while taking this one
+            delay = self.rate_limiter.when(key)
+            ready_at = time.monotonic() + delay
+            self._waiting[key] = (ready_at, item)
+            heapq.heappush(self._delayed, (ready_at, key))
+            self._not_empty.notify()
+            return delay
+
+    def forget(self, key: str):
+        """Reset the retry backoff of a key that succeeded"""
+        self.rate_limiter.forget(key)
+
+    def discard(self, key: str):
+        """Drop a key that no longer needs processing from the queue and its retries, and reset its backoff"""
+        with self._lock:
+            if key in self._items:
+                # Its entry in _keys is skipped by get
+                del self._items[key]
+                self._not_full.notify()
+            self._waiting.pop(key, None)
+            self._dirty.pop(key, None)
+        self.rate_limiter.forget(key)
+
+    def _append(self, key: str, item: Any):
+        """Queue a retry; the lock must be held. Retries are not subject to maxsize"""
+        if key in self._items:
+            self._items[key] = item
+            return
+        self._keys.append(key)
+        self._items[key] = item
+        self._not_empty.notify()
+
+    def _promote_ready(self, now: float):
+        """Move retries whose delay has passed onto the queue; the lock must be held"""
+        while self._delayed and self._delayed[0][0] <= now:
+            ready_at, key = heapq.heappop(self._delayed)
+            entry = self._waiting.get(key)
+            if entry is None or entry[0] != ready_at:
+                continue  # discarded
+            del self._waiting[key]
+            if key in self._processing:
+                self._dirty[key] = entry[1]
+            else:
+                self._append(key, entry[1])
+
+    def shutdown(self):
+        """Stop accepting items and wake up all waiting producers and workers"""
+        with self._lock:
+            self._shutdown = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def processing(self) -> int:
+        """Number of items currently being processed"""
+        return len(self._processing)
+
+    @property
+    def waiting(self) -> int:
+        """Number of items waiting out a retry delay"""
+        return len(self._waiting) + len(self._dirty)
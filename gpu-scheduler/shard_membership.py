@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Lease-based membership for running sharded scheduler instances side by side
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+
+from leader_election import micro_time
+from sharding import assign_shards, rendezvous_owner
+
+
+# Label on member Leases naming the sharded scheduler they belong to
+MEMBER_LABEL = 'gpu-scheduler-shard-group'
+
+
+class ShardMembership:
+    """
+    Tracks the live instances of a sharded scheduler and the shards this one owns
+
+    Every instance renews its own Lease, labelled with the group name, every
+    `retry_period` seconds and lists the group's Leases. As with leader
+    election, a member is considered gone once its Lease has not changed for
+    `lease_duration` seconds on this instance's clock. Shards are split
+    between live members by rendezvous hashing, so every instance computes
+    the same assignment and a join or leave only moves the shards it
+    affects. `on_change` is called with the new set of owned shards.
+    """
+
+    def __init__(self, coordination_v1, group: str, namespace: str, identity: str, shard_count: int,
+                 on_change: Optional[Callable[[Set[int]], None]] = None,
+                 lease_duration: int = 15, retry_period: float = 2):
+        self.api = coordination_v1
+        self.group = group
+        self.namespace = namespace
+        self.identity = identity
+        self.shard_count = shard_count
+        self.on_change = on_change
+        self.lease_duration = lease_duration
+        self.retry_period = retry_period
+        self.lease_name = f"{group}-shard-{identity}"
+        self.logger = logging.getLogger(__name__)
+
+        # Empty until the first sync, which always reports the initial shards
+        self._members: List[str] = []
+        self._owned: Set[int] = set()
+        self._node_owners: Dict[str, bool] = {}
+        # Lease name -> (last seen (holder, renewTime), when it was first seen)
+        self._observed: Dict[str, Tuple[tuple, float]] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def members(self) -> List[str]:
+        """Identities of the live members, this one included"""
+        return list(self._members)
+
+    def owned_shards(self) -> Set[int]:
+        return set(self._owned)
+
+    def owns_node(self, node_name: str) -> bool:
+        """
+        Whether automatic placement may use a node
+
+        Nodes are split between members like shards, so two instances never
+        pick free devices on the same node at the same time.
+        """
+        with self._lock:
+            owned = self._node_owners.get(node_name)
+            if owned is None:
+                owned = self._node_owners[node_name] = rendezvous_owner(self._members, node_name) == self.identity
+            return owned
+
+    def start(self):
+        """Join the group, then keep membership current in a background thread"""
+        try:
+            self.sync()
+        except Exception as e:
+            self.logger.error(f"Error joining shard group {self.group}: {e}")
+        self._thread = threading.Thread(target=self.run, name="shard-membership", daemon=True)
+        self._thread.start()
+
+    def run(self):
+        while not self._stopped.wait(self.retry_period):
+            try:
+                self.sync()
+            except Exception as e:
+                self.logger.error(f"Error updating shard membership: {e}")
+
+    def sync(self) -> bool:
+        """Renew our Lease, list the group's and rebalance if the live members changed"""
+        self.renew()
+        leases = self.api.list_namespaced_lease(self.namespace, label_selector=f"{MEMBER_LABEL}={self.group}")
+
+        now = time.monotonic()
+        observed = {}
+        members = {self.identity}
+        for lease in leases.items:
+            name = lease.metadata.name
+            spec = lease.spec or client.V1LeaseSpec()
+            record = (spec.holder_identity, spec.renew_time)
+            previous = self._observed.get(name)
+            observed_at = previous[1] if previous and previous[0] == record else now
+            observed[name] = (record, observed_at)
+
+            duration = spec.lease_duration_seconds or self.lease_duration
+            if spec.holder_identity and now - observed_at < duration:
+                members.add(spec.holder_identity)
+            elif name != self.lease_name:
+                self.delete_expired(lease)
+        self._observed = observed
+
+        members = sorted(members)
+        if members == self._members:
+            return False
+
+        owned = assign_shards(members, self.shard_count)[self.identity]
+        with self._lock:
+            self._members = members
+            self._owned = owned
+            self._node_owners = {}
+        self.logger.info(f"Shard group {self.group} has {len(members)} members; "
+                         f"{self.identity} owns {len(owned)} of {self.shard_count} shards")
+        if self.on_change:
+            try:
+                self.on_change(set(owned))
+            except Exception as e:
+                self.logger.error(f"Shard change callback failed: {e}")
+        return True
+
+    def renew(self):
+        """Create or renew our own Lease"""
+        try:
+            lease = self.api.read_namespaced_lease(self.lease_name, self.namespace)
+        except ApiException as e:
+            if e.status != 404:
+                raise
+            now = micro_time()
+            lease = client.V1Lease(
+                metadata=client.V1ObjectMeta(name=self.lease_name, namespace=self.namespace,
+                                             labels={MEMBER_LABEL: self.group}),
+                spec=client.V1LeaseSpec(holder_identity=self.identity, lease_duration_seconds=self.lease_duration,
+                                        acquire_time=now, renew_time=now)
+            )
+            self.api.create_namespaced_lease(self.namespace, lease)
+            return
+
+        lease.spec = lease.spec or client.V1LeaseSpec()
+        lease.spec.holder_identity = self.identity
+        lease.spec.lease_duration_seconds = self.lease_duration
+        lease.spec.renew_time = micro_time()
+        self.api.replace_namespaced_lease(self.lease_name, self.namespace, lease)
+
+    def delete_expired(self, lease):
+        """Remove the Lease of a member that stopped renewing it"""
+        try:
+            self.api.delete_namespaced_lease(lease.metadata.name, self.namespace)
+            self.logger.info(f"Removed expired shard member lease {lease.metadata.name}")
+        except ApiException as e:
+            if e.status != 404:
+                self.logger.warning(f"Could not remove expired lease {lease.metadata.name}: {e}")
+
+    def release(self):
+        """Leave the group so the remaining members take over our shards immediately"""
+        self._stopped.set()
+        try:
+            self.api.delete_namespaced_lease(self.lease_name, self.namespace)
+            self.logger.info(f"Left shard group {self.group}")
+        except ApiException as e:
+            if e.status != 404:
+                self.logger.warning(f"Could not delete lease {self.lease_name}: {e}")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Consistent hashing of pods onto shards and of shards onto scheduler instances
+"""
+
+import hashlib
+from typing import Dict, Iterable, List, Optional, Set
+
+from scheduling_map import GANG_ANNOTATION
+
+
+# Pod label holding the shard, set by the webhook and used as the scheduler's watch selector
+SHARD_LABEL = 'gpu-shard'
+
+SHARD_BY_NAMESPACE = 'namespace'
+SHARD_BY_OWNER = 'owner'
+SHARD_BY = (SHARD_BY_NAMESPACE, SHARD_BY_OWNER)
+
+
+def stable_hash(value: str) -> int:
+    """64-bit hash that is the same in every process, unlike hash()"""
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big')
+
+
+def shard_key(namespace: str, owner: Optional[str] = None, gang: Optional[str] = None,
+              shard_by: str = SHARD_BY_NAMESPACE) -> str:
+    """
+    The string a pod is sharded by
+
+    Members of a gang always share a shard so one instance holds the whole
+    gang. Otherwise pods are sharded by namespace or, with `owner`, by their
+    controlling owner ("Kind/name") when they have one.
+    """
+    if gang:
+        return f"{namespace}/gang/{gang}"
+    if shard_by == SHARD_BY_OWNER and owner:
+        return f"{namespace}/{owner}"
+    return namespace
+
+
+def shard_for_key(key: str, shard_count: int) -> int:
+    return stable_hash(key) % shard_count
+
+
+def pod_dict_shard(pod: dict, shard_count: int, shard_by: str = SHARD_BY_NAMESPACE,
+                   namespace: Optional[str] = None) -> int:
+    """Shard of a pod given as an API object dict, as seen by the webhook"""
+    metadata = pod.get('metadata', {})
+    namespace = namespace or metadata.get('namespace', '')
+    owner = next((f"{ref.get('kind')}/{ref.get('name')}" for ref in metadata.get('ownerReferences') or []
+                  if ref.get('controller')), None)
+    gang = (metadata.get('annotations') or {}).get(GANG_ANNOTATION)
+    return shard_for_key(shard_key(namespace, owner, gang, shard_by), shard_count)
+
+
+def pod_shard(pod, shard_count: int, shard_by: str = SHARD_BY_NAMESPACE) -> int:
+    """
+    Shard of a V1Pod: its shard label, or computed like the webhook does for
+    pods created without one
+    """
+    metadata = pod.metadata
+    label = (getattr(metadata, 'labels', None) or {}).get(SHARD_LABEL)
+    if label is not None and label.isdigit() and int(label) < shard_count:
+        return int(label)
+
+    owner = next((f"{ref.kind}/{ref.name}" for ref in getattr(metadata, 'owner_references', None) or []
+                  if ref.controller), None)
+    gang = (metadata.annotations or {}).get(GANG_ANNOTATION)
+    return shard_for_key(shard_key(metadata.namespace, owner, gang, shard_by), shard_count)
+
+
+def rendezvous_owner(members: Iterable[str], key: str) -> Optional[str]:
+    """
+    The member owning a key by rendezvous (highest random weight) hashing
+
+    When a member joins or leaves, only the keys it gains or held move.
+    """
+    return max(members, key=lambda member: stable_hash(f"{member}/{key}"), default=None)
+
+
+def assign_shards(members: Iterable[str], shard_count: int) -> Dict[str, Set[int]]:
+    """Split shards 0..shard_count-1 between members"""
+    members = list(members)
+    assignment: Dict[str, Set[int]] = {member: set() for member in members}
+    if members:
+        for shard in range(shard_count):
+            assignment[rendezvous_owner(members, str(shard))].add(shard)
+    return assignment
+
+
+def shard_selector(shards: Iterable[int]) -> Optional[str]:
+    """Label selector matching pods in any of the shards, or None for no shards"""
+    shards: List[int] = sorted(shards)
+    if not shards:
+        return None
+    return f"{SHARD_LABEL} in ({','.join(map(str, shards))})"
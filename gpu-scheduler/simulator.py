@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Offline simulation: replay a cluster snapshot through GPUScheduler in memory
+
+Loads Nodes, Pods and ConfigMaps from YAML or JSON files (single objects,
+multi-document YAML or `kubectl get -o yaml|json` Lists) and runs every
+pending pod through the scheduler's own map parsing, node resolution,
+device ledger and binding code against an in-memory API. Reports where each
+pod was placed, which pods could not be placed and why (device conflicts
+included), map parse errors, GPU usage per node and decisions per second:
+
+    kubectl get nodes,pods,configmaps -A -o yaml > snapshot.yaml
+    python simulator.py snapshot.yaml --output report.json
+
+Exits non-zero if any pending pod could not be placed, so it can gate CI.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from types import SimpleNamespace
+from typing import Dict, Iterable, List
+
+import yaml
+from kubernetes.client.rest import ApiException
+
+from gpu_ledger import format_device_mask, parse_device_mask
+from map_configmaps import MAP_CONFIGMAP_LABEL, map_reference
+from node_cache import GPU_COUNT_LABEL, GPU_NODE_LABEL, GPU_RESOURCE
+from placement import BINPACK, SPREAD
+from scheduler import GPUScheduler
+from scheduling_map import (
+    ASSIGNED_DEVICES_ANNOTATION, GANG_ANNOTATION, GANG_SIZE_ANNOTATION, GPU_COUNT_ANNOTATION, compile_scheduling_map
+)
+
+try:
+    YAML_LOADER = yaml.CSafeLoader
+except AttributeError:
+    YAML_LOADER = yaml.SafeLoader
+
+SNAPSHOT_EXTENSIONS = ('.yaml', '.yml', '.json')
+
+# Pod phases that no longer hold devices
+FINISHED_PHASES = ('Succeeded', 'Failed')
+
+
+def load_documents(path: str) -> Iterable[dict]:
+    """Objects in a YAML or JSON file, with List items flattened"""
+    with open(path) as f:
+        if path.endswith('.json'):
+            documents = [json.load(f)]
+        else:
+            documents = list(yaml.load_all(f, Loader=YAML_LOADER))
+    for document in documents:
+        if not isinstance(document, dict):
+            continue
+        if 'items' in document and document.get('kind', 'List').endswith('List'):
+            yield from (item for item in document['items'] or [] if isinstance(item, dict))
+        else:
+            yield document
+
+
+def load_snapshot(paths: Iterable[str]) -> Dict[str, List[dict]]:
+    """Nodes, Pods and ConfigMaps from files and directories of snapshot files"""
+    snapshot: Dict[str, List[dict]] = {'Node': [], 'Pod': [], 'ConfigMap': []}
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.endswith(SNAPSHOT_EXTENSIONS))
+        else:
+            files.append(path)
+
+    for path in files:
+        for obj in load_documents(path):
+            if obj.get('kind') in snapshot:
+                snapshot[obj['kind']].append(obj)
+    return snapshot
+
+
+def synthetic_nodes(count: int, gpus: int, prefix: str = 'sim-node') -> List[dict]:
+    """Extra GPU nodes for capacity planning, labelled gpu-node-name <prefix><n>"""
+    return [{'kind': 'Node', 'metadata': {'name': f"{prefix}-{i}", 'labels': {GPU_NODE_LABEL: f"{prefix}{i}"}},
+             'status': {'capacity': {GPU_RESOURCE: str(gpus)}}} for i in range(1, count + 1)]
+
+
+def node_view(raw: dict) -> SimpleNamespace:
+    """The fields of a Node the node cache reads"""
+    metadata = raw.get('metadata', {})
+    return SimpleNamespace(
+        metadata=SimpleNamespace(name=metadata.get('name'), labels=metadata.get('labels') or {},
+                                 resource_version=metadata.get('resourceVersion')),
+        status=SimpleNamespace(capacity=(raw.get('status') or {}).get('capacity') or {})
+    )
+
+
+def pod_view(raw: dict) -> SimpleNamespace:
+    """The fields of a Pod the scheduler reads, without building the typed model"""
+    metadata = raw.get('metadata', {})
+    namespace = metadata.get('namespace') or 'default'
+    return SimpleNamespace(
+        metadata=SimpleNamespace(name=metadata.get('name', ''), namespace=namespace,
+                                 uid=metadata.get('uid') or f"{namespace}/{metadata.get('name', '')}",
+                                 annotations=metadata.get('annotations') or {}, labels=metadata.get('labels'),
+                                 owner_references=None, resource_version=metadata.get('resourceVersion')),
+        spec=SimpleNamespace(node_name=(raw.get('spec') or {}).get('nodeName'),
+                             scheduler_name=(raw.get('spec') or {}).get('schedulerName')),
+        status=SimpleNamespace(phase=(raw.get('status') or {}).get('phase', 'Pending'))
+    )
+
+
+class SimulatedCoreV1:
+    """In-memory CoreV1Api serving a snapshot's nodes and ConfigMaps and recording bindings"""
+
+    def __init__(self, nodes: List[dict], configmaps: List[dict]):
+        self.nodes = [node_view(node) for node in nodes]
+        self.configmaps = {((cm['metadata'].get('namespace') or 'default'), cm['metadata']['name']): cm
+                           for cm in configmaps}
+        self.bindings: Dict[str, str] = {}
+        self.patches: Dict[str, dict] = {}
+
+    def list_node(self, **kwargs):
+        return SimpleNamespace(items=self.nodes, metadata=SimpleNamespace(resource_version="1"))
+
+    def list_config_map_for_all_namespaces(self, label_selector=None, **kwargs):
+        items = [self.configmap_view(configmap) for configmap in self.configmaps.values()
+                 if MAP_CONFIGMAP_LABEL in (configmap['metadata'].get('labels') or {})]
+        return SimpleNamespace(items=items, metadata=SimpleNamespace(resource_version="1"))
+
+    def read_namespaced_config_map(self, name, namespace, **kwargs):
+        configmap = self.configmaps.get((namespace, name))
+        if configmap is None:
+            raise ApiException(status=404, reason="Not Found")
+        return self.configmap_view(configmap)
+
+    @staticmethod
+    def configmap_view(configmap: dict) -> SimpleNamespace:
+        metadata = configmap['metadata']
+        return SimpleNamespace(metadata=SimpleNamespace(name=metadata['name'],
+                                                        namespace=metadata.get('namespace') or 'default'),
+                               data=configmap.get('data') or {})
+
+    def create_namespaced_binding(self, namespace, body, **kwargs):
+        self.bindings[f"{namespace}/{body.metadata.name}"] = body.target.name
+
+    def patch_namespaced_pod(self, name, namespace, body, **kwargs):
+        self.patches[f"{namespace}/{name}"] = body['metadata']['annotations']
+
+
+def explain(scheduler: GPUScheduler, pod, gang_members: Dict[tuple, int]) -> dict:
+    """Why a pending pod was not placed, with the devices and holders of a conflict"""
+    annotations = pod.metadata.annotations
+    gang = annotations.get(GANG_ANNOTATION)
+    if gang:
+        size = annotations.get(GANG_SIZE_ANNOTATION, '')
+        members = gang_members.get((pod.metadata.namespace, gang), 0)
+        if not size.isdigit() or members < int(size):
+            return {'reason': f"gang {gang} incomplete ({members}/{size} members)"}
+
+    gpu_map = annotations.get('gpu-scheduling-map')
+    gpu_count = annotations.get(GPU_COUNT_ANNOTATION)
+    if not gpu_map and not gpu_count:
+        return {'reason': "no gpu-scheduling-map or gpu-count annotation"}
+
+    assignment = None
+    if gpu_map:
+        resolved = scheduler.get_map_annotation(pod)
+        if resolved is None:
+            name, key = map_reference(gpu_map)
+            return {'reason': f"map ConfigMap {pod.metadata.namespace}/{name} or its key {key} not found"}
+        assignment = scheduler.get_map_assignment(pod.metadata.name, resolved, warn=False)
+    if assignment is None:
+        if gpu_count:
+            return {'reason': f"no node has {gpu_count} free GPUs"}
+        ordinal = scheduler.get_pod_index(pod.metadata.name)
+        return {'reason': f"no map entry for ordinal {ordinal}" if ordinal is not None
+                else "pod name has no ordinal"}
+
+    logical_node, devices = assignment
+    node = scheduler.node_cache.lookup(logical_node)
+    if node is None:
+        return {'reason': f"no node labelled {GPU_NODE_LABEL}={logical_node}"}
+    mask = parse_device_mask(devices)
+    holders = scheduler.ledger.holders(node, mask) if mask is not None else []
+    if holders:
+        return {'reason': "device conflict", 'node': node,
+                'devices': format_device_mask(scheduler.ledger.conflicts(node, mask)), 'held_by': holders}
+    if gang:
+        return {'reason': f"another member of gang {gang} could not be placed"}
+    return {'reason': "not placed"}
+
+
+def simulate(snapshot: Dict[str, List[dict]], scheduler_name: str = 'gpu-scheduler',
+             placement_strategy: str = BINPACK, default_gpu_count: int = 8) -> dict:
+    """Schedule a snapshot's pending pods in memory and return the report"""
+    v1 = SimulatedCoreV1(snapshot['Node'], snapshot['ConfigMap'])
+    scheduler = GPUScheduler(scheduler_name=scheduler_name, placement_strategy=placement_strategy, v1=v1)
+    scheduler.node_cache.default_gpu_count = default_gpu_count
+    scheduler.node_cache.relist()
+    scheduler.map_configmaps.relist()
+
+    ours = [pod_view(raw) for raw in snapshot['Pod']
+            if ((raw.get('spec') or {}).get('schedulerName') or scheduler_name) == scheduler_name]
+    bound = [pod for pod in ours if pod.spec.node_name and pod.status.phase not in FINISHED_PHASES]
+    pending = [pod for pod in ours if not pod.spec.node_name and pod.status.phase == 'Pending']
+
+    # Running pods hold their devices before anything new is placed
+    for pod in bound:
+        scheduler.track_bound_pod(pod)
+
+    started = time.perf_counter()
+    for pod in pending:
+        scheduler.process_pod(pod)
+    elapsed = time.perf_counter() - started
+
+    gang_members: Dict[tuple, int] = {}
+    for pod in pending:
+        gang = pod.metadata.annotations.get(GANG_ANNOTATION)
+        if gang:
+            gang_members[(pod.metadata.namespace, gang)] = gang_members.get((pod.metadata.namespace, gang), 0) + 1
+
+    placements = []
+    unscheduled = []
+    for pod in pending:
+        key = f"{pod.metadata.namespace}/{pod.metadata.name}"
+        node = v1.bindings.get(key)
+        if node is None:
+            unscheduled.append({'namespace': pod.metadata.namespace, 'pod': pod.metadata.name,
+                                **explain(scheduler, pod, gang_members)})
+            continue
+        allocation = scheduler.ledger.allocation(pod.metadata.uid)
+        devices = v1.patches.get(key, {}).get(ASSIGNED_DEVICES_ANNOTATION) or \
+            (format_device_mask(allocation[1]) if allocation else scheduler.get_bound_devices(pod))
+        placements.append({'namespace': pod.metadata.namespace, 'pod': pod.metadata.name, 'node': node,
+                           'devices': devices})
+
+    map_errors = {}
+    for pod in pending:
+        gpu_map = scheduler.get_map_annotation(pod)
+        if gpu_map:
+            for error in compile_scheduling_map(gpu_map).errors:
+                map_errors.setdefault((error.line, error.reason), {
+                    'pod': f"{pod.metadata.namespace}/{pod.metadata.name}", 'line_number': error.line_number,
+                    'line': error.line, 'reason': error.reason})
+
+    gpu_nodes = dict(scheduler.node_cache.gpu_nodes())
+    node_usage = {node: {'gpus': gpus, 'allocated': bin(scheduler.ledger.allocated(node)).count('1')}
+                  for node, gpus in sorted(gpu_nodes.items())}
+    conflicts = [entry for entry in unscheduled if entry['reason'] == "device conflict"]
+    return {
+        'simulation': 'gpu-scheduler',
+        'config': {'scheduler_name': scheduler_name, 'placement_strategy': placement_strategy,
+                   'default_gpu_count': default_gpu_count},
+        'nodes': len(snapshot['Node']),
+        'gpu_nodes': len(gpu_nodes),
+        'pods': len(ours),
+        'already_bound': len(bound),
+        'pending': len(pending),
+        'scheduled': len(placements),
+        'unscheduled': len(unscheduled),
+        'conflicts': len(conflicts),
+        'elapsed_seconds': round(elapsed, 4),
+        'decisions_per_second': round(len(pending) / elapsed, 1) if elapsed else 0.0,
+        'gpus': sum(usage['gpus'] for usage in node_usage.values()),
+        'gpus_allocated': sum(usage['allocated'] for usage in node_usage.values()),
+        'placements': placements,
+        'unscheduled_pods': unscheduled,
+        'map_errors': list(map_errors.values()),
+        'node_usage': node_usage
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('paths', nargs='+', help="Snapshot files or directories of .yaml, .yml and .json files")
+    parser.add_argument('--scheduler-name', default='gpu-scheduler')
+    parser.add_argument('--placement-strategy', choices=(BINPACK, SPREAD), default=BINPACK)
+    parser.add_argument('--default-gpu-count', type=int, default=8,
+                        help=f"GPUs of nodes without {GPU_RESOURCE} capacity or a {GPU_COUNT_LABEL} label")
+    parser.add_argument('--add-nodes', type=int, default=0,
+                        help="Add this many GPU nodes (gpu-node-name sim-node1, sim-node2, ...) for capacity planning")
+    parser.add_argument('--add-node-gpus', type=int, default=8, help="GPUs per added node")
+    parser.add_argument('--output', help="Also write the JSON report to this file")
+    parser.add_argument('--summary', action='store_true', help="Print the report without per-pod placements")
+    parser.add_argument('--log-level', default='CRITICAL',
+                        help="Scheduler log level; the report already lists every pod that was not placed")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    snapshot = load_snapshot(args.paths)
+    snapshot['Node'].extend(synthetic_nodes(args.add_nodes, args.add_node_gpus))
+    load_seconds = time.perf_counter() - started
+
+    logging.basicConfig(level=args.log_level)
+    logging.getLogger().setLevel(args.log_level)
+    report = simulate(snapshot, args.scheduler_name, args.placement_strategy, args.default_gpu_count)
+    report['load_seconds'] = round(load_seconds, 4)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.summary:
+        report = {key: value for key, value in report.items() if key != 'placements'}
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if not report['unscheduled'] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for the pooled, rate-limited API transport against the fake API server
+"""
+
+import socket
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'benchmarks'))
+
+from kubernetes import client, watch
+
+from api_transport import API_REQUESTS, TokenBucket, create_api_client
+from fake_apiserver import FakeAPIServer
+
+
+def test_token_bucket_allows_burst_then_paces():
+    """Test a burst goes out at once and later requests are spaced at the QPS"""
+    bucket = TokenBucket(qps=100, burst=3)
+    delays = [bucket.reserve() for _ in range(5)]
+
+    assert delays[:3] == [0.0, 0.0, 0.0]
+    assert 0.005 < delays[3] <= 0.01
+    assert 0.015 < delays[4] <= 0.02
+    print("✓ Token bucket test passed")
+
+
+def test_pooled_client_shares_rate_limit_and_connections():
+    """Test concurrent callers share one QPS limit and a bounded set of kept-alive connections"""
+    api = FakeAPIServer()
+    api.add_node("worker1", "node1")
+    configuration = client.Configuration()
+    configuration.host = f"http://127.0.0.1:{api.serve()}"
+    api_client = create_api_client(configuration, pool_size=4, qps=50, burst=5, request_timeout=10)
+    v1 = client.CoreV1Api(api_client)
+    requests = API_REQUESTS.value()
+
+    def list_nodes():
+        for _ in range(5):
+            v1.list_node()
+
+    try:
+        started = time.monotonic()
+        threads = [threading.Thread(target=list_nodes) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        # 20 requests with a burst of 5 need at least 15 more tokens at 50 per second
+        assert elapsed >= 0.28
+        assert API_REQUESTS.value() - requests == 20
+        pool = api_client.rest_client.pool_manager.connection_from_url(configuration.host)
+        assert pool.num_connections <= 4
+        assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in pool.conn_kw['socket_options']
+
+        # Watches are not cut off by the request timeout
+        api_client.request_timeout = 0.5
+        events = list(watch.Watch().stream(v1.list_node, timeout_seconds=1))
+        assert [event['type'] for event in events] == ['ADDED']
+    finally:
+        api.shutdown()
+    print("✓ Pooled API client test passed")
+
+
+if __name__ == "__main__":
+    test_token_bucket_allows_burst_then_paces()
+    test_pooled_client_shares_rate_limit_and_connections()
@@ -7,40 +7,18 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(__file__))
 
-# Test the annotation parser logic directly
+from gpu_ledger import DeviceLedger, format_device_mask, parse_device_mask
+from placement import BINPACK, SPREAD, choose_placement
+from scheduling_map import compile_scheduling_map, parse_scheduling_map
+
+
+def parse_gpu_scheduling_map(annotation_value):
+    """Parse an annotation into a plain dict for comparison"""
+    return parse_scheduling_map(annotation_value).to_dict()
+
+
 def test_parse_gpu_scheduling_map():
-    """Test parsing GPU scheduling map without importing scheduler"""
-    
-    def parse_gpu_scheduling_map(annotation_value):
-        """Standalone parser function for testing"""
-        scheduling_map = {}
-        
-        try:
-            lines = annotation_value.strip().split('\n')
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                if '=' not in line:
-                    continue
-                    
-                pod_index_str, node_gpu_str = line.split('=', 1)
-                pod_index = int(pod_index_str.strip())
-                
-                if ':' not in node_gpu_str:
-                    continue
-                    
-                node_name, gpu_devices = node_gpu_str.split(':', 1)
-                node_name = node_name.strip()
-                gpu_devices = gpu_devices.strip()
-                
-                scheduling_map[pod_index] = (node_name, gpu_devices)
-                
-        except Exception as e:
-            print(f"Error parsing GPU scheduling map: {e}")
-            
-        return scheduling_map
+    """Test parsing GPU scheduling map"""
     
     # Test valid annotation
     annotation_value = """0=node1:0,1
@@ -84,6 +62,110 @@ def test_parse_gpu_scheduling_map():
     print("✓ Whitespace annotation parsing test passed")
 
 
+def test_parse_errors_reported_per_line():
+    """Test invalid lines are skipped and reported with their line number"""
+    annotation_value = """0=node1:0,1
+    bogus
+    x=node2:2
+    2=node3
+    3=node4:3"""
+    
+    result = parse_scheduling_map(annotation_value)
+    
+    assert result.to_dict() == {0: ("node1", "0,1"), 3: ("node4", "3")}
+    assert [error.line_number for error in result.errors] == [2, 3, 4]
+    assert "invalid pod index" in result.errors[1].reason
+    print("✓ Per-line parse error test passed")
+
+
+def test_compiled_map_lookup_and_cache():
+    """Test ordinal lookup and that identical annotations compile once"""
+    annotation_value = "0=node1:0\n2=node2:1"
+    
+    compiled = compile_scheduling_map(annotation_value)
+    assert compiled.get(0) == ("node1", "0")
+    assert compiled.get(1) is None
+    assert compiled.get(2) == ("node2", "1")
+    assert compiled.get(3) is None
+    assert compiled.get(-1) is None
+    assert len(compiled) == 2
+    assert compile_scheduling_map(annotation_value) is compiled
+    
+    # Very sparse ordinals stay lookups without allocating a huge array
+    sparse = compile_scheduling_map("1000000=node1:0")
+    assert sparse.get(1000000) == ("node1", "0")
+    assert 5 not in sparse
+    print("✓ Compiled map lookup and cache test passed")
+
+
+def test_range_lines_expand_lazily():
+    """Test range lines spread ordinals over node and device ranges without per-ordinal entries"""
+    compiled = parse_scheduling_map("0-15=node[1-8]:0-7\n3=spare:5\n16-17=gpu-[01-02].rack1:0-3")
+    
+    assert compiled.get(0) == ("node1", "0,1,2,3")
+    assert compiled.get(1) == ("node1", "4,5,6,7")
+    assert compiled.get(2) == ("node2", "0,1,2,3")
+    assert compiled.get(15) == ("node8", "4,5,6,7")
+    assert compiled.get(17) == ("gpu-02.rack1", "0,1,2,3")
+    assert compiled.get(18) is None
+    # A single-ordinal line overrides the range it falls in
+    assert compiled.get(3) == ("spare", "5")
+    assert len(compiled) == 18
+    assert [ordinal for ordinal, _ in compiled.items()] == list(range(18))
+    assert not compiled.errors
+    
+    # 1,000 replicas compile to one rule, not 1,000 entries
+    large = parse_scheduling_map("0-999=node[1-125]:0-7")
+    assert large.get(999) == ("node125", "7") and len(large.ranges()) == 1
+    
+    invalid = parse_scheduling_map("0-5=node[1-2]:0-3\n0-7=node[1-2]:0-3\n4-7=node[3-4]:0-3\n8-9=node[2-1]:0")
+    assert [error.line_number for error in invalid.errors] == [1, 3, 4]
+    assert "divide evenly" in invalid.errors[0].reason
+    assert "overlaps range 0-7" in invalid.errors[1].reason
+    print("✓ Range line parsing test passed")
+
+
+def test_device_ledger():
+    """Test device bitmaps, conflict detection and release"""
+    assert parse_device_mask("0,1") == 0b11
+    assert parse_device_mask(" 3 ") == 0b1000
+    assert parse_device_mask("GPU-1234") is None
+    assert format_device_mask(0b1011) == "0,1,3"
+    
+    ledger = DeviceLedger()
+    assert ledger.allocate("uid-3", "node4", parse_device_mask("3"), "app-3")
+    assert not ledger.allocate("uid-4", "node4", parse_device_mask("3"), "app-4")
+    assert ledger.allocate("uid-4", "node3", parse_device_mask("3"), "app-4")
+    assert ledger.allocate("uid-3", "node4", parse_device_mask("3"), "app-3")
+    assert ledger.conflicts("node4", 0b1100) == 0b1000
+    assert ledger.holders("node4", 0b1000) == ["app-3"]
+    
+    assert ledger.release("uid-3")
+    assert not ledger.release("uid-3")
+    assert ledger.allocated("node4") == 0
+    assert ledger.allocate("uid-4", "node4", parse_device_mask("3"), "app-4")
+    assert ledger.allocated("node3") == 0
+    print("✓ Device ledger test passed")
+
+
+def test_choose_placement():
+    """Test bin-packing and spreading GPU requests over nodes"""
+    ledger = DeviceLedger()
+    ledger.allocate("uid-a", "node1", 0b0011, "a")
+    ledger.allocate("uid-b", "node2", 0b0001, "b")
+    nodes = [("node1", 4), ("node2", 4), ("node3", 4)]
+    
+    # Bin-packing prefers the fullest node that still fits
+    assert choose_placement(nodes, ledger, 2, BINPACK) == ("node1", 0b1100)
+    assert choose_placement(nodes, ledger, 3, BINPACK) == ("node2", 0b1110)
+    
+    # Spreading prefers the emptiest node
+    assert choose_placement(nodes, ledger, 2, SPREAD) == ("node3", 0b0011)
+    
+    assert choose_placement(nodes, ledger, 5, BINPACK) is None
+    print("✓ Placement test passed")
+
+
 def test_get_pod_index():
     """Test pod index extraction"""
     
@@ -133,6 +215,11 @@ def main():
     
     try:
         test_parse_gpu_scheduling_map()
+        test_parse_errors_reported_per_line()
+        test_compiled_map_lookup_and_cache()
+        test_range_lines_expand_lazily()
+        test_device_ledger()
+        test_choose_placement()
         test_get_pod_index()
         print("\nAll tests passed! ✓")
         return 0
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the on-demand profiling endpoints
+"""
+
+import threading
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+import debug
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def allocate_blocks(stop, blocks):
+    while not stop.is_set():
+        blocks.append(bytearray(4096))
+        stop.wait(0.001)
+
+
+def run_in_thread(target, *args, name):
+    stop = threading.Event()
+    thread = threading.Thread(target=target, args=(stop,) + args, name=name, daemon=True)
+    thread.start()
+    return stop, thread
+
+
+def test_profile_finds_busy_function():
+    """Test the sampling profile attributes time to the function keeping a thread busy"""
+    stop, thread = run_in_thread(busy_loop, name="busy")
+    try:
+        status, report = debug.handle_debug_request('/debug/profile', 'seconds=0.3&interval=0.002')
+        collapsed = debug.cpu_profile(seconds=0.1, interval=0.002, collapsed=True)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert status == 200
+    assert "busy_loop" in report.split("Top functions by total samples")[1]
+    assert any("busy_loop" in line for line in collapsed.splitlines())
+    print("✓ CPU profile test passed")
+
+
+def test_thread_dump_and_allocations():
+    """Test the thread dump names live threads and allocation tracing finds the allocating line"""
+    blocks = []
+    stop, thread = run_in_thread(allocate_blocks, blocks, name="allocator")
+    try:
+        assert "Thread allocator" in debug.thread_dump()
+        status, report = debug.handle_debug_request('/debug/allocations', 'seconds=0.3&limit=5')
+    finally:
+        stop.set()
+        thread.join()
+
+    assert status == 200
+    assert "test_debug.py" in report
+    print("✓ Thread dump and allocation test passed")
+
+
+def test_one_session_at_a_time():
+    """Test concurrent profiles are refused and unknown paths are not handled"""
+    with debug._session_lock:
+        status, _ = debug.handle_debug_request('/debug/profile', 'seconds=0.1')
+    assert status == 409
+    assert debug.handle_debug_request('/debug/profile', 'seconds=soon')[0] == 400
+    assert debug.handle_debug_request('/debug/unknown') is None
+    print("✓ Debug session lock test passed")
+
+
+if __name__ == "__main__":
+    test_profile_finds_busy_function()
+    test_thread_dump_and_allocations()
+    test_one_session_at_a_time()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Tests for the fleet aggregator comparing pushed check reports with scheduling maps
+"""
+
+import json
+import sys
+import os
+import threading
+import time
+import urllib.request
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'gpu-scheduler-check'))
+
+from fleet_aggregator import FleetAggregator, create_server
+from main import AssignmentReporter
+
+
+def make_pod(name, annotations, node_name=None, uid=None, phase='Running'):
+    return {'metadata': {'name': name, 'namespace': 'default', 'uid': uid or f"uid-{name}",
+                         'annotations': annotations},
+            'spec': {'nodeName': node_name}, 'status': {'phase': phase}}
+
+
+class FakeFleetCoreV1:
+    """Fake CoreV1Api serving raw pod pages and GPU nodes"""
+
+    def __init__(self, pods, nodes):
+        self.pods = pods
+        self.nodes = nodes
+        self.pod_lists = 0
+
+    def list_namespaced_pod(self, namespace, label_selector='', limit=None, _continue=None, **kwargs):
+        self.pod_lists += 1
+        start = int(_continue or 0)
+        end = start + limit
+        page = {'items': self.pods[start:end], 'metadata': {'continue': str(end) if end < len(self.pods) else None}}
+        return SimpleNamespace(data=json.dumps(page).encode())
+
+    def list_node(self, label_selector=None, **kwargs):
+        items = [{'metadata': {'name': name, 'labels': {'gpu-node-name': logical}}}
+                 for name, logical in self.nodes.items()]
+        return SimpleNamespace(data=json.dumps({'items': items}).encode())
+
+
+def report(pod, node, devices, uid=None):
+    return {'namespace': 'default', 'pod': pod, 'uid': uid or f"uid-{pod}", 'node': node, 'devices': devices}
+
+
+def test_summary_lists_mismatches():
+    """Test each way a pod can fail validation is reported and only a full match passes"""
+    gpu_map = {'gpu-scheduling-map': "0=node1:0,1\n1=node2:2\n2=node1:2\n3=node2:3\n4=node2:0\n5=node1:3"}
+    pods = [make_pod(f"check-{i}", gpu_map, node_name=node) for i, node in
+            enumerate(['worker1', 'worker2', 'worker2', 'worker2', 'worker2'])]
+    pods.append(make_pod("check-5", gpu_map))
+    pods.append(make_pod("auto-0", {'gpu-count': '1', 'gpu-assigned-node': 'worker1',
+                                    'gpu-assigned-devices': '3'}, node_name='worker1'))
+    v1 = FakeFleetCoreV1(pods, {'worker1': 'node1', 'worker2': 'node2'})
+    aggregator = FleetAggregator(v1, 'default', page_size=3)
+
+    accepted = aggregator.add_reports([
+        report("check-0", 'worker1', '1,0'),
+        report("check-1", 'worker2', '2'),
+        report("check-2", 'worker2', '2'),
+        report("check-3", 'worker2', '0'),
+        report("check-4", 'worker2', '0', uid="uid-old"),
+        report("auto-0", 'worker1', '3'),
+        report("gone-0", 'worker1', '0'),
+        {'pod': "no-node"}
+    ])
+    assert accepted == 7
+
+    summary = aggregator.summary()
+    assert summary['status'] == 'fail'
+    assert (summary['pods'], summary['matched'], summary['pending']) == (7, 3, ["check-5"])
+    reasons = {entry['pod']: entry['reason'] for entry in summary['mismatches']}
+    assert reasons == {
+        'check-2': "on worker2 (gpu-node-name=node2) but map assigns node1",
+        'check-3': "CUDA_VISIBLE_DEVICES 0 but assigned 3",
+        'check-4': "no report"
+    }
+    # Reports of pods that no longer exist are dropped, and summaries are reused within the TTL
+    assert len(aggregator) == 6
+    assert aggregator.summary() is summary and v1.pod_lists == 3
+    print("✓ Fleet summary test passed")
+
+
+def test_thousand_pod_fleet_verified_in_seconds():
+    """Test 1,000 check pods pushing reports are verified through one summary request"""
+    nodes = {f"worker{i}": f"node{i}" for i in range(1, 251)}
+    gpu_map = {'gpu-scheduling-map': "0-999=node[1-250]:0-3"}
+    pods = [make_pod(f"check-{i}", gpu_map, node_name=f"worker{i // 4 + 1}") for i in range(1000)]
+    aggregator = FleetAggregator(FakeFleetCoreV1(pods, nodes), 'default')
+    server = create_server(aggregator, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        started = time.monotonic()
+        # Each pod's reporter sends once; an unchanged report is not sent again
+        reporter = None
+        for i in range(1000):
+            reporter = AssignmentReporter(f"{url}/reports", jitter=0)
+            reporter.update(report(f"check-{i}", f"worker{i // 4 + 1}", str(i % 4)), time.monotonic())
+            assert reporter.flush(time.monotonic())
+        reporter.update(reporter.last_sent, time.monotonic())
+        assert reporter.seconds_until_due(time.monotonic()) is None
+
+        with urllib.request.urlopen(f"{url}/summary") as response:
+            summary = json.loads(response.read())
+        elapsed = time.monotonic() - started
+        assert summary['status'] == 'pass' and summary['matched'] == 1000
+        assert elapsed < 10
+
+        # A batch of changed reports flips the result
+        body = json.dumps({'reports': [report("check-0", 'worker1', '3'), report("check-1", 'worker9', '1')]})
+        request = urllib.request.Request(f"{url}/reports", data=body.encode(), method='POST')
+        with urllib.request.urlopen(request) as response:
+            assert json.loads(response.read()) == {'accepted': 2}
+        with urllib.request.urlopen(f"{url}/summary") as response:
+            summary = json.loads(response.read())
+        assert summary['status'] == 'fail' and [entry['pod'] for entry in summary['mismatches']] == ["check-0",
+                                                                                                     "check-1"]
+    finally:
+        server.shutdown()
+        server.server_close()
+    print(f"✓ Fleet verification test passed ({elapsed:.2f}s for 1000 pods)")
+
+
+def test_reporter_retries_with_backoff():
+    """Test a failed send is kept and retried later instead of dropped"""
+    reporter = AssignmentReporter("http://127.0.0.1:9/reports", jitter=0, timeout=0.5)
+    reporter.update(report("check-0", 'worker1', '0'), 100.0)
+    assert reporter.seconds_until_due(100.0) == 0.0
+    assert not reporter.flush(100.0)
+    assert reporter.pending is not None and 1.0 <= reporter.seconds_until_due(100.0) <= 2.0
+    print("✓ Reporter retry test passed")
+
+
+if __name__ == "__main__":
+    test_summary_lists_mismatches()
+    test_thousand_pod_fleet_verified_in_seconds()
+    test_reporter_retries_with_backoff()
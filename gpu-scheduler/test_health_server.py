@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the health, readiness and metrics server
+"""
+
+import http.client
+import json
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+import scheduler as scheduler_module
+from health_server import HealthServer
+from test_scheduler import FakeCoreV1, make_scheduler
+
+
+def get(port, path):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    connection.request('GET', path)
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response.status, response.getheader('Content-Type'), body
+
+
+def test_probes_reflect_readiness_checks():
+    """Test /health always answers and /ready lists the failing checks"""
+    state = {'synced': False}
+    server = HealthServer(port=0, service="test")
+    server.add_readiness_check("synced", lambda: state['synced'])
+    server.add_readiness_check("broken", lambda: 1 / 0)
+    server.add_readiness_check("watch", lambda: False, "scheduler")
+    server.start_background()
+    try:
+        assert get(server.port, '/health')[0] == 200
+        status, _, body = get(server.port, '/ready')
+        assert status == 503
+        assert json.loads(body)['failing'] == ["synced", "broken"]
+
+        state['synced'] = True
+        del server.checks["broken"]
+        status, _, body = get(server.port, '/ready')
+        assert status == 200 and json.loads(body)['status'] == "ready"
+        # Component checks are served on their own path only
+        status, _, body = get(server.port, '/ready/scheduler')
+        assert status == 503 and json.loads(body)['failing'] == ["watch"]
+        assert get(server.port, '/ready/other')[0] == 404
+
+        status, content_type, _ = get(server.port, '/metrics')
+        assert status == 200 and content_type.startswith('text/plain')
+        assert get(server.port, '/debug/threads')[0] == 404
+    finally:
+        server.stop()
+    print("✓ Health server probe test passed")
+
+
+def test_scheduler_readiness_follows_watch_state():
+    """Test the watch state is reported on /ready/scheduler without failing the shared /ready probe"""
+    scheduler = make_scheduler(FakeCoreV1())
+    readiness = scheduler.health_server.readiness
+
+    # The webhook shares the pod, so a disconnected watch must not take it out of its Service
+    assert readiness()[0] == 200
+    assert json.loads(readiness("scheduler")[1])['failing'] == ["pod_watch_connected", "recent_pod_event"]
+    assert scheduler_module.POD_WATCH_CONNECTED.value() == 0
+
+    scheduler.watch_connected = True
+    scheduler.handle_pod_event({'type': 'BOOKMARK', 'raw_object': {'metadata': {'resourceVersion': "5"}}})
+    assert readiness("scheduler")[0] == 200
+    assert scheduler_module.POD_WATCH_CONNECTED.value() == 1
+
+    scheduler.ready_max_event_age = 0
+    assert json.loads(readiness("scheduler")[1])['failing'] == ["recent_pod_event"]
+    assert readiness()[0] == 200
+    print("✓ Scheduler readiness test passed")
+
+if __name__ == "__main__":
+    test_probes_reflect_readiness_checks()
+    test_scheduler_readiness_follows_watch_state()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for Lease-based leader election and warm standby scheduling
+"""
+
+import copy
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+from kubernetes.client.rest import ApiException
+
+from leader_election import LeaderElector
+from test_scheduler import FakeCoreV1, make_pod, make_scheduler
+
+
+class FakeCoordinationV1:
+    """Fake CoordinationV1Api holding Leases with optimistic concurrency"""
+
+    def __init__(self):
+        self.leases = {}
+        self.version = 0
+
+    def read_namespaced_lease(self, name, namespace, **kwargs):
+        if (namespace, name) not in self.leases:
+            raise ApiException(status=404)
+        return copy.deepcopy(self.leases[(namespace, name)])
+
+    def create_namespaced_lease(self, namespace, body, **kwargs):
+        if (namespace, body.metadata.name) in self.leases:
+            raise ApiException(status=409)
+        self._store(namespace, body.metadata.name, body)
+
+    def replace_namespaced_lease(self, name, namespace, body, **kwargs):
+        if body.metadata.resource_version != self.leases[(namespace, name)].metadata.resource_version:
+            raise ApiException(status=409)
+        self._store(namespace, name, body)
+
+    def _store(self, namespace, name, lease):
+        self.version += 1
+        lease = copy.deepcopy(lease)
+        lease.metadata.resource_version = str(self.version)
+        self.leases[(namespace, name)] = lease
+
+    def holder(self, name="gpu-scheduler", namespace="default"):
+        return self.leases[(namespace, name)].spec.holder_identity
+
+
+def make_elector(api, identity, **kwargs):
+    return LeaderElector(api, "gpu-scheduler", "default", identity, **kwargs)
+
+
+def test_single_holder_until_expiry():
+    """Test only one replica holds the lease until the holder stops renewing"""
+    api = FakeCoordinationV1()
+    a = make_elector(api, "replica-a")
+    b = make_elector(api, "replica-b", lease_duration=15)
+
+    assert a.try_acquire_or_renew()
+    assert not b.try_acquire_or_renew()
+    assert a.try_acquire_or_renew()
+    assert api.holder() == "replica-a"
+
+    # A renewal resets B's expiry clock; once A stops renewing for the lease duration, B takes over
+    assert not b.try_acquire_or_renew()
+    b._observed_at -= 16
+    assert b.try_acquire_or_renew()
+    assert api.holder() == "replica-b"
+    assert api.leases[("default", "gpu-scheduler")].spec.lease_transitions == 1
+    print("✓ Leader election expiry test passed")
+
+
+def test_release_hands_over_immediately():
+    """Test a leader releasing the lease lets a standby acquire it without waiting"""
+    api = FakeCoordinationV1()
+    events = []
+    a = make_elector(api, "replica-a", on_stopped_leading=lambda: events.append("stopped"))
+    b = make_elector(api, "replica-b")
+
+    a._set_leading(a.try_acquire_or_renew())
+    assert not b.try_acquire_or_renew()
+
+    a.release()
+    assert not a.is_leader()
+    assert events == ["stopped"]
+    assert b.try_acquire_or_renew()
+    print("✓ Leader election release test passed")
+
+
+def test_standby_keeps_pending_pods_warm():
+    """Test a standby collects pending pods without binding and queues them on takeover"""
+    api = FakeCoordinationV1()
+    make_elector(api, "replica-a").try_acquire_or_renew()
+
+    v1 = FakeCoreV1(pods=[make_pod("app-0")])
+    scheduler = make_scheduler(v1, leader_election=True, identity="replica-b", coordination_v1=api)
+
+    scheduler.relist_pods()
+    scheduler.handle_pod_event({'type': 'ADDED', 'object': make_pod("app-1", resource_version="101")})
+    assert len(scheduler.pending_pods) == 2
+    assert len(scheduler.queue) == 0
+
+    # Pods bound by the current leader leave the pending set
+    scheduler.handle_pod_event({'type': 'MODIFIED', 'object': make_pod("app-0", node_name="worker1")})
+    assert set(scheduler.pending_pods) == {"uid-app-1"}
+
+    assert not scheduler.elector.try_acquire_or_renew()
+    scheduler.elector._observed_at -= 16
+    scheduler.elector._set_leading(scheduler.elector.try_acquire_or_renew())
+    scheduler.enqueue_pending_pods()
+    assert scheduler.is_leader()
+    assert len(scheduler.queue) == 1
+    print("✓ Warm standby test passed")
+
+
+if __name__ == "__main__":
+    test_single_holder_until_expiry()
+    test_release_hands_over_immediately()
+    test_standby_keeps_pending_pods_warm()
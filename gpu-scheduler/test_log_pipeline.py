@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for the sampled, queue-backed log pipeline
+"""
+
+import io
+import json
+import logging
+import threading
+import time
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+from log_pipeline import DROPPED_RECORDS, JSONFormatter, LogPipeline, SamplingFilter
+
+
+def make_record(message, level=logging.INFO, lineno=10, created=1000.0):
+    record = logging.LogRecord('test', level, 'test_log_pipeline.py', lineno, message, None, None)
+    record.created = created
+    return record
+
+
+def make_logger(name, pipeline):
+    logger = logging.getLogger(name)
+    logger.handlers = [pipeline.handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def test_sampling_per_call_site():
+    """Test each call site logs its first records per second, then every Nth, counting what it skipped"""
+    sampler = SamplingFilter(initial=2, thereafter=3)
+
+    records = [make_record(f"pod-{i}") for i in range(10)]
+    passed = [i for i, record in enumerate(records) if sampler.filter(record)]
+    assert passed == [0, 1, 4, 7]
+    assert records[4].sampled_out == 2 and not hasattr(records[1], 'sampled_out')
+
+    # Other call sites, warnings and the next second are counted separately
+    assert sampler.filter(make_record("other", lineno=20))
+    assert all(sampler.filter(make_record("warn", level=logging.WARNING)) for _ in range(10))
+    assert sampler.filter(make_record("later", created=1001.0))
+    print("✓ Sampling test passed")
+
+
+def test_json_output_with_extra_fields():
+    """Test records come out as JSON lines with extra fields and tracebacks"""
+    stream = io.StringIO()
+    output = logging.StreamHandler(stream)
+    output.setFormatter(JSONFormatter("gpu-scheduler"))
+    pipeline = LogPipeline(output)
+    pipeline.start()
+    logger = make_logger('test.json', pipeline)
+
+    logger.info("Scheduled pod %s", "app-0", extra={'pod': "app-0", 'node': "worker1"})
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("Bind failed")
+    pipeline.stop()
+
+    first, second = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert first['message'] == "Scheduled pod app-0" and first['level'] == "INFO"
+    assert first['service'] == "gpu-scheduler" and first['pod'] == "app-0" and first['node'] == "worker1"
+    assert second['level'] == "ERROR" and "ValueError: boom" in second['exception']
+    print("✓ JSON output test passed")
+
+
+def test_full_queue_drops_instead_of_blocking():
+    """Test logging returns immediately while the writer is stuck"""
+    release = threading.Event()
+
+    class StuckHandler(logging.Handler):
+        def emit(self, record):
+            release.wait()
+
+    pipeline = LogPipeline(StuckHandler(), queue_size=2)
+    pipeline.start()
+    logger = make_logger('test.stuck', pipeline)
+    dropped = DROPPED_RECORDS.value()
+
+    start = time.monotonic()
+    for i in range(100):
+        logger.info(f"record {i}")
+    assert time.monotonic() - start < 1.0
+    assert DROPPED_RECORDS.value() - dropped >= 97
+
+    release.set()
+    pipeline.stop()
+    print("✓ Non-blocking queue test passed")
+
+
+if __name__ == "__main__":
+    test_sampling_per_call_site()
+    test_json_output_with_extra_fields()
+    test_full_queue_drops_instead_of_blocking()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for scheduling maps held in watched ConfigMaps
+"""
+
+import sys
+import os
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(__file__))
+
+from kubernetes.client.rest import ApiException
+
+from map_configmaps import MAP_CONFIGMAP_LABEL, KubernetesConfigMapSource, MapConfigMapCache, map_reference
+from test_scheduler import FakeCoreV1, make_pod, make_scheduler
+
+
+def make_configmap(name, data, namespace="default", resource_version="1"):
+    """Build a minimal ConfigMap object"""
+    return SimpleNamespace(metadata=SimpleNamespace(name=name, namespace=namespace,
+                                                    resource_version=resource_version), data=data)
+
+
+class FakeConfigMapCoreV1(FakeCoreV1):
+    """FakeCoreV1 that also serves labelled ConfigMap lists and single ConfigMaps"""
+
+    def __init__(self, configmaps=(), unlabelled=(), **kwargs):
+        super().__init__(**kwargs)
+        self.configmaps = list(configmaps)
+        self.unlabelled = list(unlabelled)
+        self.reads = []
+
+    def list_config_map_for_all_namespaces(self, label_selector=None, **kwargs):
+        assert label_selector == MAP_CONFIGMAP_LABEL
+        return SimpleNamespace(items=self.configmaps, metadata=SimpleNamespace(resource_version="10"))
+
+    def read_namespaced_config_map(self, name, namespace, **kwargs):
+        self.reads.append((namespace, name))
+        for configmap in self.configmaps + self.unlabelled:
+            if (configmap.metadata.namespace, configmap.metadata.name) == (namespace, name):
+                return configmap
+        raise ApiException(status=404)
+
+
+def test_map_reference_parsing():
+    """Test only "configmap:" annotations are references and the key defaults to gpu-scheduling-map"""
+    assert map_reference("configmap:train-map") == ("train-map", "gpu-scheduling-map")
+    assert map_reference("configmap:train-map/ranks") == ("train-map", "ranks")
+    assert map_reference("0=node1:0") is None
+    print("✓ Map reference parsing test passed")
+
+
+def test_cache_follows_list_and_watch_events():
+    """Test the cache resolves references from the list and watch, reading misses directly"""
+    v1 = FakeConfigMapCoreV1(configmaps=[make_configmap("train-map", {'gpu-scheduling-map': "0-7=node[1-2]:0-3"})],
+                             unlabelled=[make_configmap("plain-map", {'ranks': "0=node1:0"}, namespace="team-a")])
+    cache = MapConfigMapCache(KubernetesConfigMapSource(v1))
+    cache.relist()
+
+    assert cache.has_synced() and len(cache) == 1
+    assert cache.resolve("default", "configmap:train-map") == "0-7=node[1-2]:0-3"
+    assert cache.resolve("default", "0=node1:0") == "0=node1:0"
+    assert v1.reads == []
+
+    # Updates and deletions arrive through the watch
+    cache.handle_event('MODIFIED', "default", "train-map", {'gpu-scheduling-map': "0-3=node[1-2]:0-3"}, "11")
+    assert cache.resolve("default", "configmap:train-map") == "0-3=node[1-2]:0-3"
+    v1.configmaps = []
+    cache.handle_event('DELETED', "default", "train-map", {}, "12")
+    assert cache.resolve("default", "configmap:train-map") is None
+    assert cache._resource_version == "12"
+
+    # ConfigMaps without the label are read once and kept for the fetch TTL
+    assert cache.resolve("team-a", "configmap:plain-map/ranks") == "0=node1:0"
+    assert cache.resolve("team-a", "configmap:plain-map/ranks") == "0=node1:0"
+    assert cache.resolve("team-a", "configmap:plain-map") is None
+    assert v1.reads == [("default", "train-map"), ("team-a", "plain-map")]
+    print("✓ Map ConfigMap cache test passed")
+
+
+def test_scheduler_binds_pods_from_configmap_map():
+    """Test a pod whose annotation references a ConfigMap is bound and tracked from the map it holds"""
+    v1 = FakeConfigMapCoreV1(configmaps=[make_configmap("train-map", {'gpu-scheduling-map': "0-3=node[1-2]:0-3"})])
+    scheduler = make_scheduler(v1)
+    scheduler.map_configmaps.relist()
+    reference = {'gpu-scheduling-map': "configmap:train-map"}
+
+    scheduler.process_pod(make_pod("train-2", annotations=reference))
+    assert v1.bindings == [("default", "train-2", "worker2")]
+    assert scheduler.ledger.allocation("uid-train-2") == ("worker2", 0b11)
+
+    scheduler.track_bound_pod(make_pod("train-1", annotations=reference, node_name="worker1", phase="Running"))
+    assert scheduler.ledger.allocation("uid-train-1") == ("worker1", 0b1100)
+
+    # A missing ConfigMap leaves the pod unbound
+    scheduler.process_pod(make_pod("other-0", annotations={'gpu-scheduling-map': "configmap:missing"}))
+    assert len(v1.bindings) == 1
+    print("✓ Scheduler ConfigMap map test passed")
+
+
+if __name__ == "__main__":
+    test_map_reference_parsing()
+    test_cache_follows_list_and_watch_events()
+    test_scheduler_binds_pods_from_configmap_map()
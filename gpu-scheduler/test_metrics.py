@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests for the Prometheus metrics registry
+"""
+
+import multiprocessing
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+from metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_render_text_format():
+    """Test counters, gauges and cumulative histogram buckets render in exposition format"""
+    registry = Registry()
+    binds = Counter('binds_total', 'Binds', registry=registry)
+    depth = Gauge('queue_depth', 'Depth', registry=registry)
+    latency = Histogram('latency_seconds', 'Latency', buckets=(0.1, 1), registry=registry)
+
+    binds.inc()
+    binds.inc(2)
+    depth.set_function(lambda: 7)
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.observe(value)
+
+    text = registry.render()
+    assert "# TYPE binds_total counter\nbinds_total 3\n" in text
+    assert "queue_depth 7\n" in text
+    assert 'latency_seconds_bucket{le="0.1"} 2\n' in text
+    assert 'latency_seconds_bucket{le="1"} 3\n' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 4\n' in text
+    assert "latency_seconds_sum 3.65\n" in text
+    assert "latency_seconds_count 4\n" in text
+    print("✓ Metrics render test passed")
+
+
+def observe_in_child(registry, counter, histogram, slot):
+    registry.use_slot(slot)
+    counter.inc(slot + 1)
+    histogram.observe(0.5)
+
+
+def test_shared_slots_sum_across_processes():
+    """Test updates from forked worker processes are summed in the parent"""
+    registry = Registry()
+    counter = Counter('requests_total', 'Requests', registry=registry)
+    histogram = Histogram('request_seconds', 'Latency', buckets=(1,), registry=registry)
+    counter.inc()
+    registry.share(3)
+
+    mp_context = multiprocessing.get_context('fork')
+    processes = [mp_context.Process(target=observe_in_child, args=(registry, counter, histogram, slot))
+                 for slot in (1, 2)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert counter.value() == 1 + 2 + 3
+    assert histogram.count() == 2
+    print("✓ Metrics shared slot test passed")
+
+
+if __name__ == "__main__":
+    test_render_text_format()
+    test_shared_slots_sum_across_processes()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the watch-backed node cache using fake node objects
+"""
+
+import sys
+import os
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(__file__))
+
+from node_cache import NodeCache
+
+
+def make_node(name, logical_name=None, resource_version="1"):
+    """Build a minimal node object with an optional gpu-node-name label"""
+    labels = {'gpu-node-name': logical_name} if logical_name else {}
+    return SimpleNamespace(metadata=SimpleNamespace(name=name, labels=labels, resource_version=resource_version))
+
+
+class FakeCoreV1:
+    """Fake CoreV1Api that only serves node lists"""
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.list_calls = 0
+
+    def list_node(self, **kwargs):
+        self.list_calls += 1
+        return SimpleNamespace(items=self.nodes, metadata=SimpleNamespace(resource_version="10"))
+
+
+def test_relist_builds_index():
+    """Test initial list populates the label index and readiness signal"""
+    v1 = FakeCoreV1([make_node("worker1", "node1"), make_node("worker2", "node2"), make_node("control-plane")])
+    cache = NodeCache(v1)
+
+    assert not cache.has_synced()
+    cache.relist()
+
+    assert cache.has_synced()
+    assert cache.lookup("node1") == "worker1"
+    assert cache.lookup("node2") == "worker2"
+    assert cache.lookup("node3") is None
+    assert len(cache) == 2
+    assert v1.list_calls == 1
+    print("✓ Node cache relist test passed")
+
+
+def test_watch_events_update_index():
+    """Test watch events add, relabel and remove nodes"""
+    cache = NodeCache(FakeCoreV1([make_node("worker1", "node1")]))
+    cache.relist()
+
+    cache.handle_event({'type': 'ADDED', 'object': make_node("worker3", "node3", "11")})
+    assert cache.lookup("node3") == "worker3"
+
+    cache.handle_event({'type': 'MODIFIED', 'object': make_node("worker1", "node4", "12")})
+    assert cache.lookup("node1") is None
+    assert cache.lookup("node4") == "worker1"
+
+    cache.handle_event({'type': 'DELETED', 'object': make_node("worker3", "node3", "13")})
+    assert cache.lookup("node3") is None
+
+    cache.handle_event({'type': 'BOOKMARK', 'raw_object': {'metadata': {'resourceVersion': "20"}}})
+    assert cache._resource_version == "20"
+    print("✓ Node cache watch event test passed")
+
+
+if __name__ == "__main__":
+    test_relist_builds_index()
+    test_watch_events_update_index()
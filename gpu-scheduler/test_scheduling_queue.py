@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded, deduplicating scheduling queue
+"""
+
+import sys
+import os
+import threading
+sys.path.insert(0, os.path.dirname(__file__))
+
+from scheduling_queue import RetryRateLimiter, SchedulingQueue
+
+
+def test_dedup_by_uid():
+    """Test a UID is queued once while queued or being processed"""
+    queue = SchedulingQueue(maxsize=10)
+
+    assert queue.add("uid-1", "pod-a")
+    assert not queue.add("uid-1", "pod-a-updated")
+    assert len(queue) == 1
+
+    key, item = queue.get()
+    assert (key, item) == ("uid-1", "pod-a-updated")
+
+    # Still processing, so a replayed event is dropped
+    assert not queue.add("uid-1", "pod-a")
+    queue.done("uid-1")
+    assert queue.add("uid-1", "pod-a")
+    print("✓ Queue dedup test passed")
+
+
+def test_backpressure_when_full():
+    """Test add blocks while full and resumes when a worker takes an item"""
+    queue = SchedulingQueue(maxsize=1)
+    assert queue.add("uid-1", "pod-a")
+    assert not queue.add("uid-2", "pod-b", timeout=0.05)
+
+    added = threading.Event()
+
+    def producer():
+        if queue.add("uid-2", "pod-b"):
+            added.set()
+
+    thread = threading.Thread(target=producer)
+    thread.start()
+    assert not added.wait(0.05)
+
+    queue.get()
+    assert added.wait(1)
+    thread.join()
+    print("✓ Queue backpressure test passed")
+
+
+def test_shutdown_releases_workers():
+    """Test workers blocked on get return None after shutdown"""
+    queue = SchedulingQueue()
+    results = []
+    workers = [threading.Thread(target=lambda: results.append(queue.get())) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+
+    queue.shutdown()
+    for worker in workers:
+        worker.join(1)
+
+    assert results == [None, None, None]
+    assert not queue.add("uid-1", "pod-a")
+    print("✓ Queue shutdown test passed")
+
+
+def test_retry_backoff_and_global_rate_limit():
+    """Test per-item backoff doubles up to its cap and a burst of retries is spread out by the bucket"""
+    limiter = RetryRateLimiter(base_delay=0.01, max_delay=0.05, qps=1000, burst=1000)
+    assert [round(limiter.when("uid-1"), 3) for _ in range(5)] == [0.01, 0.02, 0.04, 0.05, 0.05]
+    assert limiter.when("uid-2") == 0.01
+    limiter.forget("uid-1")
+    assert limiter.when("uid-1") == 0.01 and limiter.failures("uid-1") == 1
+
+    # With the bucket empty, each retry waits for the previous ones' tokens
+    limiter = RetryRateLimiter(base_delay=0.001, max_delay=1, qps=10, burst=2)
+    delays = [limiter.when(f"uid-{i}") for i in range(5)]
+    assert delays[:2] == [0.001, 0.001]
+    assert [round(delay, 1) for delay in delays[2:]] == [0.1, 0.2, 0.3]
+
+    # A qps of 0 means no global limit, only the per-item backoff
+    limiter = RetryRateLimiter(base_delay=0.001, max_delay=1, qps=0, burst=1)
+    assert [limiter.when(f"uid-{i}") for i in range(5)] == [0.001] * 5
+    print("✓ Retry rate limiter test passed")
+
+
+def test_rate_limited_retry_waits_and_dedups():
+    """Test a failed item comes back after its delay, once, with the newest object"""
+    queue = SchedulingQueue(rate_limiter=RetryRateLimiter(base_delay=0.05, qps=1000, burst=1000))
+    assert queue.add("uid-1", "pod-a")
+    key, _ = queue.get()
+
+    # The worker still processing uid-1 schedules its retry, then finishes
+    assert queue.add_rate_limited(key, "pod-a") == 0.05
+    queue.done(key)
+    assert queue.add_rate_limited(key, "pod-a") is None
+    assert not queue.add("uid-1", "pod-a-updated")
+    assert len(queue) == 0 and queue.waiting == 1
+
+    assert queue.get(timeout=0.01) is None
+    assert queue.get(timeout=1) == ("uid-1", "pod-a-updated")
+    queue.done("uid-1")
+
+    # Discarded retries and queued items never come back
+    queue.add_rate_limited("uid-1", "pod-a")
+    queue.discard("uid-1")
+    queue.add("uid-2", "pod-b")
+    queue.add("uid-3", "pod-c")
+    queue.discard("uid-2")
+    assert queue.waiting == 0 and len(queue) == 1
+    assert queue.get(timeout=0.1) == ("uid-3", "pod-c")
+    assert queue.get(timeout=0.1) is None
+    print("✓ Rate-limited retry test passed")
+
+
+def test_rejected_retry_leaves_backoff_and_tokens():
+    """Test a retry refused as a duplicate or after shutdown neither counts a failure nor takes a token"""
+    limiter = RetryRateLimiter(base_delay=0.01, qps=1, burst=2)
+    queue = SchedulingQueue(rate_limiter=limiter)
+    assert queue.add_rate_limited("uid-1", "pod-a") == 0.01
+    assert queue.add_rate_limited("uid-1", "pod-a") is None
+    assert limiter.failures("uid-1") == 1
+
+    queue.shutdown()
+    assert queue.add_rate_limited("uid-2", "pod-b") is None
+    assert limiter.failures("uid-2") == 0
+    # One token is left for the next failure, so it waits only for its own backoff
+    assert limiter.when("uid-3") == 0.01
+    print("✓ Rejected retry test passed")
+
+
+def test_retry_ready_while_processing_waits_for_done():
+    """Test a retry that becomes ready before its worker finishes is queued on done"""
+    queue = SchedulingQueue(rate_limiter=RetryRateLimiter(base_delay=0.001))
+    queue.add("uid-1", "pod-a")
+    queue.get()
+    queue.add_rate_limited("uid-1", "pod-a")
+
+    assert queue.get(timeout=0.05) is None
+    queue.done("uid-1")
+    assert queue.get(timeout=0.05) == ("uid-1", "pod-a")
+    print("✓ Retry during processing test passed")
+
+
+if __name__ == "__main__":
+    test_dedup_by_uid()
+    test_backpressure_when_full()
+    test_shutdown_releases_workers()
+    test_retry_backoff_and_global_rate_limit()
+    test_rate_limited_retry_waits_and_dedups()
+    test_rejected_retry_leaves_backoff_and_tokens()
+    test_retry_ready_while_processing_waits_for_done()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Tests for consistent hashing, shard membership and sharded scheduling
+"""
+
+import copy
+import sys
+import os
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(__file__))
+
+from kubernetes.client.rest import ApiException
+
+from shard_membership import MEMBER_LABEL, ShardMembership
+from sharding import assign_shards, pod_dict_shard, pod_shard, shard_selector
+from test_leader_election import FakeCoordinationV1
+from test_scheduler import FakeCoreV1, make_pod, make_scheduler
+
+
+SHARD_COUNT = 8
+
+
+class FakeShardCoordinationV1(FakeCoordinationV1):
+    """FakeCoordinationV1 that can also list Leases by label and delete them"""
+
+    def list_namespaced_lease(self, namespace, label_selector='', **kwargs):
+        key, value = label_selector.split('=')
+        items = [copy.deepcopy(lease) for (lease_namespace, _), lease in self.leases.items()
+                 if lease_namespace == namespace and (lease.metadata.labels or {}).get(key) == value]
+        return SimpleNamespace(items=items)
+
+    def delete_namespaced_lease(self, name, namespace, **kwargs):
+        if self.leases.pop((namespace, name), None) is None:
+            raise ApiException(status=404)
+
+
+def make_membership(api, identity, **kwargs):
+    return ShardMembership(api, "gpu-scheduler", "default", identity, SHARD_COUNT, **kwargs)
+
+
+def test_assignment_moves_only_affected_shards():
+    """Test every shard has one owner and a new member only takes shards from others"""
+    before = assign_shards(["sched-a", "sched-b", "sched-c"], 64)
+    assert sorted(shard for shards in before.values() for shard in shards) == list(range(64))
+    assert all(len(shards) >= 10 for shards in before.values())
+
+    after = assign_shards(["sched-a", "sched-b", "sched-c", "sched-d"], 64)
+    for member in ("sched-a", "sched-b", "sched-c"):
+        assert after[member] <= before[member]
+    assert after["sched-d"] == set(range(64)) - set().union(*(after[m] for m in ("sched-a", "sched-b", "sched-c")))
+    assert shard_selector({3, 1}) == "gpu-shard in (1,3)" and shard_selector(set()) is None
+    print("✓ Shard assignment test passed")
+
+
+def test_webhook_and_scheduler_agree_on_shards():
+    """Test a pod's shard is the same from its API dict and its V1Pod, with gangs kept together"""
+    owner = {'kind': 'StatefulSet', 'name': 'train', 'controller': True}
+    pod = {'metadata': {'namespace': 'team-a', 'ownerReferences': [owner]}}
+    v1_pod = SimpleNamespace(metadata=SimpleNamespace(
+        namespace='team-a', labels=None, annotations={},
+        owner_references=[SimpleNamespace(kind='StatefulSet', name='train', controller=True)]))
+    for shard_by in ('namespace', 'owner'):
+        assert pod_dict_shard(pod, 64, shard_by) == pod_shard(v1_pod, 64, shard_by)
+
+    # Members of a gang share a shard whatever their owner, and a shard label wins
+    gang_pods = [{'metadata': {'namespace': 'team-a', 'annotations': {'gpu-gang': 'job-1'},
+                               'ownerReferences': [dict(owner, name=f"worker-{i}")]}} for i in range(5)]
+    assert len({pod_dict_shard(gang_pod, 64, 'owner') for gang_pod in gang_pods}) == 1
+    v1_pod.metadata.labels = {'gpu-shard': '7'}
+    assert pod_shard(v1_pod, 64) == 7
+    print("✓ Shard agreement test passed")
+
+
+def test_membership_rebalances_on_join_expiry_and_leave():
+    """Test members split the shards, take over a silent member's shards and leave cleanly"""
+    api = FakeShardCoordinationV1()
+    changes = []
+    a = make_membership(api, "sched-a", on_change=changes.append)
+    b = make_membership(api, "sched-b")
+
+    assert a.sync() and changes == [set(range(SHARD_COUNT))]
+    assert b.sync() and b.members() == ["sched-a", "sched-b"]
+    assert a.sync() and a.members() == ["sched-a", "sched-b"]
+    assert a.owned_shards() | b.owned_shards() == set(range(SHARD_COUNT))
+    assert not a.owned_shards() & b.owned_shards()
+    assert a.owns_node("worker1") != b.owns_node("worker1")
+    assert api.leases[("default", "gpu-scheduler-shard-sched-a")].metadata.labels == {MEMBER_LABEL: "gpu-scheduler"}
+
+    # B stops renewing: once its lease is unchanged for the lease duration A takes everything and removes it
+    assert not a.sync()
+    name = "gpu-scheduler-shard-sched-b"
+    a._observed[name] = (a._observed[name][0], a._observed[name][1] - 16)
+    assert a.sync() and a.owned_shards() == set(range(SHARD_COUNT))
+    assert ("default", name) not in api.leases
+
+    # Leaving deletes the lease, so the others rebalance on their next round
+    b.sync()
+    a.sync()
+    b.release()
+    assert a.sync() and a.members() == ["sched-a"]
+    print("✓ Shard membership test passed")
+
+
+def test_sharded_scheduler_handles_only_owned_shards():
+    """Test a shard member lists, queues and binds only its own shards but tracks every bound pod"""
+    api = FakeShardCoordinationV1()
+    make_membership(api, "sched-b").sync()
+    labelled = [make_pod(f"app-{shard}", labels={'gpu-shard': str(shard)}) for shard in range(SHARD_COUNT)]
+    # Bound by another member to the devices app-0 is mapped to
+    other = make_pod("other-0", annotations={'gpu-assigned-devices': "0,1"}, node_name="worker1",
+                     phase="Running", labels={'gpu-shard': "x"})
+    v1 = FakeCoreV1(pods=labelled + [other])
+    scheduler = make_scheduler(v1, shard_count=SHARD_COUNT, identity="sched-a", coordination_v1=api)
+
+    scheduler.sharding.sync()
+    owned = scheduler.owned_shards
+    assert owned and owned != set(range(SHARD_COUNT))
+    assert scheduler.reshard.is_set()
+
+    scheduler.relist_pods()
+    scheduler.relist_bound_pods()
+    assert v1.label_selectors[0] == shard_selector(owned)
+    assert set(scheduler.pending_pods) == {f"uid-app-{shard}" for shard in owned}
+    assert len(scheduler.queue) == len(owned)
+    assert scheduler.ledger.allocation("uid-other-0") == ("worker1", 0b11)
+
+    # Pods of other shards are left to their owner, even when queued before a rebalance
+    unowned = next(pod for pod in labelled if int(pod.metadata.labels['gpu-shard']) not in owned)
+    assert not scheduler.owns_pod(unowned)
+    assert scheduler.owns_pod(labelled[min(owned)])
+
+    # The ledger covers pods bound by other members: app-0 conflicts with other-0 on worker1
+    scheduler.process_pod(labelled[0])
+    assert ("default", "app-0", "worker1") not in v1.bindings
+
+    # Bound pod events arrive as raw JSON
+    raw = {'metadata': {'name': "other-1", 'uid': "uid-other-1", 'resourceVersion': "120",
+                        'annotations': {'gpu-assigned-devices': "4"}},
+           'spec': {'nodeName': "worker2"}, 'status': {'phase': "Running"}}
+    scheduler.handle_bound_pod_event({'type': 'ADDED', 'raw_object': raw})
+    assert scheduler.ledger.allocation("uid-other-1") == ("worker2", 0b10000)
+    scheduler.handle_bound_pod_event({'type': 'DELETED', 'raw_object': raw})
+    assert scheduler.ledger.allocation("uid-other-1") is None
+    assert scheduler.bound_resource_version == "120"
+    print("✓ Sharded scheduler test passed")
+
+
+def test_sharded_placement_falls_back_to_other_members_nodes():
+    """Test a shard member places on its own nodes first and on other members' nodes once its own are full"""
+    api = FakeShardCoordinationV1()
+    make_membership(api, "sched-b").sync()
+    v1 = FakeCoreV1(nodes={f"worker{i}": f"node{i}" for i in range(1, 9)})
+    scheduler = make_scheduler(v1, shard_count=SHARD_COUNT, identity="sched-a", coordination_v1=api)
+    scheduler.node_cache.default_gpu_count = 2
+    scheduler.node_cache.relist()
+    scheduler.sharding.sync()
+    owned = [name for name in v1.nodes if scheduler.sharding.owns_node(name)]
+    assert owned and len(owned) < len(v1.nodes)
+
+    pod = make_pod("train-0", annotations={'gpu-count': "2"})
+    scheduler.process_pod(pod)
+    assert v1.bindings[-1] == ("default", "train-0", v1.patches[-1][2]['gpu-assigned-node'])
+    assert v1.patches[-1][2]['gpu-assigned-node'] in owned
+
+    # Every device on this member's nodes is taken, but other members' nodes have room
+    for name in owned:
+        scheduler.ledger.allocate(f"uid-full-{name}", name, 0b11, f"full-{name}")
+    scheduler.process_pod(make_pod("train-1", annotations={'gpu-count': "2"}))
+    node_name = v1.patches[-1][2]['gpu-assigned-node']
+    assert node_name not in owned
+    assert v1.bindings[-1] == ("default", "train-1", node_name)
+    assert scheduler.ledger.allocation("uid-train-1") == (node_name, 0b11)
+    print("✓ Sharded placement fallback test passed")
+
+
+if __name__ == "__main__":
+    test_assignment_moves_only_affected_shards()
+    test_webhook_and_scheduler_agree_on_shards()
+    test_membership_rebalances_on_join_expiry_and_leave()
+    test_sharded_scheduler_handles_only_owned_shards()
+    test_sharded_placement_falls_back_to_other_members_nodes()
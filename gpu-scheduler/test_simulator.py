@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline simulation of cluster snapshots
+"""
+
+import json
+import sys
+import os
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+import yaml
+
+from simulator import load_snapshot, simulate, synthetic_nodes
+
+
+def make_node(name, logical_name, gpus=4):
+    return {'kind': 'Node', 'metadata': {'name': name, 'labels': {'gpu-node-name': logical_name}},
+            'status': {'capacity': {'nvidia.com/gpu': str(gpus)}}}
+
+
+def make_pod(name, annotations=None, node_name=None, phase='Pending'):
+    return {'kind': 'Pod', 'metadata': {'name': name, 'namespace': 'default', 'annotations': annotations or {}},
+            'spec': {'schedulerName': 'gpu-scheduler', 'nodeName': node_name}, 'status': {'phase': phase}}
+
+
+def write_snapshot():
+    """Nodes and a ConfigMap as a JSON List, pods as multi-document YAML"""
+    snapshot_dir = tempfile.mkdtemp()
+    train_map = "0=node1:0,1\n1=node1:0,1\n2=node2:0,1\n3=node3:0\nbad line"
+    with open(os.path.join(snapshot_dir, 'cluster.json'), 'w') as f:
+        json.dump({'kind': 'List', 'items': [
+            make_node('worker1', 'node1'), make_node('worker2', 'node2'),
+            {'kind': 'ConfigMap', 'metadata': {'name': 'train-map', 'namespace': 'default'},
+             'data': {'gpu-scheduling-map': train_map}}
+        ]}, f)
+    gang = {'gpu-gang': 'ring', 'gpu-gang-size': '2', 'gpu-scheduling-map': "0=node2:2\n1=node2:3"}
+    pods = [
+        make_pod('train-0', {'gpu-scheduling-map': "configmap:train-map"}, node_name='worker1', phase='Running'),
+        make_pod('train-1', {'gpu-scheduling-map': "configmap:train-map"}),
+        make_pod('train-2', {'gpu-scheduling-map': "configmap:train-map"}),
+        make_pod('train-3', {'gpu-scheduling-map': "configmap:train-map"}),
+        make_pod('ring-0', gang),
+        make_pod('ring-1', gang),
+        make_pod('notebook', {'gpu-count': '2'}),
+        make_pod('web'),
+        make_pod('done', {'gpu-scheduling-map': "0=node1:2,3"}, node_name='worker1', phase='Succeeded'),
+    ]
+    with open(os.path.join(snapshot_dir, 'pods.yaml'), 'w') as f:
+        yaml.safe_dump_all(pods, f)
+    return snapshot_dir
+
+
+def test_simulation_reports_placements_and_reasons():
+    """Test a snapshot is placed with the scheduler's own rules and unplaced pods are explained"""
+    snapshot = load_snapshot([write_snapshot()])
+    assert [len(snapshot[kind]) for kind in ('Node', 'Pod', 'ConfigMap')] == [2, 9, 1]
+
+    report = simulate(snapshot)
+    assert (report['pending'], report['already_bound'], report['scheduled']) == (7, 1, 4)
+    placements = {entry['pod']: (entry['node'], entry['devices']) for entry in report['placements']}
+    assert placements == {'train-2': ('worker2', '0,1'), 'ring-0': ('worker2', '2'), 'ring-1': ('worker2', '3'),
+                          'notebook': ('worker1', '2,3')}
+
+    reasons = {entry['pod']: entry for entry in report['unscheduled_pods']}
+    assert reasons['train-1']['reason'] == "device conflict"
+    assert reasons['train-1']['held_by'] == ['train-0'] and reasons['train-1']['devices'] == '0,1'
+    assert reasons['train-3']['reason'] == "no node labelled gpu-node-name=node3"
+    assert reasons['web']['reason'] == "no gpu-scheduling-map or gpu-count annotation"
+    assert report['conflicts'] == 1
+    assert [error['line'] for error in report['map_errors']] == ["bad line"]
+    assert report['node_usage'] == {'worker1': {'gpus': 4, 'allocated': 4}, 'worker2': {'gpus': 4, 'allocated': 4}}
+    print("✓ Simulation report test passed")
+
+
+def test_simulation_handles_large_snapshots_quickly():
+    """Test tens of thousands of pending pods are placed in a few seconds, with added nodes for planning"""
+    pods = []
+    for job in range(200):
+        gpu_map = f"0-99=job{job}-[0-49]:0-7"
+        pods.extend(make_pod(f"job{job}-{i}", {'gpu-scheduling-map': gpu_map}) for i in range(100))
+    nodes = []
+    for job in range(200):
+        nodes.extend(make_node(f"job{job}-worker{i}", f"job{job}-{i}", gpus=8) for i in range(50))
+    snapshot = {'Node': nodes, 'Pod': pods, 'ConfigMap': []}
+
+    started = time.monotonic()
+    report = simulate(snapshot)
+    elapsed = time.monotonic() - started
+    assert report['scheduled'] == 20000 and report['unscheduled'] == 0
+    assert report['gpus_allocated'] == report['gpus'] == 80000
+    assert elapsed < 30
+
+    # Auto-placed pods that do not fit are reported, and fit once nodes are added
+    snapshot = {'Node': [], 'Pod': [make_pod(f"batch-{i}", {'gpu-count': '4'}) for i in range(10)], 'ConfigMap': []}
+    assert simulate(snapshot)['unscheduled_pods'][0]['reason'] == "no node has 4 free GPUs"
+    snapshot['Node'] = synthetic_nodes(5, gpus=8)
+    assert simulate(snapshot)['scheduled'] == 10
+    print(f"✓ Large simulation test passed ({report['decisions_per_second']:.0f} decisions/s)")
+
+
+if __name__ == "__main__":
+    test_simulation_reports_placements_and_reasons()
+    test_simulation_handles_large_snapshots_quickly()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for the scheduler and webhook startup path
+"""
+
+import json
+import shutil
+import subprocess
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+
+
+def modules_after_import(module):
+    """Names of the modules loaded by importing `module` in a fresh interpreter"""
+    code = (f"import sys; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); "
+            f"import {module}; import json; print(json.dumps(sorted(sys.modules)))")
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    return set(json.loads(output))
+
+
+def test_scheduler_import_skips_kubeconfig_loader():
+    """Test importing the scheduler loads the typed client but not the kubeconfig and auth plugins"""
+    modules = modules_after_import('scheduler')
+    assert 'kubernetes.client' in modules
+    assert 'kubernetes.config.incluster_config' in modules
+    for unused in ('kubernetes.config.kube_config', 'kubernetes.dynamic', 'kubernetes.stream', 'google.auth'):
+        assert unused not in modules, unused
+    print("✓ Scheduler import test passed")
+
+
+def test_deferred_kubernetes_package_stays_complete():
+    """Test code importing the kubernetes package after the scheduler still sees everything its __init__ defines"""
+    code = (f"import sys; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); "
+            f"import scheduler, kubernetes; from kubernetes import config; "
+            f"print(config.load_kube_config.__name__, config.ConfigException.__name__, kubernetes.dynamic.__name__)")
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    assert output.split() == ['load_kube_config', 'ConfigException', 'kubernetes.dynamic']
+    print("✓ Deferred kubernetes package test passed")
+
+
+def test_webhook_import_skips_kubernetes():
+    """Test the webhook never imports the Kubernetes client or multiprocessing for one worker"""
+    modules = modules_after_import('webhook_server')
+    assert not any(name == 'kubernetes' or name.startswith('kubernetes.') for name in modules)
+    assert 'multiprocessing' not in modules
+    print("✓ Webhook import test passed")
+
+
+def test_startup_benchmark_measures_cold_starts():
+    """Test the startup benchmark reports every measurement against its budget"""
+    if not shutil.which('openssl'):
+        pytest.skip("openssl not available")
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'benchmarks'))
+    from types import SimpleNamespace
+    from bench_startup import DEFAULT_BUDGETS_MS, run_benchmark
+
+    args = SimpleNamespace(runs=1, timeout=30, scheduler_import_budget=60000, webhook_import_budget=60000,
+                           first_bind_budget=60000, first_admission_budget=0)
+    result = run_benchmark(args)
+
+    assert set(result['milliseconds']) == set(DEFAULT_BUDGETS_MS)
+    assert all(value['median'] > 0 for value in result['milliseconds'].values())
+    assert result['over_budget'] == ['first_admission']
+    print("✓ Startup benchmark test passed")
+
+
+if __name__ == "__main__":
+    test_scheduler_import_skips_kubeconfig_loader()
+    test_deferred_kubernetes_package_stays_complete()
+    test_webhook_import_skips_kubernetes()
+    test_startup_benchmark_measures_cold_starts()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Tests for the admission webhook served over a local TLS connection
+"""
+
+import sys
+import os
+import base64
+import http.client
+import json
+import shutil
+import socket
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+
+from webhook_server import (
+    TLSThreadingHTTPServer, WebhookHandler, WebhookServer, build_patch, container_env_shape, encoded_patch,
+    fast_path_response
+)
+from map_configmaps import MapConfigMapCache
+from sharding import pod_dict_shard
+
+
+def make_admission_review(uid, pod_name, scheduler_name="gpu-scheduler", gpu_map="0=node1:0,1\n1=node2:2"):
+    """Build a minimal AdmissionReview for a pod CREATE"""
+    pod = {
+        'metadata': {'name': pod_name, 'generateName': pod_name.rsplit('-', 1)[0] + '-'},
+        'spec': {'schedulerName': scheduler_name, 'containers': [{'name': 'app', 'image': 'busybox'}]}
+    }
+    if gpu_map:
+        pod['metadata']['annotations'] = {'gpu-scheduling-map': gpu_map}
+    return {
+        'apiVersion': 'admission.k8s.io/v1',
+        'kind': 'AdmissionReview',
+        'request': {'uid': uid, 'operation': 'CREATE', 'object': pod}
+    }
+
+
+def test_fast_path_skips_non_gpu_pods():
+    """Test pods without our scheduler or annotation are allowed without a full decode"""
+    for review in (make_admission_review("uid-1", "web-0", scheduler_name="default-scheduler"),
+                   make_admission_review("uid-1", "app-0", gpu_map=None)):
+        response = fast_path_response(json.dumps(review, separators=(',', ':')).encode())
+        assert json.loads(response) == {
+            'apiVersion': 'admission.k8s.io/v1',
+            'kind': 'AdmissionReview',
+            'response': {'uid': "uid-1", 'allowed': True}
+        }
+    
+    # GPU pods, and reviews whose UID is not where the API server puts it, need a full decode
+    assert fast_path_response(json.dumps(make_admission_review("uid-1", "app-0")).encode()) is None
+    assert fast_path_response(b'{"request": {"kind": {}, "uid": "uid-1"}}') is None
+    print("✓ Webhook fast path test passed")
+
+
+def test_patch_from_container_shape():
+    """Test patches cover missing, existing and absent CUDA_VISIBLE_DEVICES and are reused"""
+    pod = {'spec': {'containers': [
+        {'name': 'no-env'},
+        {'name': 'other-env', 'env': [{'name': 'FOO', 'value': 'bar'}]},
+        {'name': 'cuda-env', 'env': [{'name': 'FOO', 'value': 'bar'}, {'name': 'CUDA_VISIBLE_DEVICES', 'value': ''}]}
+    ]}}
+    
+    shape = container_env_shape(pod)
+    assert build_patch(shape, "0,1") == [
+        {'op': 'add', 'path': '/spec/containers/0/env', 'value': [{'name': 'CUDA_VISIBLE_DEVICES', 'value': '0,1'}]},
+        {'op': 'add', 'path': '/spec/containers/1/env/-', 'value': {'name': 'CUDA_VISIBLE_DEVICES', 'value': '0,1'}},
+        {'op': 'replace', 'path': '/spec/containers/2/env/1/value', 'value': '0,1'}
+    ]
+    
+    encoded_patch.cache_clear()
+    first = encoded_patch(shape, "0,1")
+    assert json.loads(base64.b64decode(first)) == build_patch(shape, "0,1")
+    assert encoded_patch(container_env_shape(pod), "0,1") is first
+    assert encoded_patch.cache_info().hits == 1
+    assert encoded_patch((), "0,1") == ''
+    print("✓ Webhook patch cache test passed")
+
+
+def test_auto_placed_pods_read_devices_from_annotation():
+    """Test pods requesting a GPU count get CUDA_VISIBLE_DEVICES from the assigned-devices annotation"""
+    review = make_admission_review("uid-1", "train-", gpu_map=None)
+    review['request']['object']['metadata'] = {'generateName': "train-", 'annotations': {'gpu-count': "2"}}
+    assert fast_path_response(json.dumps(review).encode()) is None
+    
+    response = WebhookHandler.__new__(WebhookHandler).mutate_pod(review)
+    patch = json.loads(base64.b64decode(response['response']['patch']))
+    assert patch == [{'op': 'add', 'path': '/spec/containers/0/env', 'value': [{
+        'name': 'CUDA_VISIBLE_DEVICES',
+        'valueFrom': {'fieldRef': {'fieldPath': "metadata.annotations['gpu-assigned-devices']"}}
+    }]}]
+    print("✓ Webhook auto placement patch test passed")
+
+
+def test_shard_label_added_when_sharded():
+    """Test GPU pods are labelled with the shard of their request namespace when sharding is on"""
+    review = make_admission_review("uid-1", "app-0")
+    review['request']['namespace'] = "team-a"
+    handler = WebhookHandler.__new__(WebhookHandler)
+    handler.shard_count = 64
+    
+    patch = json.loads(base64.b64decode(handler.mutate_pod(review)['response']['patch']))
+    shard = str(pod_dict_shard({'metadata': {'namespace': "team-a"}}, 64))
+    assert patch[-1] == {'op': 'add', 'path': '/metadata/labels', 'value': {'gpu-shard': shard}}
+    
+    review['request']['object']['metadata']['labels'] = {'app': "train"}
+    patch = json.loads(base64.b64decode(handler.mutate_pod(review)['response']['patch']))
+    assert patch[-1] == {'op': 'add', 'path': '/metadata/labels/gpu-shard', 'value': shard}
+    
+    # Unsharded webhooks leave labels alone
+    response = WebhookHandler.__new__(WebhookHandler).mutate_pod(review)
+    assert all(op['path'].startswith('/spec/') for op in json.loads(base64.b64decode(response['response']['patch'])))
+    print("✓ Webhook shard label test passed")
+
+
+class FakeConfigMapSource:
+    """ConfigMap source serving a fixed set of ConfigMaps"""
+    
+    def __init__(self, configmaps):
+        self.configmaps = configmaps
+    
+    def get(self, namespace, name):
+        return self.configmaps.get((namespace, name))
+
+
+def test_configmap_map_resolved_from_request_namespace():
+    """Test a "configmap:" annotation is resolved in the request's namespace through the cache"""
+    review = make_admission_review("uid-1", "train-5", gpu_map="configmap:train-map")
+    review['request']['namespace'] = "team-a"
+    handler = WebhookHandler.__new__(WebhookHandler)
+    handler.map_configmaps = MapConfigMapCache(FakeConfigMapSource(
+        {("team-a", "train-map"): {'gpu-scheduling-map': "0-7=node[1-2]:0-3"}}))
+    
+    patch = json.loads(base64.b64decode(handler.mutate_pod(review)['response']['patch']))
+    assert patch[0]['value'] == [{'name': 'CUDA_VISIBLE_DEVICES', 'value': "1"}]
+    
+    # Unresolvable references and disabled ConfigMap maps leave the pod unpatched
+    review['request']['namespace'] = "team-b"
+    assert 'patch' not in handler.mutate_pod(review)['response']
+    assert 'patch' not in WebhookHandler.__new__(WebhookHandler).mutate_pod(review)['response']
+    print("✓ Webhook ConfigMap map test passed")
+
+
+@pytest.fixture(scope="module")
+def webhook_server():
+    """Serve the webhook on an ephemeral port with a throwaway self-signed certificate"""
+    if not shutil.which('openssl'):
+        pytest.skip("openssl not available")
+
+    cert_dir = tempfile.mkdtemp()
+    cert_file = os.path.join(cert_dir, 'tls.crt')
+    key_file = os.path.join(cert_dir, 'tls.key')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj', '/CN=localhost',
+         '-keyout', key_file, '-out', cert_file],
+        check=True, capture_output=True
+    )
+
+    context = WebhookServer(port=0, cert_file=cert_file, key_file=key_file).create_ssl_context()
+    server = TLSThreadingHTTPServer(('127.0.0.1', 0), WebhookHandler, context)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server.server_address[1]
+
+    server.shutdown()
+    server.server_close()
+    shutil.rmtree(cert_dir)
+
+
+def post(connection, review):
+    """POST an AdmissionReview on an open connection and decode the response"""
+    body = json.dumps(review).encode()
+    connection.request('POST', '/mutate', body=body, headers={'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    assert response.status == 200
+    return json.loads(response.read())
+
+
+def test_keep_alive_serves_multiple_reviews(webhook_server):
+    """Test several AdmissionReviews are answered on one persistent connection"""
+    context = ssl._create_unverified_context()
+    connection = http.client.HTTPSConnection('127.0.0.1', webhook_server, context=context)
+
+    first = post(connection, make_admission_review("uid-0", "app-0"))
+    sock = connection.sock
+    second = post(connection, make_admission_review("uid-1", "app-1"))
+    other = post(connection, make_admission_review("uid-2", "web-0", scheduler_name="default-scheduler"))
+
+    # Same socket means the connection was kept alive between requests
+    assert connection.sock is sock
+    connection.close()
+
+    patch = json.loads(base64.b64decode(first['response']['patch']))
+    assert first['response']['uid'] == "uid-0"
+    assert patch == [{'op': 'add', 'path': '/spec/containers/0/env',
+                      'value': [{'name': 'CUDA_VISIBLE_DEVICES', 'value': '0,1'}]}]
+    assert json.loads(base64.b64decode(second['response']['patch']))[0]['value'][0]['value'] == '2'
+    assert other['response'] == {'uid': "uid-2", 'allowed': True}
+    print("✓ Webhook keep-alive test passed")
+
+
+def test_concurrent_connections(webhook_server):
+    """Test connections from several clients are served concurrently"""
+    context = ssl._create_unverified_context()
+    results = []
+
+    def client(i):
+        connection = http.client.HTTPSConnection('127.0.0.1', webhook_server, context=context)
+        for j in range(5):
+            response = post(connection, make_admission_review(f"uid-{i}-{j}", "app-0"))
+            results.append(response['response']['uid'])
+        connection.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert sorted(results) == sorted(f"uid-{i}-{j}" for i in range(8) for j in range(5))
+    print("✓ Webhook concurrency test passed")
+
+
+def test_stalled_handshake_is_dropped(webhook_server, monkeypatch):
+    """Test a client that connects and never sends a TLS handshake is disconnected after the idle timeout"""
+    monkeypatch.setattr(WebhookHandler, 'timeout', 0.2)
+    with socket.create_connection(('127.0.0.1', webhook_server), timeout=5) as sock:
+        started = time.monotonic()
+        assert sock.recv(1) == b''
+        assert time.monotonic() - started < 3
+    print("✓ Webhook stalled handshake test passed")
+
+
+def test_load_harness_replays_mixed_corpus():
+    """Test the load harness drives a local webhook with every kind of review in the mix"""
+    if not shutil.which('openssl'):
+        pytest.skip("openssl not available")
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'benchmarks'))
+    from types import SimpleNamespace
+    from bench_webhook import DEFAULT_MIX, run_benchmark
+
+    args = SimpleNamespace(requests=400, concurrency=4, client_processes=1, workers=1, corpus=None,
+                           corpus_size=200, seed=1)
+    result = run_benchmark(args)
+
+    assert result['errors'] == 0
+    assert set(result['latency_ms_by_kind']) == set(DEFAULT_MIX)
+    assert result['server_memory_kib']['rss'] > 0
+    print("✓ Webhook load harness test passed")
@@ -4,20 +4,231 @@ Mutating Admission Webhook for GPU Environment Variable Injection
 """
 
 import base64
+import functools
 import json
 import logging
+import os
+import re
 import ssl
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from typing import Dict, List, Optional, Tuple
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+
+import metrics
+from debug import handle_debug_request
+from health_server import HealthServer
+from log_pipeline import setup_logging_from_env
+from map_configmaps import InClusterConfigMapSource, MapConfigMapCache, map_reference
+from metrics import Counter, Histogram
+from scheduling_map import ASSIGNED_DEVICES_ANNOTATION, GPU_COUNT_ANNOTATION, compile_scheduling_map
+from sharding import SHARD_BY_NAMESPACE, SHARD_LABEL, pod_dict_shard
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_loads(data: bytes):
+    """Decode JSON with orjson when installed, falling back to the json module"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj) -> bytes:
+    """Encode JSON to bytes with orjson when installed, falling back to the json module"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
+# The API server serializes AdmissionRequest with `uid` as its first field,
+# and `"request"` can only appear unescaped as a key, so the first match is
+# the top-level request UID.
+REQUEST_UID_PATTERN = re.compile(rb'"request"\s*:\s*\{\s*"uid"\s*:\s*"([^"\\]*)"')
+
+# Pre-serialized "allowed, no patch" response around the request UID
+ALLOWED_RESPONSE_PREFIX = b'{"apiVersion":"admission.k8s.io/v1","kind":"AdmissionReview","response":{"uid":"'
+ALLOWED_RESPONSE_SUFFIX = b'","allowed":true}}'
+
+REQUEST_SECONDS = Histogram('gpu_webhook_request_seconds', 'Time to read, handle and answer an AdmissionReview')
+FAST_PATH_REQUESTS = Counter('gpu_webhook_fast_path_requests_total',
+                             'AdmissionReviews answered without decoding the request body')
+PATCHED_PODS = Counter('gpu_webhook_patched_pods_total', 'Pods given a CUDA_VISIBLE_DEVICES patch')
+REQUEST_ERRORS = Counter('gpu_webhook_request_errors_total', 'AdmissionReviews that failed with an error')
+
+
+def fast_path_response(body: bytes, scheduler_name: str = 'gpu-scheduler') -> Optional[bytes]:
+    """
+    Answer AdmissionReviews for pods that cannot need a patch without decoding them
+
+    A pod is only mutated when its schedulerName is ours and it carries a
+    gpu-scheduling-map or gpu-count annotation, so a body missing either the
+    scheduler name or both annotations is allowed as-is using just the
+    request UID. Returns None when the full review has to be decoded.
+    """
+    if (b'"gpu-scheduling-map"' in body or b'"gpu-count"' in body) and f'"{scheduler_name}"'.encode() in body:
+        return None
+    
+    match = REQUEST_UID_PATTERN.search(body)
+    if not match:
+        return None
+    
+    return ALLOWED_RESPONSE_PREFIX + match.group(1) + ALLOWED_RESPONSE_SUFFIX
+
+
+# Maximum number of distinct encoded patches kept in memory
+MAX_CACHED_PATCHES = 1024
+
+# Container shapes: no env list, env list without CUDA_VISIBLE_DEVICES
+NO_ENV = -2
+NO_CUDA_ENV = -1
+
+
+def container_env_shape(pod: dict) -> Tuple[int, ...]:
+    """
+    Describe what the patch has to do for each container
+
+    Each entry is the index of the container's existing CUDA_VISIBLE_DEVICES
+    variable, NO_CUDA_ENV if it has env but not that variable, or NO_ENV if
+    it has no env list. Replicas of a workload share the same shape.
+    """
+    shape = []
+    for container in pod.get('spec', {}).get('containers', []):
+        env = container.get('env') or []
+        if not env:
+            shape.append(NO_ENV)
+            continue
+        
+        for j, env_var in enumerate(env):
+            if env_var.get('name') == 'CUDA_VISIBLE_DEVICES':
+                shape.append(j)
+                break
+        else:
+            shape.append(NO_CUDA_ENV)
+    return tuple(shape)
+
+
+def build_patch(shape: Tuple[int, ...], cuda_devices: Optional[str]) -> List[dict]:
+    """
+    Build the JSON patch setting CUDA_VISIBLE_DEVICES for a container shape
+
+    With `cuda_devices` of None the variable is read from the assigned-devices
+    annotation through the downward API, which the scheduler sets on
+    automatically placed pods before binding them.
+    """
+    if cuda_devices is None:
+        env_var = {
+            'name': 'CUDA_VISIBLE_DEVICES',
+            'valueFrom': {'fieldRef': {'fieldPath': f"metadata.annotations['{ASSIGNED_DEVICES_ANNOTATION}']"}}
+        }
+    else:
+        env_var = {'name': 'CUDA_VISIBLE_DEVICES', 'value': cuda_devices}
+    
+    patches = []
+    for i, cuda_index in enumerate(shape):
+        if cuda_index >= 0 and cuda_devices is not None:
+            # Update existing environment variable
+            patches.append({
+                'op': 'replace',
+                'path': f'/spec/containers/{i}/env/{cuda_index}/value',
+                'value': cuda_devices
+            })
+        elif cuda_index >= 0:
+            # Replace existing environment variable with the downward API reference
+            patches.append({
+                'op': 'replace',
+                'path': f'/spec/containers/{i}/env/{cuda_index}',
+                'value': env_var
+            })
+        elif cuda_index == NO_ENV:
+            # Initialize env array if it doesn't exist
+            patches.append({
+                'op': 'add',
+                'path': f'/spec/containers/{i}/env',
+                'value': [env_var]
+            })
+        else:
+            # Append to existing env array
+            patches.append({
+                'op': 'add',
+                'path': f'/spec/containers/{i}/env/-',
+                'value': env_var
+            })
+    return patches
+
+
+def shard_label_patch(shard: int, has_labels: bool) -> dict:
+    """JSON patch operation labelling a pod with its scheduler shard"""
+    if has_labels:
+        return {'op': 'add', 'path': f'/metadata/labels/{SHARD_LABEL}', 'value': str(shard)}
+    return {'op': 'add', 'path': '/metadata/labels', 'value': {SHARD_LABEL: str(shard)}}
+
+
+@functools.lru_cache(maxsize=MAX_CACHED_PATCHES)
+def encoded_patch(shape: Tuple[int, ...], cuda_devices: Optional[str], shard: Optional[int] = None,
+                  has_labels: bool = False) -> str:
+    """Return the base64-encoded JSON patch for a container shape, device string and optional shard label"""
+    patches = build_patch(shape, cuda_devices)
+    if shard is not None:
+        patches.append(shard_label_patch(shard, has_labels))
+    if not patches:
+        return ''
+    return base64.b64encode(json_dumps(patches)).decode()
 
 
 class WebhookHandler(BaseHTTPRequestHandler):
     """Handler for admission webhook requests"""
     
+    # HTTP/1.1 keeps API server connections (and their TLS sessions) open
+    # across AdmissionReviews. Idle connections are closed after `timeout`
+    # seconds, which is kept above the API server's own idle timeout so the
+    # server never closes a connection the client is about to reuse.
+    protocol_version = 'HTTP/1.1'
+    timeout = 120
+    
+    # Headers and body go out as separate TLS records; with Nagle's algorithm
+    # the body waits for the client's delayed ACK of the headers (~40ms)
+    disable_nagle_algorithm = True
+    
+    # Serve /debug/* profiling endpoints from the worker process handling the connection
+    debug_enabled = False
+    
+    # With a shard count, GPU pods are labelled with their shard for sharded schedulers
+    shard_count = 0
+    shard_by = SHARD_BY_NAMESPACE
+    
+    # Cache of ConfigMaps holding maps referenced by "configmap:<name>" annotations
+    map_configmaps: Optional[MapConfigMapCache] = None
+    
     def __init__(self, *args, **kwargs):
         self.logger = logging.getLogger(__name__)
         super().__init__(*args, **kwargs)
     
+    def log_message(self, format, *args):
+        # The default access log writes a line to stderr per request; keep it at debug
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"{self.address_string()} - {format % args}")
+    
+    def do_GET(self):
+        """Handle opt-in debug requests"""
+        from urllib.parse import urlparse
+        parsed = urlparse(self.path)
+        
+        result = handle_debug_request(parsed.path, parsed.query) if self.debug_enabled else None
+        if result is None:
+            self.send_error(404)
+            return
+        
+        status, body = result
+        body_bytes = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body_bytes)))
+        self.end_headers()
+        self.wfile.write(body_bytes)
+    
     def do_POST(self):
         """Handle admission review requests"""
         # Parse URL to extract path without query parameters
@@ -28,56 +239,37 @@ class WebhookHandler(BaseHTTPRequestHandler):
             self.send_error(404)
             return
             
+        start = time.perf_counter()
         try:
             # Read request body
             content_length = int(self.headers['Content-Length'])
             body = self.rfile.read(content_length)
-            admission_review = json.loads(body)
             
-            # Process the admission request
-            response = self.mutate_pod(admission_review)
+            # Most pods are not ours: answer those without decoding the review
+            response_bytes = fast_path_response(body)
+            if response_bytes is not None:
+                FAST_PATH_REQUESTS.inc()
+            else:
+                admission_review = json_loads(body)
+                
+                # Process the admission request
+                response = self.mutate_pod(admission_review)
+                response_bytes = json_dumps(response)
             
             # Send response
             self.send_response(200)
             self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(response_bytes)))
             self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
+            self.wfile.write(response_bytes)
             
         except Exception as e:
+            REQUEST_ERRORS.inc()
             logging.error(f"Error processing webhook request: {e}")
             self.send_error(500, str(e))
-    
-    def parse_gpu_scheduling_map(self, annotation_value: str) -> Dict[int, Tuple[str, str]]:
-        """Parse the gpu-scheduling-map annotation"""
-        scheduling_map = {}
-        
-        try:
-            lines = annotation_value.strip().split('\n')
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                # Parse format: "0=node1:0,1"
-                if '=' not in line:
-                    continue
-                    
-                pod_index_str, node_gpu_str = line.split('=', 1)
-                pod_index = int(pod_index_str.strip())
-                
-                if ':' not in node_gpu_str:
-                    continue
-                    
-                node_name, gpu_devices = node_gpu_str.split(':', 1)
-                node_name = node_name.strip()
-                gpu_devices = gpu_devices.strip()
-                
-                scheduling_map[pod_index] = (node_name, gpu_devices)
-                
-        except Exception as e:
-            logging.error(f"Error parsing GPU scheduling map: {e}")
             
-        return scheduling_map
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - start)
     
     def get_pod_index_from_generate_name(self, pod_name: str, generate_name: str) -> Optional[int]:
         """Extract pod index from pod name based on generateName pattern"""
@@ -104,43 +296,44 @@ class WebhookHandler(BaseHTTPRequestHandler):
     
     def create_patch(self, pod: dict, cuda_devices: str) -> List[dict]:
         """Create JSON patch to add CUDA_VISIBLE_DEVICES environment variable"""
-        patches = []
+        return build_patch(container_env_shape(pod), cuda_devices)
+    
+    def get_map_devices(self, pod: dict, gpu_map: str, warn: bool = True) -> Optional[str]:
+        """Look up a pod's GPU devices in its gpu-scheduling-map annotation"""
+        log = logging.warning if warn else logging.debug
         
-        containers = pod.get('spec', {}).get('containers', [])
-        for i, container in enumerate(containers):
-            env = container.get('env', [])
-            
-            # Check if CUDA_VISIBLE_DEVICES already exists
-            cuda_exists = any(e.get('name') == 'CUDA_VISIBLE_DEVICES' for e in env)
-            
-            if cuda_exists:
-                # Update existing environment variable
-                for j, env_var in enumerate(env):
-                    if env_var.get('name') == 'CUDA_VISIBLE_DEVICES':
-                        patches.append({
-                            'op': 'replace',
-                            'path': f'/spec/containers/{i}/env/{j}/value',
-                            'value': cuda_devices
-                        })
-                        break
-            else:
-                # Add new environment variable
-                if not env:
-                    # Initialize env array if it doesn't exist
-                    patches.append({
-                        'op': 'add',
-                        'path': f'/spec/containers/{i}/env',
-                        'value': [{'name': 'CUDA_VISIBLE_DEVICES', 'value': cuda_devices}]
-                    })
-                else:
-                    # Append to existing env array
-                    patches.append({
-                        'op': 'add',
-                        'path': f'/spec/containers/{i}/env/-',
-                        'value': {'name': 'CUDA_VISIBLE_DEVICES', 'value': cuda_devices}
-                    })
+        # Get pod name (might be generated)
+        pod_name = pod.get('metadata', {}).get('name', '')
+        generate_name = pod.get('metadata', {}).get('generateName', '')
         
-        return patches
+        # If pod name is not set (common for controllers), we need to predict it
+        if not pod_name and generate_name:
+            # For StatefulSets, we can predict the name based on the ordinal
+            # This is a limitation - we might need additional context
+            log(f"Pod name not set, using generateName: {generate_name}")
+            # We'll handle this in the scheduler instead
+            return None
+        
+        # Parse scheduling map (compiled once per distinct annotation)
+        scheduling_map = compile_scheduling_map(gpu_map)
+        if not scheduling_map:
+            log("Failed to parse gpu-scheduling-map")
+            return None
+        
+        # Get pod index
+        pod_index = self.get_pod_index_from_generate_name(pod_name, generate_name)
+        if pod_index is None:
+            log(f"Could not determine pod index for {pod_name}")
+            # For now, we'll try to handle this in the scheduler
+            return None
+        
+        # Find GPU assignment
+        assignment = scheduling_map.get(pod_index)
+        if assignment is None:
+            log(f"No GPU assignment for pod index {pod_index}")
+            return None
+        
+        return assignment[1]
     
     def mutate_pod(self, admission_review: dict) -> dict:
         """Process admission review and return mutation response"""
@@ -165,68 +358,96 @@ class WebhookHandler(BaseHTTPRequestHandler):
             logging.debug(f"Pod uses different scheduler: {scheduler_name}")
             return response
         
-        # Check for GPU scheduling annotation
-        annotations = pod.get('metadata', {}).get('annotations', {})
+        # Check for GPU scheduling annotations
+        metadata = pod.get('metadata', {})
+        annotations = metadata.get('annotations') or {}
         gpu_map = annotations.get('gpu-scheduling-map')
-        if not gpu_map:
-            logging.debug("No gpu-scheduling-map annotation found")
+        gpu_count = annotations.get(GPU_COUNT_ANNOTATION)
+        if not gpu_map and not gpu_count:
+            logging.debug("No gpu-scheduling-map or gpu-count annotation found")
             return response
         
-        # Get pod name (might be generated)
-        pod_name = pod.get('metadata', {}).get('name', '')
-        generate_name = pod.get('metadata', {}).get('generateName', '')
-        
-        # If pod name is not set (common for controllers), we need to predict it
-        if not pod_name and generate_name:
-            # For StatefulSets, we can predict the name based on the ordinal
-            # This is a limitation - we might need additional context
-            logging.warning(f"Pod name not set, using generateName: {generate_name}")
-            # We'll handle this in the scheduler instead
-            return response
-        
-        # Parse scheduling map
-        scheduling_map = self.parse_gpu_scheduling_map(gpu_map)
-        if not scheduling_map:
-            logging.warning("Failed to parse gpu-scheduling-map")
-            return response
-        
-        # Get pod index
-        pod_index = self.get_pod_index_from_generate_name(pod_name, generate_name)
-        if pod_index is None:
-            logging.warning(f"Could not determine pod index for {pod_name}")
-            # For now, we'll try to handle this in the scheduler
-            return response
+        if gpu_map and map_reference(gpu_map):
+            if self.map_configmaps is None:
+                logging.warning("gpu-scheduling-map references a ConfigMap but ConfigMap maps are disabled")
+                gpu_map = None
+            else:
+                gpu_map = self.map_configmaps.resolve(request.get('namespace') or metadata.get('namespace', ''),
+                                                      gpu_map)
         
-        # Find GPU assignment
-        if pod_index not in scheduling_map:
-            logging.warning(f"No GPU assignment for pod index {pod_index}")
+        pod_name = metadata.get('name', '') or metadata.get('generateName', '')
+        cuda_devices = self.get_map_devices(pod, gpu_map, warn=not gpu_count) if gpu_map else None
+        if cuda_devices is None and not gpu_count:
             return response
+        # Automatically placed pods read devices chosen by the scheduler at container start
+        source = cuda_devices if cuda_devices is not None else f"{ASSIGNED_DEVICES_ANNOTATION} annotation"
         
-        _, cuda_devices = scheduling_map[pod_index]
-        logging.info(f"Injecting CUDA_VISIBLE_DEVICES={cuda_devices} for pod {pod_name} (index {pod_index})")
-        
-        # Create patch
-        patches = self.create_patch(pod, cuda_devices)
-        if patches:
-            # Encode patch as base64
-            patch_bytes = json.dumps(patches).encode()
-            patch_base64 = base64.b64encode(patch_bytes).decode()
-            
+        # Create patch (replicas of a workload share the same encoded patch)
+        shape = container_env_shape(pod)
+        # The object's namespace may not be filled in yet on CREATE; the request's always is
+        shard = pod_dict_shard(pod, self.shard_count, self.shard_by, request.get('namespace')) \
+            if self.shard_count else None
+        patch_base64 = encoded_patch(shape, cuda_devices, shard, bool(metadata.get('labels')))
+        if patch_base64:
             response['response']['patchType'] = 'JSONPatch'
             response['response']['patch'] = patch_base64
-            logging.info(f"Created patch for pod {pod_name}: {patches}")
+            PATCHED_PODS.inc()
+            logging.info(f"Injecting CUDA_VISIBLE_DEVICES={source} for pod {pod_name} ({len(shape)} containers)",
+                         extra={'pod': pod_name, 'devices': source, 'containers': len(shape)})
         
         return response
 
 
+class TLSThreadingHTTPServer(ThreadingHTTPServer):
+    """
+    Thread-per-connection HTTPS server
+
+    The TLS handshake runs in the connection's worker thread rather than in
+    the accept loop, so a slow handshake never blocks other connections.
+    """
+    
+    daemon_threads = True
+    request_queue_size = 128
+    
+    def __init__(self, server_address, handler_class, ssl_context: ssl.SSLContext, reuse_port: bool = False):
+        self.ssl_context = ssl_context
+        self.allow_reuse_port = reuse_port
+        super().__init__(server_address, handler_class)
+    
+    def finish_request(self, request, client_address):
+        """Perform the TLS handshake and serve the connection"""
+        # A client that connects and never completes the handshake is dropped
+        # after the handler's idle timeout instead of holding a thread forever
+        request.settimeout(self.RequestHandlerClass.timeout)
+        try:
+            tls_request = self.ssl_context.wrap_socket(request, server_side=True)
+        except (ssl.SSLError, OSError) as e:
+            logging.debug(f"TLS handshake with {client_address[0]} failed: {e}")
+            return
+        
+        try:
+            self.RequestHandlerClass(tls_request, client_address, self)
+        finally:
+            self.shutdown_request(tls_request)
+
+
 class WebhookServer:
     """HTTPS server for admission webhook"""
     
-    def __init__(self, port: int = 8443, cert_file: str = '/certs/tls.crt', key_file: str = '/certs/tls.key'):
+    def __init__(self, port: int = 8443, cert_file: str = '/certs/tls.crt', key_file: str = '/certs/tls.key',
+                 workers: int = 1, metrics_port: int = 8081, debug_endpoints: bool = False,
+                 shard_count: int = 0, shard_by: str = SHARD_BY_NAMESPACE, configmap_maps: bool = True):
         self.port = port
         self.cert_file = cert_file
         self.key_file = key_file
+        self.workers = workers
+        self.debug_endpoints = debug_endpoints
+        self.shard_count = shard_count
+        self.shard_by = shard_by
+        self.configmap_maps = configmap_maps
         self.setup_logging()
+        # Plain HTTP /health, /ready and /metrics, served by the parent process
+        self.health_server = HealthServer(port=metrics_port, service="gpu-webhook", debug=debug_endpoints)
     
     def setup_logging(self):
         """Configure logging"""
@@ -236,32 +457,93 @@ class WebhookServer:
         )
         self.logger = logging.getLogger(__name__)
     
+    def create_ssl_context(self) -> ssl.SSLContext:
+        """Create the server TLS context"""
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(self.cert_file, self.key_file)
+        context.set_alpn_protocols(['http/1.1'])
+        # Session tickets (on by default) let the API server resume sessions
+        # without a full handshake. Worker processes are forked after this
+        # context exists, so they share ticket keys and can resume each
+        # other's sessions.
+        return context
+    
+    def serve(self, context: ssl.SSLContext, slot: int = 0):
+        """Serve requests in this process until interrupted"""
+        metrics.REGISTRY.use_slot(slot)
+        WebhookHandler.debug_enabled = self.debug_endpoints
+        WebhookHandler.shard_count = self.shard_count
+        WebhookHandler.shard_by = self.shard_by
+        # Each worker process watches map ConfigMaps itself: threads do not survive the fork
+        if self.configmap_maps and InClusterConfigMapSource.available():
+            WebhookHandler.map_configmaps = MapConfigMapCache(InClusterConfigMapSource())
+            WebhookHandler.map_configmaps.start()
+        elif self.configmap_maps:
+            self.logger.warning("No in-cluster service account; ConfigMap-referenced maps are unavailable")
+        server = TLSThreadingHTTPServer(('0.0.0.0', self.port), WebhookHandler, context,
+                                        reuse_port=self.workers > 1)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    
     def run(self):
         """Start the webhook server"""
-        self.logger.info(f"Starting webhook server on port {self.port}")
+        self.logger.info(f"Starting webhook server on port {self.port} with {self.workers} worker process(es)")
         
-        # Create HTTPS server
-        server = HTTPServer(('0.0.0.0', self.port), WebhookHandler)
+        context = self.create_ssl_context()
         
-        # Configure SSL
-        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
-        context.load_cert_chain(self.cert_file, self.key_file)
-        server.socket = context.wrap_socket(server.socket, server_side=True)
+        if self.workers <= 1:
+            self.health_server.start_background()
+            self.logger.info("Webhook server ready")
+            try:
+                self.serve(context)
+            finally:
+                self.logger.info("Webhook server stopping...")
+            return
+        
+        # Multiple processes each bind the port with SO_REUSEPORT and the
+        # kernel balances incoming connections between them. Each worker
+        # records metrics in its own shared-memory slot, summed by /metrics.
+        import multiprocessing
+        metrics.REGISTRY.share(self.workers)
+        mp_context = multiprocessing.get_context('fork')
+        processes = []
+        for i in range(self.workers):
+            process = mp_context.Process(target=self.serve, args=(context, i), name=f"webhook-worker-{i}",
+                                         daemon=True)
+            process.start()
+            processes.append(process)
         
+        self.health_server.start_background()
         self.logger.info("Webhook server ready")
         try:
-            server.serve_forever()
+            for process in processes:
+                process.join()
         except KeyboardInterrupt:
             self.logger.info("Webhook server stopping...")
         finally:
-            server.shutdown()
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
 
 
 def main():
     """Main entry point"""
-    server = WebhookServer()
+    setup_logging_from_env('gpu-webhook')
+    server = WebhookServer(
+        port=int(os.environ.get('WEBHOOK_PORT', '8443')),
+        workers=int(os.environ.get('WEBHOOK_WORKERS', '1')),
+        metrics_port=int(os.environ.get('WEBHOOK_METRICS_PORT', '8081')),
+        debug_endpoints=os.environ.get('DEBUG_ENDPOINTS', 'false').lower() == 'true',
+        shard_count=int(os.environ.get('SHARD_COUNT', '0')),
+        shard_by=os.environ.get('SHARD_BY', SHARD_BY_NAMESPACE),
+        configmap_maps=os.environ.get('CONFIGMAP_MAPS', 'true').lower() == 'true'
+    )
     server.run()
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()